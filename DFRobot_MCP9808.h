@@ -69,7 +69,7 @@
 #define ENABLE_ALERT                0x08
 #define DISABLE_ALERT               0x00                   ///< default disable
 
-#define ONLY_CRIT_RESPONSE          0x40
+#define ONLY_CRIT_RESPONSE          0x04
 #define UPPER_LOWER_CRIT_RESPONSE   0x00                   ///< dafault output mode
 
 #define MCP9808_ADDRESS_0               0x18
@@ -9,14 +9,18 @@
   @date 2021-04-16
   @url https://github.com/DFRobot/DFRobot_MCP9808
 '''
-import serial
-import time
-import smbus
-import spidev
 import os
-import RPi.GPIO as GPIO
+import time
+import errno
+import heapq
+import struct
+import weakref
+from array import array
+from collections import namedtuple
+
+from DFRobot_MCP9808_codec import *
+from DFRobot_MCP9808_codec import _temperature_table ,_load_numpy ,_parsing_decimal ,_decode_temperature
 
-#GPIO.setwarnings(False)
 ERROR                          = -1
 NONE                           = (0x00)
 
@@ -28,6 +32,8 @@ MCP9808_ADDRESS_4       = 0x1c
 MCP9808_ADDRESS_5       = 0x1d
 MCP9808_ADDRESS_6       = 0x1e
 MCP9808_ADDRESS_7       = 0x1f
+MCP9808_ADDRESSES       = (MCP9808_ADDRESS_0 ,MCP9808_ADDRESS_1 ,MCP9808_ADDRESS_2 ,MCP9808_ADDRESS_3 ,
+                           MCP9808_ADDRESS_4 ,MCP9808_ADDRESS_5 ,MCP9808_ADDRESS_6 ,MCP9808_ADDRESS_7)
 
 FRU_REGISTER                   = (0x00 & 0x0F)
 CONFIG_REGISTER                = (0x01 & 0x0F)
@@ -76,29 +82,924 @@ ENABLE_ALERT                   = 0x08
 ## default disable
 DISABLE_ALERT                  = 0x00
 
-ONLY_CRIT_RESPONSE             = 0x40
+ONLY_CRIT_RESPONSE             = 0x04
 ## dafault output mode
 UPPER_LOWER_CRIT_RESPONSE      = 0x00
 
+## registers kept in the register shadow, (register, length)
+SHADOW_REGISTERS               = ((CONFIG_REGISTER ,2) ,(T_UPPER_REGISTER ,2) ,(T_LOWER_REGISTER ,2) ,(T_CRIT_REGISTER ,2) ,(RESOLUTION_REGISTER ,1))
+
+## temp conversion time of each resolution, unit: s
+CONVERSION_TIME                = {RESOLUTION_0_5: 0.030 ,RESOLUTION_0_25: 0.065 ,RESOLUTION_0_125: 0.130 ,RESOLUTION_0_0625: 0.250}
+
+## i2c-dev ioctl request of combined transfers, flag of a read message and message limit of one transfer
+I2C_RDWR                       = 0x0707
+I2C_M_RD                       = 0x0001
+I2C_RDWR_MAX_MSGS              = 42
+
+## comparator state bits of TEMPERATURE_REGISTER, see get_comparator_state
+TCRIT_FLAG                     = 0x04
+TUPPER_FLAG                    = 0x02
+TLOWER_FLAG                    = 0x01
+
+## states of the circuit breaker of an address, see MCP9808Breaker
+BREAKER_CLOSED                 = 0
+BREAKER_OPEN                   = 1
+BREAKER_HALF_OPEN              = 2
+
+_monotonic = getattr(time, 'monotonic', time.time)
+
+## queue module, loaded on first use
+_queue = None
+
+def _queue_module():
+  global _queue
+  if _queue is None:
+    try:
+      import queue
+    except ImportError:
+      import Queue as queue
+    _queue = queue
+  return _queue
+_perf_counter = getattr(time, 'perf_counter', _monotonic)
+
+def _sleep_to_grid(deadline ,period):
+  '''!
+    @brief Sleep until the next deadline of a fixed grid, deadlines already passed are skipped
+    @return Tuple (deadline, number of skipped deadlines)
+  '''
+  deadline += period
+  missed = 0
+  now = _monotonic()
+  if now > deadline:
+    missed = int((now - deadline)//period) + 1
+    deadline += missed*period
+  time.sleep(max(0.0 ,deadline - _monotonic()))
+  return deadline ,missed
+
+def _comparator_text(state):
+  '''!
+    @brief Character string of the comparator status
+  '''
+  str1 = ""
+  if state&TCRIT_FLAG:
+    str1 += " TA >= TCRIT ,"
+  else:
+    str1 += " TA < TCRIT ,"
+  if state&TUPPER_FLAG:
+    str1 += " TA > TUPPER ,"
+  else:
+    str1 += " TA <= TUPPER ,"
+  if state&TLOWER_FLAG:
+    str1 += " TA < TLOWER"
+  else:
+    str1 += " TA >= TLOWER"
+  return str1
+
+class MCP9808Config(object):
+  '''!
+    @brief Declarative configuration profile applied with DFRobot_MCP9808.apply(), a setting left None keeps the value of the sensor
+  '''
+  def __init__(self ,power_mode=None ,resolution=None ,alert_output_mode=None ,polarity=None ,response_mode=None ,
+               hysteresis=None ,thresholds=None ,lock=None):
+    '''!
+      @param power_mode        POWER_UP_MODE or LOW_POWER_MODE, see set_power_mode
+      @param resolution        RESOLUTION_0_5 ... RESOLUTION_0_0625, see set_resolution
+      @param alert_output_mode COMPARATOR_OUTPUT_MODE, INTERRPUT_OUTPUT_MODE or DISABLE_OUTPUT_MODE, see set_alert_output_mode
+      @param polarity          POLARITY_HIGH or POLARITY_LOW, see set_polarity
+      @param response_mode     UPPER_LOWER_CRIT_RESPONSE or ONLY_CRIT_RESPONSE, see set_alert_response_mode
+      @param hysteresis        HYSTERESIS_0_0 ... HYSTERESIS_6_0, see set_alert_hysteresis
+      @param thresholds        Tuple (crit, upper, lower), see set_threshold, each -256 to +255.75℃
+      @param lock              CRIT_LOCK, WIN_LOCK or CRIT_WIN_LOCK, written after everything else, see set_lock_state
+      @n                       NO_LOCK only holds for an unlocked sensor, the lock bits are cleared by a power-off reset alone
+    '''
+    self.power_mode = power_mode
+    self.resolution = resolution
+    self.alert_output_mode = alert_output_mode
+    self.polarity = polarity
+    self.response_mode = response_mode
+    self.hysteresis = hysteresis
+    self.thresholds = thresholds
+    self.lock = lock
+
+  def check(self):
+    '''!
+      @brief Check the settings
+      @return 0 for a valid profile, otherwise the error state of apply()
+    '''
+    valid = ((self.power_mode ,(POWER_UP_MODE ,LOW_POWER_MODE)) ,
+             (self.resolution ,(RESOLUTION_0_5 ,RESOLUTION_0_25 ,RESOLUTION_0_125 ,RESOLUTION_0_0625)) ,
+             (self.alert_output_mode ,(COMPARATOR_OUTPUT_MODE ,INTERRPUT_OUTPUT_MODE ,DISABLE_OUTPUT_MODE)) ,
+             (self.polarity ,(POLARITY_HIGH ,POLARITY_LOW)) ,
+             (self.response_mode ,(UPPER_LOWER_CRIT_RESPONSE ,ONLY_CRIT_RESPONSE)) ,
+             (self.hysteresis ,(HYSTERESIS_0_0 ,HYSTERESIS_1_5 ,HYSTERESIS_3_0 ,HYSTERESIS_6_0)) ,
+             (self.lock ,(NO_LOCK ,CRIT_LOCK ,WIN_LOCK ,CRIT_WIN_LOCK)))
+    for value ,values in valid:
+      if value is not None and value not in values:
+        return 0xFE
+    if self.thresholds is not None:
+      try:
+        crit ,upper ,lower = self.thresholds
+        for value in self.thresholds:
+          encode_threshold(value)
+      except (TypeError ,ValueError):                      # not (crit, upper, lower) or outside -256 to +255.75
+        return 0xFE
+      if crit <= upper:
+        return -3
+      if (upper-lower) < 2.0:
+        return -2
+    return 0
+
+  def config_word(self ,current):
+    '''!
+      @brief Compute the CONFIG_REGISTER bytes of the profile
+      @param current [MSB, LSB] read from the sensor, kept for the settings left None
+      @return [MSB, LSB]
+    '''
+    msb ,lsb = current
+    if self.power_mode is not None:
+      msb = (msb&0x06) | (self.power_mode&0x01)
+    if self.hysteresis is not None:
+      msb = (msb&0x01) | self.hysteresis
+    if self.alert_output_mode == DISABLE_OUTPUT_MODE:
+      lsb = (lsb&0xF7) | DISABLE_ALERT
+    elif self.alert_output_mode is not None:
+      lsb = (lsb&0xF6) | self.alert_output_mode | ENABLE_ALERT
+    if self.polarity is not None:
+      lsb = (lsb&0xFD) | self.polarity
+    if self.response_mode is not None:
+      lsb = (lsb&0xFB) | self.response_mode
+    if self.lock is not None:
+      lsb |= self.lock
+    return [msb ,lsb]
+
+  def threshold_words(self):
+    '''!
+      @brief Compute the threshold register bytes of the profile
+      @return dict of register: [MSB, LSB], empty when thresholds is None
+    '''
+    if self.thresholds is None:
+      return {}
+    words = {}
+    for reg ,value in zip((T_CRIT_REGISTER ,T_UPPER_REGISTER ,T_LOWER_REGISTER) ,self.thresholds):
+      word = encode_threshold(value)
+      words[reg] = [word>>8 ,word&0xFF]
+    return words
+
+
+class MCP9808Snapshot(namedtuple("MCP9808Snapshot" ,(
+    "raw" ,"power_mode" ,"hysteresis" ,"lock" ,"alert_output_mode" ,"polarity" ,"response_mode" ,"alert_enable" ,"alert_status" ,
+    "upper" ,"lower" ,"crit" ,"temperature" ,"state" ,"manufacturer_id" ,"device_id" ,"revision" ,"resolution"))):
+  '''!
+    @brief Immutable decoded copy of all nine registers, see DFRobot_MCP9808.snapshot()
+    @n     Snapshots compare and hash as tuples, equal snapshots mean equal register contents
+  '''
+  __slots__ = ()
+
+  @classmethod
+  def from_registers(cls ,raw):
+    '''!
+      @brief Decode the register words
+      @param raw Tuple of the words of FRU_REGISTER to RESOLUTION_REGISTER, the resolution register is one byte
+    '''
+    config = raw[CONFIG_REGISTER]
+    msb = config>>8
+    lsb = config&0xFF
+    temperature = raw[TEMPERATURE_REGISTER]
+    return cls(raw=tuple(raw) ,
+               power_mode=0 if (msb&0x01) == LOW_POWER_MODE else 1 ,
+               hysteresis=msb&0x06 ,
+               lock=lsb&0xC0 ,
+               alert_output_mode=DISABLE_OUTPUT_MODE if (lsb&0x08) == DISABLE_ALERT else lsb&0x01 ,
+               polarity=lsb&0x02 ,
+               response_mode=lsb&0x04 ,
+               alert_enable=lsb&0x08 ,
+               alert_status=(lsb&0x10) != 0 ,
+               upper=decode_threshold(raw[T_UPPER_REGISTER]) ,
+               lower=decode_threshold(raw[T_LOWER_REGISTER]) ,
+               crit=decode_threshold(raw[T_CRIT_REGISTER]) ,
+               temperature=decode_temperature(temperature) ,
+               state=temperature>>13 ,
+               manufacturer_id=raw[MANUFACTURER_REGISTER]&0xFF ,
+               device_id=raw[DEVICE_REGISTER]>>8 ,
+               revision=raw[DEVICE_REGISTER]&0xFF ,
+               resolution=raw[RESOLUTION_REGISTER]&0x03)
+
+
+class MCP9808Sample(object):
+  '''!
+    @brief One reading of TEMPERATURE_REGISTER, the temp and the comparator state come from the same conversion
+  '''
+  __slots__ = ('temperature' ,'state' ,'raw' ,'timestamp')
+
+  def __init__(self ,temperature ,state ,raw ,timestamp):
+    ## The temp value is a floating point (unit is ℃)
+    self.temperature = temperature
+    ## Value of the comparator status, bit2 TA >= TCRIT, bit1 TA > TUPPER, bit0 TA < TLOWER
+    self.state = state
+    ## The raw 16 bit register word, comparator bits included
+    self.raw = raw
+    ## Monotonic time of the read, unit: s
+    self.timestamp = timestamp
+
+  @property
+  def text(self):
+    '''!
+      @brief Character string of the comparator status, only built when it is asked for
+    '''
+    return _comparator_text(self.state)
+
+  @property
+  def tcrit(self):
+    return (self.state&TCRIT_FLAG) != 0
+
+  @property
+  def tupper(self):
+    return (self.state&TUPPER_FLAG) != 0
+
+  @property
+  def tlower(self):
+    return (self.state&TLOWER_FLAG) != 0
+
+  def __repr__(self):
+    return "MCP9808Sample(temperature=%r, state=%d, raw=0x%04X)"%(self.temperature ,self.state ,self.raw)
+
+class MCP9808Error(IOError):
+  '''!
+    @brief Base class of the errors raised by the driver, an IOError so existing "except IOError" handlers keep working
+  '''
+
+
+class MCP9808BusError(MCP9808Error):
+  '''!
+    @brief An I2C transaction still failed after the retries of the RetryPolicy
+  '''
+  def __init__(self ,addr ,reg ,attempts ,cause):
+    '''!
+      @param addr     I2C address of the sensor
+      @param reg      Register of the failed transaction
+      @param attempts Number of attempts made
+      @param cause    The exception raised by the last attempt
+    '''
+    super(MCP9808BusError, self).__init__("I2C transaction with 0x%02x register 0x%02x failed after %d attempt(s): %s"%(addr ,reg ,attempts ,cause))
+    self.errno = getattr(cause ,"errno" ,None)
+    self.addr = addr
+    self.reg = reg
+    self.attempts = attempts
+    self.cause = cause
+
+
+class MCP9808TimeoutError(MCP9808BusError):
+  '''!
+    @brief The deadline of the RetryPolicy ran out before the transaction succeeded
+  '''
+
+
+class RetryPolicy(object):
+  '''!
+    @brief Retry policy of the bus transactions of one sensor, bounded exponential back-off with jitter and a deadline per call
+  '''
+  def __init__(self ,retries=2 ,backoff=0.002 ,max_backoff=0.02 ,jitter=0.5 ,deadline=0.05):
+    '''!
+      @param retries     Number of retries of a failed transaction, 0 raises on the first failure
+      @param backoff     Back-off before the first retry, doubled on every retry, unit: s
+      @param max_backoff Upper limit of the back-off, unit: s
+      @param jitter      Fraction of the back-off taken off at random, 0 to 1, spreads the retries of sensors sharing a bus
+      @param deadline    Time limit of one call including all retries, unit: s, None for no limit
+    '''
+    if retries < 0 or not 0 <= jitter <= 1:
+      raise ValueError("retries must be >= 0 and jitter between 0 and 1")
+    self.retries = retries
+    self.backoff = backoff
+    self.max_backoff = max_backoff
+    self.jitter = jitter
+    self.deadline = deadline
+    self._random = None
+
+  def delays(self):
+    '''!
+      @brief Generate the back-off before each retry, unit: s
+    '''
+    if self.jitter and self._random is None:
+      import random
+      self._random = random.random
+    delay = self.backoff
+    for _ in range(self.retries):
+      delay = min(delay ,self.max_backoff)
+      if self.jitter:
+        yield delay*(1.0 - self.jitter*self._random())
+      else:
+        yield delay
+      delay *= 2
+
+## policy used by sensors that have not been given one
+DEFAULT_RETRY_POLICY = RetryPolicy()
+
+
+## names of the registers used by the statistics
+REGISTER_NAMES = {
+  FRU_REGISTER:          "FRU",
+  CONFIG_REGISTER:       "CONFIG",
+  T_UPPER_REGISTER:      "T_UPPER",
+  T_LOWER_REGISTER:      "T_LOWER",
+  T_CRIT_REGISTER:       "T_CRIT",
+  TEMPERATURE_REGISTER:  "TEMPERATURE",
+  MANUFACTURER_REGISTER: "MANUFACTURER",
+  DEVICE_REGISTER:       "DEVICE",
+  RESOLUTION_REGISTER:   "RESOLUTION",
+}
+
+## upper bounds of the latency histogram buckets, unit: s, the last bucket holds everything slower
+LATENCY_BUCKETS = (0.00005 ,0.0001 ,0.0002 ,0.0005 ,0.001 ,0.002 ,0.005 ,0.01 ,0.02 ,0.05 ,0.1)
+
+class MCP9808Stats(object):
+  '''!
+    @brief Transaction counters by register, direction ("read", "write") and outcome ("ok", "retried", "failed")
+    @n     and a fixed-bucket latency histogram by register and direction, one object can be shared by several sensors
+  '''
+  def __init__(self):
+    self._counts = {}
+    self._histograms = {}
+
+  def record(self ,reg ,direction ,outcome ,latency):
+    '''!
+      @brief Count one read_reg/write_reg call
+      @param latency Time of the call including the retries, unit: s
+    '''
+    key = (reg ,direction ,outcome)
+    self._counts[key] = self._counts.get(key ,0) + 1
+    histogram = self._histograms.get((reg ,direction))
+    if histogram is None:
+      histogram = self._histograms[(reg ,direction)] = [0]*(len(LATENCY_BUCKETS) + 1)
+    i = 0
+    for bound in LATENCY_BUCKETS:
+      if latency <= bound:
+        break
+      i += 1
+    histogram[i] += 1
+
+  def reset(self):
+    self._counts.clear()
+    self._histograms.clear()
+
+  def counts(self):
+    '''!
+      @brief Get the counters
+      @return dict of (register name, direction, outcome): number of calls
+    '''
+    return dict(((REGISTER_NAMES.get(reg ,reg) ,direction ,outcome) ,n) for (reg ,direction ,outcome) ,n in self._counts.items())
+
+  def total(self ,reg=None ,direction=None ,outcome=None):
+    '''!
+      @brief Number of calls matching the given register, direction and outcome, None matches all
+    '''
+    return sum(n for (r ,d ,o) ,n in self._counts.items()
+               if (reg is None or r == reg) and (direction is None or d == direction) and (outcome is None or o == outcome))
+
+  def histogram(self ,reg ,direction):
+    '''!
+      @brief Get the latency histogram of one register and direction
+      @return List of (upper bound of the bucket in s, calls), the bound of the last bucket is None
+    '''
+    histogram = self._histograms.get((reg ,direction)) or [0]*(len(LATENCY_BUCKETS) + 1)
+    return list(zip(LATENCY_BUCKETS + (None ,) ,histogram))
+
+  def percentile(self ,reg ,direction ,q):
+    '''!
+      @brief Upper bound of the bucket holding the q-th percentile of the latency, unit: s
+      @return None when nothing was counted or the percentile lies in the last bucket
+    '''
+    histogram = self._histograms.get((reg ,direction))
+    if not histogram:
+      return None
+    rank = sum(histogram)*q/100.0
+    seen = 0
+    for bound ,n in zip(LATENCY_BUCKETS + (None ,) ,histogram):
+      seen += n
+      if n and seen >= rank:
+        return bound
+    return None
+
+  def report(self):
+    '''!
+      @brief Text table of the counters and the median and 99th percentile latency, busiest register first
+    '''
+    lines = ["%-13s %-6s %8s %8s %8s %10s %10s"%("register" ,"dir" ,"ok" ,"retried" ,"failed" ,"p50 us" ,"p99 us")]
+    keys = sorted(self._histograms ,key=lambda k: -sum(self._histograms[k]))
+    for reg ,direction in keys:
+      p50 = self.percentile(reg ,direction ,50)
+      p99 = self.percentile(reg ,direction ,99)
+      lines.append("%-13s %-6s %8d %8d %8d %10s %10s"%(REGISTER_NAMES.get(reg ,reg) ,direction ,
+                   self._counts.get((reg ,direction ,"ok") ,0) ,self._counts.get((reg ,direction ,"retried") ,0) ,
+                   self._counts.get((reg ,direction ,"failed") ,0) ,
+                   ">max" if p50 is None else "%g"%(p50*1e6) ,">max" if p99 is None else "%g"%(p99*1e6)))
+    return "\n".join(lines)
+
+
+## priorities of MCP9808BusLock, a lower value is served first
+PRIORITY_ALERT                 = 0
+PRIORITY_NORMAL                = 1
+PRIORITY_BULK                  = 2
+
+## MCP9808BusLock of every bus in use, keyed by bus number (by id() for backend objects without one),
+## an entry goes away with the last sensor holding the lock
+_BUS_LOCKS = weakref.WeakValueDictionary()
+## SMBusBackend of every bus number in use, shared by the sensors built from a bus number
+_SMBUS_BACKENDS = weakref.WeakValueDictionary()
+## guards the creation of the shared locks and backends, set up on first use
+_REGISTRY_LOCK = []
+
+def _registry_lock():
+  if not _REGISTRY_LOCK:
+    import threading
+    _REGISTRY_LOCK.append(threading.Lock())
+  return _REGISTRY_LOCK[0]
+
+def _bus_key(bus):
+  '''!
+    @brief Key of the bus of a backend, the bus number for SMBusBackend and I2CDevBackend
+  '''
+  number = getattr(bus ,"bus" ,None)
+  if isinstance(bus ,(SMBusBackend ,I2CDevBackend)) and isinstance(number ,int):
+    return number
+  return ("backend" ,id(bus))
+
+class _BusLockSection(object):
+  __slots__ = ('lock' ,'priority')
+
+  def __init__(self ,lock ,priority):
+    self.lock = lock
+    self.priority = priority
+
+  def __enter__(self):
+    self.lock.acquire(self.priority)
+    return self.lock
+
+  def __exit__(self ,*exc):
+    self.lock.release()
+
+
+class MCP9808BusLock(object):
+  '''!
+    @brief Reentrant lock of one I2C bus, the waiting threads are served by priority, in arrival order within a priority
+    @n     "with lock:" takes it at PRIORITY_NORMAL, "with lock.hold(priority):" at another priority
+  '''
+  def __init__(self):
+    import threading
+    try:
+      from thread import get_ident
+    except ImportError:
+      from threading import get_ident
+    self._get_ident = get_ident
+    self._mutex = threading.Lock()
+    self._cond = threading.Condition(self._mutex)
+    self._owner = None
+    self._depth = 0
+    self._waiters = []
+    self._seq = 0
+    self._held_since = 0.0
+    self.reset_stats()
+
+  @classmethod
+  def for_bus(cls ,bus):
+    '''!
+      @brief Get the lock shared by every user of a bus, backends of the same bus number share one lock
+      @n     The lock keeps its first backend alive, so an id() key can't be reused while the lock exists
+    '''
+    key = _bus_key(bus)
+    with _registry_lock():
+      lock = _BUS_LOCKS.get(key)
+      if lock is None:
+        lock = cls()
+        lock.backend = bus
+        _BUS_LOCKS[key] = lock
+    return lock
+
+  def acquire(self ,priority=PRIORITY_NORMAL):
+    '''!
+      @brief Take the lock, a thread already holding it only counts the nesting
+      @param priority PRIORITY_ALERT, PRIORITY_NORMAL or PRIORITY_BULK
+    '''
+    me = self._get_ident()
+    if self._owner == me:
+      self._depth += 1
+      return
+    mutex = self._mutex
+    mutex.acquire()
+    try:
+      if self._owner is not None or self._waiters:
+        self._wait(priority)
+      self.acquisitions += 1
+      self._owner = me
+      self._depth = 1
+      self._held_since = _monotonic()
+    finally:
+      mutex.release()
+
+  def _wait(self ,priority):
+    start = _monotonic()
+    entry = (priority ,self._seq)
+    self._seq += 1
+    heapq.heappush(self._waiters ,entry)
+    self.queue_max = max(self.queue_max ,len(self._waiters))
+    while self._owner is not None or self._waiters[0] is not entry:
+      self._cond.wait()
+    heapq.heappop(self._waiters)
+    wait = _monotonic() - start
+    self.contended += 1
+    self.wait_total += wait
+    stats = self.waits.setdefault(priority ,[0 ,0.0 ,0.0])
+    stats[0] += 1
+    stats[1] += wait
+    if wait > stats[2]:
+      stats[2] = wait
+
+  def release(self):
+    if self._owner != self._get_ident():
+      raise RuntimeError("release of a bus lock held by another thread")
+    self._depth -= 1
+    if self._depth:
+      return
+    mutex = self._mutex
+    mutex.acquire()
+    self.busy += _monotonic() - self._held_since
+    self._owner = None
+    if self._waiters:
+      self._cond.notify_all()
+    mutex.release()
+
+  def hold(self ,priority):
+    '''!
+      @brief Context manager holding the lock at a priority
+    '''
+    return _BusLockSection(self ,priority)
+
+  def __enter__(self):
+    self.acquire()
+    return self
+
+  def __exit__(self ,*exc):
+    self.release()
+
+  def reset_stats(self):
+    ## times the lock was taken, and taken after waiting for another thread
+    self.acquisitions = 0
+    self.contended = 0
+    ## total time spent waiting for the lock and the most threads waiting at once
+    self.wait_total = 0.0
+    self.queue_max = 0
+    ## total time the lock was held, unit: s
+    self.busy = 0.0
+    ## dict of priority: [waits, total wait, longest wait]
+    self.waits = {}
+    self._stats_since = _monotonic()
+
+  def get_stats(self):
+    '''!
+      @brief Get the arbitration statistics since the last reset_stats()
+      @return dict with acquisitions, contended, wait_total, queue_max, utilization (fraction of the time the bus was held, near 1 when saturated)
+      @n      and waits, a dict of priority: (waits, mean wait, longest wait)
+    '''
+    elapsed = _monotonic() - self._stats_since
+    return {
+      "acquisitions": self.acquisitions,
+      "contended":    self.contended,
+      "wait_total":   self.wait_total,
+      "queue_max":    self.queue_max,
+      "utilization":  self.busy/elapsed if elapsed > 0 else 0.0,
+      "waits":        dict((p ,(n ,total/n ,longest)) for p ,(n ,total ,longest) in self.waits.items()),
+    }
+
+
+class I2CBackend(object):
+  '''!
+    @brief Interface of the I2C bus backends, the subset of the smbus API used by the driver
+  '''
+  def read_i2c_block_data(self ,addr ,reg ,length):
+    '''!
+      @brief Read length bytes starting at register reg of the device at addr
+      @return list of int
+    '''
+    raise NotImplementedError
+
+  def write_i2c_block_data(self ,addr ,reg ,data):
+    '''!
+      @brief Write the bytes of data starting at register reg of the device at addr
+    '''
+    raise NotImplementedError
+
+  def close(self):
+    pass
+
+class SMBusBackend(I2CBackend):
+  '''!
+    @brief I2C bus backend on smbus, the smbus module is imported and the bus opened on the first transaction
+  '''
+  def __init__(self ,bus):
+    self.bus = bus
+    self._smbus = None
+
+  @classmethod
+  def shared(cls ,bus):
+    '''!
+      @brief Get the backend of a bus number shared by every sensor built from that number, it lives as long as one of them
+    '''
+    with _registry_lock():
+      backend = _SMBUS_BACKENDS.get(bus)
+      if backend is None:
+        backend = _SMBUS_BACKENDS[bus] = cls(bus)
+    return backend
+
+  def _open(self):
+    import smbus
+    self._smbus = smbus.SMBus(self.bus)
+    return self._smbus
+
+  def read_i2c_block_data(self ,addr ,reg ,length):
+    return (self._smbus or self._open()).read_i2c_block_data(addr ,reg ,length)
+
+  def write_i2c_block_data(self ,addr ,reg ,data):
+    return (self._smbus or self._open()).write_i2c_block_data(addr ,reg ,data)
+
+  def close(self):
+    if self._smbus is not None:
+      self._smbus.close()
+      self._smbus = None
+
+  def __del__(self):
+    self.close()
+
+## [ctypes, i2c_msg, i2c_rdwr_ioctl_data], defined on first use
+_I2C_STRUCTS = []
+
+def _i2c_structs():
+  if not _I2C_STRUCTS:
+    import ctypes
+    class i2c_msg(ctypes.Structure):
+      _fields_ = [("addr" ,ctypes.c_uint16) ,("flags" ,ctypes.c_uint16) ,("len" ,ctypes.c_uint16) ,("buf" ,ctypes.POINTER(ctypes.c_uint8))]
+    class i2c_rdwr_ioctl_data(ctypes.Structure):
+      _fields_ = [("msgs" ,ctypes.POINTER(i2c_msg)) ,("nmsgs" ,ctypes.c_uint32)]
+    _I2C_STRUCTS.extend((ctypes ,i2c_msg ,i2c_rdwr_ioctl_data))
+  return _I2C_STRUCTS
+
+class I2CDevBackend(I2CBackend):
+  '''!
+    @brief I2C bus backend issuing I2C_RDWR transfers on /dev/i2c-N directly, without smbus
+    @n     read_words() reads one register of many devices with a single ioctl
+  '''
+  def __init__(self ,bus ,ioctl=None ,fd=None):
+    '''!
+      @param bus   I2C bus number
+      @param ioctl ioctl function, fcntl.ioctl by default
+      @param fd    Already opened file descriptor of the bus, it is not closed by close()
+    '''
+    self.bus = bus
+    self.path = "/dev/i2c-%d"%bus
+    self._ioctl = ioctl
+    self._fd = fd
+    self._own_fd = fd is None
+    self._batches = {}
+
+  def _fileno(self):
+    if self._ioctl is None:
+      import fcntl
+      self._ioctl = fcntl.ioctl
+    if self._fd is None:
+      self._fd = os.open(self.path ,os.O_RDWR)
+    return self._fd
+
+  def read_i2c_block_data(self ,addr ,reg ,length):
+    ctypes ,i2c_msg ,i2c_rdwr_ioctl_data = _i2c_structs()
+    wbuf = (ctypes.c_uint8*1)(reg)
+    rbuf = (ctypes.c_uint8*length)()
+    msgs = (i2c_msg*2)(i2c_msg(addr ,0 ,1 ,wbuf) ,i2c_msg(addr ,I2C_M_RD ,length ,rbuf))
+    self._ioctl(self._fileno() ,I2C_RDWR ,i2c_rdwr_ioctl_data(msgs ,2))
+    return list(rbuf)
+
+  def write_i2c_block_data(self ,addr ,reg ,data):
+    ctypes ,i2c_msg ,i2c_rdwr_ioctl_data = _i2c_structs()
+    wbuf = (ctypes.c_uint8*(len(data) + 1))(reg ,*data)
+    msgs = (i2c_msg*1)(i2c_msg(addr ,0 ,len(data) + 1 ,wbuf))
+    self._ioctl(self._fileno() ,I2C_RDWR ,i2c_rdwr_ioctl_data(msgs ,1))
+
+  def _prepare(self ,addrs ,reg):
+    ctypes ,i2c_msg ,i2c_rdwr_ioctl_data = _i2c_structs()
+    wbuf = (ctypes.c_uint8*1)(reg)
+    chunk = I2C_RDWR_MAX_MSGS//2
+    batch = []
+    for start in range(0 ,len(addrs) ,chunk):
+      count = min(chunk ,len(addrs) - start)
+      rbuf = (ctypes.c_uint8*(2*count))()
+      msgs = (i2c_msg*(2*count))()
+      for i in range(count):
+        msgs[2*i] = i2c_msg(addrs[start + i] ,0 ,1 ,wbuf)
+        msgs[2*i + 1] = i2c_msg(addrs[start + i] ,I2C_M_RD ,2 ,ctypes.cast(ctypes.byref(rbuf ,2*i) ,ctypes.POINTER(ctypes.c_uint8)))
+      batch.append((i2c_rdwr_ioctl_data(msgs ,2*count) ,msgs ,wbuf ,rbuf ,start ,count ,">%dH"%count))
+    return batch
+
+  def read_words(self ,addrs ,reg ,out):
+    '''!
+      @brief Read the 16 bit register reg of every device in addrs, with one combined I2C_RDWR transfer for up to 21 devices
+      @n     The messages and the read buffer are prepared once per address tuple and reused
+      @n     A device that does not answer aborts the whole transfer, the devices of that transfer are then read one by one
+      @param addrs Tuple of device addresses
+      @param reg   Register to read
+      @param out   array receiving the words in the order of addrs, -1 for a device that did not answer
+      @return out
+    '''
+    key = (addrs ,reg)
+    batch = self._batches.get(key)
+    if batch is None:
+      batch = self._batches[key] = self._prepare(addrs ,reg)
+    fd = self._fileno()
+    for data ,_ ,_ ,rbuf ,start ,count ,fmt in batch:
+      try:
+        self._ioctl(fd ,I2C_RDWR ,data)
+      except (IOError ,OSError):
+        for i in range(start ,start + count):
+          try:
+            rslt = self.read_i2c_block_data(addrs[i] ,reg ,2)
+            out[i] = (rslt[0]<<8)|rslt[1]
+          except (IOError ,OSError):
+            out[i] = -1
+        continue
+      out[start:start + count] = array('i' ,struct.unpack(fmt ,rbuf))
+    return out
+
+  def close(self):
+    if self._fd is not None and self._own_fd:
+      os.close(self._fd)
+    self._fd = None
+    self._batches.clear()
+
+class GPIOBackend(object):
+  '''!
+    @brief Interface of the GPIO backends used for pin ALE
+  '''
+  def setup_input(self ,pin ,pull_up):
+    '''!
+      @brief Configure pin as input, pull_up True for a pull up, False for a pull down
+    '''
+    raise NotImplementedError
+
+  def add_edge_detect(self ,pin ,rising ,callback ,bouncetime=0):
+    '''!
+      @brief Call callback(pin) on every rising (rising True) or falling (rising False) edge of pin
+    '''
+    raise NotImplementedError
+
+  def remove_edge_detect(self ,pin):
+    raise NotImplementedError
+
+  def input(self ,pin):
+    '''!
+      @brief Level of pin, 1 high, 0 low
+    '''
+    raise NotImplementedError
+
+  def cleanup(self ,pin):
+    pass
+
+class RPiGPIOBackend(GPIOBackend):
+  '''!
+    @brief GPIO backend on RPi.GPIO with BCM pin numbers, RPi.GPIO is imported on first use
+  '''
+  def __init__(self):
+    self._gpio = None
+
+  def _load(self):
+    if self._gpio is None:
+      import RPi.GPIO as GPIO
+      GPIO.setmode(GPIO.BCM)
+      self._gpio = GPIO
+    return self._gpio
+
+  def setup_input(self ,pin ,pull_up):
+    GPIO = self._load()
+    GPIO.setup(pin ,GPIO.IN ,pull_up_down=GPIO.PUD_UP if pull_up else GPIO.PUD_DOWN)
+
+  def add_edge_detect(self ,pin ,rising ,callback ,bouncetime=0):
+    GPIO = self._load()
+    if bouncetime:
+      GPIO.add_event_detect(pin ,GPIO.RISING if rising else GPIO.FALLING ,callback=callback ,bouncetime=bouncetime)
+    else:
+      GPIO.add_event_detect(pin ,GPIO.RISING if rising else GPIO.FALLING ,callback=callback)
+
+  def remove_edge_detect(self ,pin):
+    self._load().remove_event_detect(pin)
+
+  def input(self ,pin):
+    return self._load().input(pin)
+
+  def cleanup(self ,pin):
+    self._load().cleanup(pin)
+
+class SimulatedGPIO(GPIOBackend):
+  '''!
+    @brief GPIO backend connecting pin ALE of SimulatedMCP9808 devices to edge callbacks
+  '''
+  def __init__(self):
+    self._pins = {}
+    self._callbacks = {}
+
+  def connect(self ,pin ,device):
+    '''!
+      @brief Wire pin ALE of device to pin
+    '''
+    self._pins[pin] = device.alert_level()
+    device.alert_listeners.append(lambda level: self._edge(pin ,level))
+
+  def input(self ,pin):
+    return self._pins.get(pin ,1)
+
+  def _edge(self ,pin ,level):
+    old = self._pins.get(pin)
+    self._pins[pin] = level
+    entry = self._callbacks.get(pin)
+    if entry is not None and old != level and (level == 1) == entry[0]:
+      entry[1](pin)
+
+  def setup_input(self ,pin ,pull_up):
+    self._pins.setdefault(pin ,1 if pull_up else 0)
+
+  def add_edge_detect(self ,pin ,rising ,callback ,bouncetime=0):
+    self._callbacks[pin] = (rising ,callback)
+
+  def remove_edge_detect(self ,pin):
+    self._callbacks.pop(pin ,None)
+
 class DFRobot_MCP9808(object):
   def __init__(self ,bus):
-    if bus != 0:
-      self.i2cbus = smbus.SMBus(bus)
+    '''!
+      @param bus I2C bus number, or an I2C backend object (SMBusBackend, smbus.SMBus or any object with the same read/write methods)
+    '''
+    self._shadow = None
+    self._alert_queues = []
+    self._alert_gpio = None
+    self._alert_pin = None
+    ## number of alert events dropped because a subscriber queue was full
+    self.alert_drops = 0
+    ## number of alert edges or rechecks whose bus transactions failed
+    self.alert_errors = 0
+    self._alert_timer = None
+    self._alert_state = None
+    if hasattr(bus ,"read_i2c_block_data"):
+      self.i2cbus = bus
+    elif bus != 0:
+      self.i2cbus = SMBusBackend.shared(bus)
+    ## MCP9808BusLock shared by every sensor on the bus, held by the read-modify-write sequences
+    self.bus_lock = MCP9808BusLock.for_bus(self.i2cbus) if hasattr(self ,"i2cbus") else MCP9808BusLock()
 
   def sensor_init(self):
     '''!
       @brief Initialize sensor, comtrast sensor chip id with manufacturer id
       @return  int type
       @retval  0 is init success
-      @retval -1 chip id or manufacturer id error, check please
+      @retval -1 chip id or manufacturer id error, or the sensor doesn't answer, check please
     '''
-    device_id = self.get_device_id()
-    manufaturer_id = self.get_manufacturer_id()
+    try:
+      device_id = self.get_device_id()
+      manufaturer_id = self.get_manufacturer_id()
+    except MCP9808Error:
+      return -1
     if device_id == DEVICE_ID and manufaturer_id == MANUFACTURER_ID:
       return 0
     else:
       return -1
 
+  def set_register_cache(self ,enable):
+    '''!
+      @brief Enable or disable the register shadow, when enabled the last known CONFIG, resolution and threshold words are kept in memory,
+      @n     getters are served from it and setters do read-modify-write against it with a single bus write
+      @n     Call refresh() or invalidate() when another process or a power cycle may have changed the chip
+      @param enable
+      @n     True     keep a shadow of the registers
+      @n     False    always access the chip (default)
+    '''
+    if enable:
+      if self._shadow is None:
+        self._shadow = {}
+    else:
+      self._shadow = None
+
+  def refresh(self):
+    '''!
+      @brief Reload the register shadow from the chip, no effect when the register shadow is disabled
+    '''
+    if self._shadow is None:
+      return
+    with self.bus_lock:
+      self._shadow.clear()
+      for reg ,length in SHADOW_REGISTERS:
+        self._read_cached(reg ,length)
+
+  def invalidate(self):
+    '''!
+      @brief Drop the register shadow, the next access of every register reads the chip again
+    '''
+    if self._shadow is not None:
+      self._shadow.clear()
+
   def sleep_mode(self):
     '''!
       @brief Sensor sleep mode, lower power consumption, cannot read temp data at this time
@@ -136,13 +1037,7 @@ class DFRobot_MCP9808(object):
       @retval 0 is set success
       @retval -1 The setting failed, the register is locked, please unlock it first
     '''
-    if self.get_lock_state() != 0:
-      return -1
-    rslt = self.read_reg(CONFIG_REGISTER ,2)
-    rslt[0] &= 0x06
-    rslt[0] |= (mode&0x01);
-    self.write_reg(CONFIG_REGISTER ,rslt)
-    return 0
+    return self._update_config(0 ,0x06 ,mode&0x01)
 
   
   def get_power_mode(self):
@@ -154,7 +1049,7 @@ class DFRobot_MCP9808(object):
       @retval 0 is sleep mode
       @retval 1 is wakeup mode
     '''
-    rslt = self.read_reg(CONFIG_REGISTER ,2) 
+    rslt = self._read_cached(CONFIG_REGISTER ,2)
     if (rslt[0]&0x01) == LOW_POWER_MODE:
       return 0
     else:
@@ -192,7 +1087,7 @@ class DFRobot_MCP9808(object):
     txbuf = [0]
     if resolution == RESOLUTION_0_5 or resolution == RESOLUTION_0_25 or resolution == RESOLUTION_0_125 or resolution == RESOLUTION_0_0625:
       txbuf[0] = resolution
-      self.write_reg(RESOLUTION_REGISTER ,txbuf)
+      self._write_cached(RESOLUTION_REGISTER ,txbuf)
       return 0
     else:
       return -1
@@ -206,7 +1101,7 @@ class DFRobot_MCP9808(object):
       @retval RESOLUTION_0_125    The decimal part of the obtained temp is a multiple of 0.125   e.g. 0.125°C, 0.250°C, 0.375°C
       @retval RESOLUTION_0_0625   The decimal part of the obtained temp is a multiple of 0.0625  e.g. 0.0625°C, 0.1250°C, 0.1875°C
     '''
-    rslt = self.read_reg(RESOLUTION_REGISTER ,1)
+    rslt = self._read_cached(RESOLUTION_REGISTER ,1)
     return rslt[0]&0x03
 
   def get_temperature(self):
@@ -215,12 +1110,30 @@ class DFRobot_MCP9808(object):
       @return The temp value is a floating point (unit is ℃)
     '''
     rslt = self.read_reg(TEMPERATURE_REGISTER ,2)
-    rslt[0] &= 0x1F
-    if rslt[0]&0x10 == 0x10:
-      rslt[0] &= 0x0F
-      return 256.0-(float(rslt[0]*16.0) + float(rslt[1]/16.0))
-    else:
-      return float(rslt[0]*16.0) + float(rslt[1]/16.0)
+    return _decode_temperature(rslt[0] ,rslt[1])
+
+  def read_sample(self):
+    '''!
+      @brief Get the current temp and comparator status with a single read of TEMPERATURE_REGISTER
+      @n     Both values come from the same conversion, the character string of the status is only built when sample.text is used
+      @return MCP9808Sample
+      @n      temperature  The temp value is a floating point (unit is ℃)
+      @n      state        Value of the comparator status, same as get_comparator_state()[2]
+      @n      raw          The raw 16 bit register word
+      @n      timestamp    Monotonic time of the read, unit: s
+    '''
+    rslt = self.read_reg(TEMPERATURE_REGISTER ,2)
+    return MCP9808Sample(_decode_temperature(rslt[0] ,rslt[1]) ,(rslt[0]&0xE0)>>5 ,(rslt[0]<<8)|rslt[1] ,_monotonic())
+
+  def stream(self ,period=None ,count=None):
+    '''!
+      @brief Generator of samples read lazily on a fixed grid, see MCP9808Scheduler
+      @n     Combine it with the stages decimate, moving_average, tumbling_window and deadband
+      @param period Wanted time between reads, unit: s, None for every conversion
+      @param count  Number of samples, None for endless
+      @return generator of MCP9808Sample
+    '''
+    return MCP9808Scheduler(self ,period).samples(count)
 
   def get_comparator_state(self):
     '''!
@@ -238,25 +1151,11 @@ class DFRobot_MCP9808(object):
       @n      |  reserved   |  0   |  0   |  0   |
       @n      ------------------------------------
     '''
-    str1 = ""
-    data = [0]*10 
-    rslt = self.read_reg(TEMPERATURE_REGISTER ,2) 
-    state = (rslt[0]&0xE0)>>5
-    data[0] = self.get_temperature()
-    if (state>>2)&0x01:
-      str1 += " TA >= TCRIT ,"
-    else:
-      str1 += " TA < TCRIT ,"
-    if (state>>1)&0x01:
-      str1 += " TA > TUPPER ,"
-    else:
-      str1 += " TA <= TUPPER ,"
-    if (state>>0)&0x01:
-      str1 += " TA < TLOWER"
-    else:
-      str1 += " TA >= TLOWER"
-    data[1] = str1
-    data[2] = state
+    data = [0]*10
+    sample = self.read_sample()
+    data[0] = sample.temperature
+    data[1] = sample.text
+    data[2] = sample.state
     return data
   
   def set_lock_state(self ,lock):
@@ -272,11 +1171,12 @@ class DFRobot_MCP9808(object):
       @retval 0x00 is set successfully
       @retval 0xFE The set mode error
     '''
-    rslt = self.read_reg(CONFIG_REGISTER ,2)
     if lock == CRIT_LOCK or lock == WIN_LOCK or lock == CRIT_WIN_LOCK or lock == NO_LOCK:
-      rslt[1] &= 0x3F
-      rslt[1] |= lock
-      self.write_reg(CONFIG_REGISTER ,rslt)
+      with self.bus_lock:
+        rslt = self._read_cached(CONFIG_REGISTER ,2)
+        rslt[1] &= 0x3F
+        rslt[1] |= lock
+        self._write_cached(CONFIG_REGISTER ,rslt)
       return 0
     else:
       return 0xfe
@@ -290,7 +1190,7 @@ class DFRobot_MCP9808(object):
       @retval CRIT_WIN_LOCK  Lock threshold and the window at the same time, upper limit, lower limit, and threshold are all not allowed to be changed
       @retval NO_LOCK        No locking, threshold value, upper and lower limit are all can be changed
     '''
-    rslt = self.read_reg(CONFIG_REGISTER ,2) 
+    rslt = self._read_cached(CONFIG_REGISTER ,2)
     return (rslt[1]&0xC0)
 
   
@@ -310,14 +1210,8 @@ class DFRobot_MCP9808(object):
       @retval -1 The current register is locked and not allowed to be changed
       @retval 0xFE The set resolution error, check the range.
     '''
-    if self.get_lock_state() != 0:
-      return -1
-    rslt = self.read_reg(CONFIG_REGISTER ,2)
     if mode == HYSTERESIS_0_0 or mode == HYSTERESIS_1_5  or mode == HYSTERESIS_3_0 or mode == HYSTERESIS_6_0:
-      rslt[0] &= 0x01
-      rslt[0] |= mode
-      self.write_reg(CONFIG_REGISTER ,rslt)
-      return 0
+      return self._update_config(0 ,0x01 ,mode)
     else:
       return 0xFE
 
@@ -331,7 +1225,7 @@ class DFRobot_MCP9808(object):
       @retval HYSTERESIS_3_0    3.0℃ lag from hot to cold
       @retval HYSTERESIS_6_0    6.0℃ lag from hot to cold
     '''
-    rslt = self.read_reg(CONFIG_REGISTER ,2) 
+    rslt = self._read_cached(CONFIG_REGISTER ,2)
     return (rslt[0]&0x06)
 
   
@@ -347,14 +1241,8 @@ class DFRobot_MCP9808(object):
       @retval -1   The current register is locked and not allowed to be changed
       @retval 0xFE The set polarity error, check the polarity.
     '''
-    if self.get_lock_state() != 0:
-      return -1
-    rslt = self.read_reg(CONFIG_REGISTER ,2)
     if polarity == POLARITY_HIGH or polarity == POLARITY_LOW:
-      rslt[1] &= 0xFD
-      rslt[1] |= polarity
-      self.write_reg(CONFIG_REGISTER ,rslt)
-      return 0
+      return self._update_config(1 ,0xFD ,polarity)
     else:
       return 0xFE
 
@@ -366,7 +1254,7 @@ class DFRobot_MCP9808(object):
       @retval POLARITY_HIGH   pin ALE is active on high
       @retval POLARITY_LOW    pin ALE is active on low
     '''
-    rslt = self.read_reg(CONFIG_REGISTER ,2) 
+    rslt = self._read_cached(CONFIG_REGISTER ,2)
     return (rslt[1]&0x02)
 
   
@@ -385,18 +1273,10 @@ class DFRobot_MCP9808(object):
       @retval -1 The current register is locked and not allowed to be changed
       @retval 0xFE The set alert output mode error, check the mode.
     '''
-    if self.get_lock_state() != 0:
-      return -1
-    rslt = self.read_reg(CONFIG_REGISTER ,2)
     if mode == COMPARATOR_OUTPUT_MODE or mode == INTERRPUT_OUTPUT_MODE:
-      rslt[1] &= 0xFE
-      rslt[1] |= mode
-      self.write_reg(CONFIG_REGISTER ,rslt)                 # enable alert mode
-      self.set_alert_enable(ENABLE_ALERT)
-      return 0x00
+      return self._update_config(1 ,0xF6 ,mode|ENABLE_ALERT)   # select mode and enable alert mode in one write
     elif mode == DISABLE_OUTPUT_MODE:
-      self.set_alert_enable(DISABLE_ALERT)                  # disable alert mode
-      return 0x00
+      return self.set_alert_enable(DISABLE_ALERT)             # disable alert mode
     else:
       return 0xFE
 
@@ -409,10 +1289,10 @@ class DFRobot_MCP9808(object):
       @retval INTERRPUT_OUTPUT_MODE      Interrupt output mode
       @retval DISABLE_OUTPUT_MODE        Disable output mode
     '''
-    if self.get_alert_enable_state() == DISABLE_ALERT:
+    rslt = self._read_cached(CONFIG_REGISTER ,2)
+    if (rslt[1]&0x08) == DISABLE_ALERT:
       return DISABLE_OUTPUT_MODE
     else:
-      rslt = self.read_reg(CONFIG_REGISTER ,2) 
       return (rslt[1]&0x01)
 
   
@@ -427,14 +1307,8 @@ class DFRobot_MCP9808(object):
       @retval -1   The current register is locked and not allowed to be changed
       @retval 0xFE The set mode error, check the mode.
     '''
-    if self.get_lock_state() != 0:
-      return -1
-    rslt = self.read_reg(CONFIG_REGISTER ,2)
     if mode == ENABLE_ALERT or mode == DISABLE_ALERT:
-      rslt[1] &= 0xF7
-      rslt[1] |= mode
-      self.write_reg(CONFIG_REGISTER ,rslt)
-      return 0
+      return self._update_config(1 ,0xF7 ,mode)
     else:
       return 0xFE
 
@@ -446,7 +1320,7 @@ class DFRobot_MCP9808(object):
       @retval ENABLE_ALERT  enable alert mode
       @retval DISABLE_ALERT disable alert mode
     '''
-    rslt = self.read_reg(CONFIG_REGISTER ,2) 
+    rslt = self._read_cached(CONFIG_REGISTER ,2)
     return (rslt[1]&0x08)
 
   
@@ -461,14 +1335,8 @@ class DFRobot_MCP9808(object):
       @retval -1   The current register is locked and not allowed to be changed
       @retval 0xFE The set response mode error, check the mode.
     '''
-    if self.get_lock_state() != 0:
-      return -1
-    rslt = self.read_reg(CONFIG_REGISTER ,2)
     if mode == UPPER_LOWER_CRIT_RESPONSE or mode == ONLY_CRIT_RESPONSE:
-      rslt[1] &= 0xFB
-      rslt[1] |= mode
-      self.write_reg(CONFIG_REGISTER ,rslt)
-      return 0
+      return self._update_config(1 ,0xFB ,mode)
     else:
       return 0xFE
 
@@ -480,7 +1348,7 @@ class DFRobot_MCP9808(object):
       @retval UPPER_LOWER_CRIT_RESPONSE    enable upper/lower limits and threshold response
       @retval ONLY_CRIT_RESPONSE           disable upper/lower limits response, only enable threshold response
     '''
-    rslt = self.read_reg(CONFIG_REGISTER ,2) 
+    rslt = self._read_cached(CONFIG_REGISTER ,2)
     return (rslt[1]&0x04)
 
   
@@ -498,90 +1366,2222 @@ class DFRobot_MCP9808(object):
       @retval -3 The critical temp is below the upper limit
       @retval -2 Upper limit temp is below lower limit, or (upper limit temp - lower limit temp < 2)
       @retval -1 The register is locked and can't be changed.
+      @retval 0xFE A temp is outside the register range -256 to +255.75℃, nothing is written
     '''
-    rslt = [0]*2
+    try:
+      words = [encode_threshold(value) for value in (upper ,lower ,crit)]
+    except (TypeError ,ValueError):
+      return 0xFE
     if crit <= upper:
       return -3
     if (upper-lower) < 2.0:
       return -2
-    if self.get_lock_state() != 0:
-      return -1
-    self.data_threshold_analysis(upper ,rslt)
-    self.write_reg(T_UPPER_REGISTER ,rslt)
-    rslt[0] = 0
-    rslt[1] = 0
-    self.data_threshold_analysis(lower ,rslt)
-    self.write_reg(T_LOWER_REGISTER ,rslt)
-    rslt[0] = 0
-    rslt[1] = 0
-    self.data_threshold_analysis(crit ,rslt)
-    self.write_reg(T_CRIT_REGISTER ,rslt)    
-    return 0
+    with self.bus_lock:
+      if self.get_lock_state() != 0:
+        return -1
+      for reg ,word in zip((T_UPPER_REGISTER ,T_LOWER_REGISTER ,T_CRIT_REGISTER) ,words):
+        self._write_cached(reg ,[word>>8 ,word&0xFF])
+      return 0
 
 
   def clear_interrupt(self):
     '''!
       @brief Clear interrupt, only used in interrupt mode, not work in other modes
     '''
-    rslt = self.read_reg(CONFIG_REGISTER ,2)
-    rslt[1] &= 0xDF
-    rslt[1] |= 0x20
-    self.write_reg(CONFIG_REGISTER ,rslt)
+    with self.bus_lock:
+      rslt = self._read_cached(CONFIG_REGISTER ,2)
+      rslt[1] &= 0xDF
+      rslt[1] |= 0x20
+      self._write_cached(CONFIG_REGISTER ,rslt)
+
+  def snapshot(self):
+    '''!
+      @brief Read each of the nine registers exactly once and decode every field, the register shadow is refreshed with the read values
+      @return MCP9808Snapshot
+      @n      power_mode, hysteresis, lock, alert_output_mode, polarity, response_mode, alert_enable, resolution
+      @n                   the values of the matching get_ methods
+      @n      alert_status True when the alert output is asserted
+      @n      upper, lower, crit   The thresholds (unit is ℃)
+      @n      temperature, state   The temp and value of the comparator status, see get_comparator_state
+      @n      manufacturer_id, device_id, revision
+      @n      raw          Tuple of the register words, FRU_REGISTER to RESOLUTION_REGISTER
+    '''
+    with self.bus_lock:
+      raw = []
+      for reg in range(FRU_REGISTER ,RESOLUTION_REGISTER):
+        rslt = self.read_reg(reg ,2)
+        raw.append((rslt[0]<<8)|rslt[1])
+      rslt = self.read_reg(RESOLUTION_REGISTER ,1)
+      raw.append(rslt[0])
+      if self._shadow is not None:
+        for reg ,length in SHADOW_REGISTERS:
+          word = raw[reg]
+          self._shadow[reg] = [word] if length == 1 else [word>>8 ,word&(0xFF if reg != CONFIG_REGISTER else 0xDF)]
+      return MCP9808Snapshot.from_registers(raw)
+
+  def apply(self ,profile ,verify=False):
+    '''!
+      @brief Bring the sensor to a configuration profile, the target CONFIG, RESOLUTION and threshold words are computed up front,
+      @n     compared with the sensor (or the register shadow) and only the registers that differ are written, each with one write
+      @param profile MCP9808Config
+      @param verify  True to read back the written registers
+      @return state
+      @retval 0    is set successfully, or nothing had to be changed
+      @retval -1   The register is locked and can't be changed, or the profile asks for NO_LOCK on a locked sensor
+      @retval -2   Upper limit temp is below lower limit, or (upper limit temp - lower limit temp < 2)
+      @retval -3   The critical temp is below the upper limit
+      @retval -4   The read back of a written register differs
+      @retval 0xFE A parameter of the profile is wrong
+    '''
+    return self._apply(profile ,verify)[0]
+
+  def _apply(self ,profile ,verify):
+    '''!
+      @brief apply(), also returning the list of the written registers
+    '''
+    rslt = profile.check()
+    if rslt != 0:
+      return rslt ,[]
+    with self.bus_lock:
+      current = {}
+      target = {}
+      config = self._read_cached(CONFIG_REGISTER ,2)
+      current[CONFIG_REGISTER] = [config[0]&0x07 ,config[1]&0xCF]
+      target[CONFIG_REGISTER] = profile.config_word(current[CONFIG_REGISTER])
+      if profile.resolution is not None:
+        current[RESOLUTION_REGISTER] = [self._read_cached(RESOLUTION_REGISTER ,1)[0]&0x03]
+        target[RESOLUTION_REGISTER] = [profile.resolution]
+      if profile.thresholds is not None:
+        for reg ,word in profile.threshold_words().items():
+          current[reg] = list(self._read_cached(reg ,2))
+          target[reg] = word
+      changed = [reg for reg in (T_UPPER_REGISTER ,T_LOWER_REGISTER ,T_CRIT_REGISTER ,RESOLUTION_REGISTER ,CONFIG_REGISTER)
+                 if reg in target and target[reg] != current[reg]]
+      locked = current[CONFIG_REGISTER][1]&0xC0
+      if locked != NO_LOCK and profile.lock == NO_LOCK:
+        return -1 ,[]
+      if locked != NO_LOCK:
+        for reg in changed:
+          if reg == CONFIG_REGISTER:
+            if [target[reg][0] ,target[reg][1]&0x3F] != [current[reg][0] ,current[reg][1]&0x3F]:
+              return -1 ,[]
+          elif reg != RESOLUTION_REGISTER:
+            return -1 ,[]
+      for reg in changed:                                    # CONFIG last, a new lock only takes effect after the thresholds
+        self._write_cached(reg ,target[reg])
+      if verify:
+        for reg in changed:
+          data = self.read_reg(reg ,len(target[reg]))
+          if reg == CONFIG_REGISTER:
+            data = [data[0]&0x07 ,data[1]&0xCF]
+          elif reg == RESOLUTION_REGISTER:
+            data = [data[0]&0x03]
+          if list(data) != target[reg]:
+            self.invalidate()
+            return -4 ,changed
+      return 0 ,changed
+
+  def enable_alert_events(self ,pin ,gpio=None ,bouncetime=0 ,recheck=0.25):
+    '''!
+      @brief Let the driver handle pin ALE, every edge in the configured polarity reads the temp and comparator status once,
+      @n     clears the interrupt in INTERRPUT_OUTPUT_MODE and delivers the MCP9808Sample to the queues of subscribe_alerts()
+      @n     Configure polarity and alert output mode before, the edge and the pull of the pin follow set_polarity
+      @n     In INTERRPUT_OUTPUT_MODE pin ALE stays asserted while TA >= TCRIT, clearing has no effect then and no new edge comes,
+      @n     so while the pin is still asserted after handling it is checked again every recheck seconds,
+      @n     a recheck delivers a sample only when the comparator status changed
+      @param pin        GPIO pin connected to pin ALE, BCM number for RPiGPIOBackend
+      @param gpio       GPIO backend, RPiGPIOBackend() when None
+      @param bouncetime Debounce time of the edge detection, unit: ms
+      @param recheck    Time between the checks of a pin that stays asserted, unit: s
+    '''
+    if self._alert_gpio is not None:
+      self.disable_alert_events()
+    if gpio is None:
+      gpio = RPiGPIOBackend()
+    rising = self.get_polarity_state() == POLARITY_HIGH
+    self._alert_interrupt = self.get_alert_output_mode() == INTERRPUT_OUTPUT_MODE
+    self._alert_level = 1 if rising else 0
+    self._alert_recheck = recheck
+    self._alert_state = None
+    gpio.setup_input(pin ,not rising)                      # active high pulls down, active low pulls up
+    gpio.add_edge_detect(pin ,rising ,self._on_alert ,bouncetime)
+    self._alert_gpio = gpio
+    self._alert_pin = pin
+
+  def disable_alert_events(self):
+    '''!
+      @brief Stop handling pin ALE
+    '''
+    if self._alert_gpio is not None:
+      self._alert_gpio.remove_edge_detect(self._alert_pin)
+      self._alert_gpio = None
+      self._alert_pin = None
+    timer = self._alert_timer
+    self._alert_timer = None
+    if timer is not None:
+      timer.cancel()
+
+  def subscribe_alerts(self ,maxsize=64):
+    '''!
+      @brief Get a bounded queue receiving an MCP9808Sample for every alert edge, the oldest event is dropped when it is full
+      @param maxsize Capacity of the queue
+      @return queue.Queue
+    '''
+    events = _queue_module().Queue(maxsize)
+    self._alert_queues = self._alert_queues + [events]
+    return events
+
+  def unsubscribe_alerts(self ,events):
+    self._alert_queues = [q for q in self._alert_queues if q is not events]
+
+  def _on_alert(self ,pin):
+    self._handle_alert(pin ,True)
+
+  def _on_recheck(self ,pin):
+    self._alert_timer = None
+    if self._alert_gpio is not None:
+      self._handle_alert(pin ,False)
+
+  def _handle_alert(self ,pin ,edge):
+    '''!
+      @brief Read and clear the alert, runs in the GPIO callback thread, so bus errors are counted in alert_errors, not raised
+      @param edge True for an edge of pin ALE, False for a recheck of a pin that stayed asserted
+    '''
+    try:
+      with self.bus_lock.hold(PRIORITY_ALERT):
+        sample = self.read_sample()
+        if self._alert_interrupt:
+          self.clear_interrupt()
+    except MCP9808Error:
+      self.alert_errors += 1
+      sample = None
+    if sample is not None and (edge or sample.state != self._alert_state):
+      self._alert_state = sample.state
+      self._deliver(sample)
+    gpio = self._alert_gpio
+    if gpio is not None and self._alert_interrupt and gpio.input(pin) == self._alert_level:
+      self._rearm(pin)
+
+  def _rearm(self ,pin):
+    import threading
+    if self._alert_timer is not None:
+      return
+    timer = threading.Timer(self._alert_recheck ,self._on_recheck ,(pin ,))
+    timer.daemon = True
+    self._alert_timer = timer
+    timer.start()
+
+  def _deliver(self ,sample):
+    queue = _queue_module()
+    for events in self._alert_queues:
+      while True:
+        try:
+          events.put_nowait(sample)
+          break
+        except queue.Full:                                 # drop the oldest event
+          self.alert_drops += 1
+          try:
+            events.get_nowait()
+          except queue.Empty:
+            pass
+
+  def _update_config(self ,index ,mask ,value):
+    '''!
+      @brief Read-modify-write one byte of CONFIG_REGISTER with a single bus write, refused while the register is locked
+      @param index 0 for the MSB, 1 for the LSB
+      @param mask  Bits of the byte that are kept
+      @param value Bits that are set
+      @return state
+      @retval 0  is set successfully
+      @retval -1 The register is locked and can't be changed.
+    '''
+    with self.bus_lock:
+      rslt = self._read_cached(CONFIG_REGISTER ,2)
+      if (rslt[1]&0xC0) != NO_LOCK:
+        return -1
+      rslt[index] &= mask
+      rslt[index] |= value
+      self._write_cached(CONFIG_REGISTER ,rslt)
+      return 0
+
+  def _read_cached(self ,reg ,len):
+    '''!
+      @brief Read a register, served from the register shadow when it holds the register
+    '''
+    shadow = self._shadow
+    if shadow is not None and reg in shadow:
+      return list(shadow[reg])
+    rslt = self.read_reg(reg ,len)
+    if shadow is not None:
+      shadow[reg] = list(rslt)
+    return rslt
+
+  def _write_cached(self ,reg ,data):
+    '''!
+      @brief Write a register and keep the register shadow in step with it
+    '''
+    self.write_reg(reg ,data)
+    if self._shadow is not None:
+      data = list(data)
+      if reg == CONFIG_REGISTER:
+        data[1] &= 0xDF                                      # interrupt clear bit always reads back as 0
+      self._shadow[reg] = data
 
   def data_threshold_analysis(self ,value ,data):
     '''!
       @brief Threshold parsing
     '''
-    symbol = 0
-    decimals = 0
-    integet = 0
-    if value < 0.00001:
-      symbol = 1
-      value *= -1
-    decimals = self.parsing_decimal(value)
-    integer = int(value)
-    data[0] |= symbol<<4
-    data[0] |= integer>>4
-    data[1] |= ((integer&0x0F)<<4)
-    data[1] |= decimals
+    word = encode_threshold(value)
+    data[0] |= word>>8
+    data[1] |= word&0xFF
 
   def parsing_decimal(self ,value):
     '''!
       @brief Decimal parsing
     '''
-    decimals = int(value*100) - (int(value))*100
-    if decimals == 0:
-      return 0x00
-    elif decimals > 0 and decimals <= 25:
-      return 0x04
-    elif decimals > 25 and decimals <= 50:
-      return 0x08
-    else:
-      return 0x0C
+    return _parsing_decimal(value)
 
 
 class DFRobot_MCP9808_I2C(DFRobot_MCP9808):
   def __init__(self ,bus ,addr):
     self.__addr = addr
+    self.retry_policy = DEFAULT_RETRY_POLICY
+    ## MCP9808Stats while enabled by enable_stats()
+    self.stats = None
+    ## failed transactions, retries made and calls that raised after all retries
+    self.errors = 0
+    self.retries = 0
+    self.failures = 0
     super(DFRobot_MCP9808_I2C, self).__init__(bus)
 
-  def write_reg(self, reg, data):
-    while 1:
-      try:
-        self.i2cbus.write_i2c_block_data(self.__addr ,reg ,data)
+  def set_retry_policy(self ,policy):
+    '''!
+      @brief Set the retry policy of the bus transactions of this sensor
+      @param policy RetryPolicy object, None for the default policy
+    '''
+    self.retry_policy = policy or DEFAULT_RETRY_POLICY
+
+  def get_error_stats(self):
+    '''!
+      @brief Get the bus error counters of this sensor
+      @return dict with the failed transactions "errors", the "retries" made and the calls that raised "failures"
+    '''
+    return {"errors": self.errors ,"retries": self.retries ,"failures": self.failures}
+
+  def reset_error_stats(self):
+    self.errors = 0
+    self.retries = 0
+    self.failures = 0
+
+  def enable_stats(self ,stats=None):
+    '''!
+      @brief Count every read_reg/write_reg call by register, direction and outcome and record its latency
+      @param stats MCP9808Stats to record into, shared by several sensors to see a whole bus, a new one when None
+      @return The MCP9808Stats object
+    '''
+    self.stats = stats or MCP9808Stats()
+    return self.stats
+
+  def disable_stats(self):
+    self.stats = None
+
+  def get_stats(self):
+    '''!
+      @brief Get the MCP9808Stats of this sensor, None while disabled
+    '''
+    return self.stats
+
+  def write_reg(self ,reg ,data):
+    if self.stats is None:
+      self._transfer(self.i2cbus.write_i2c_block_data ,reg ,data)
+    else:
+      self._measured(self.i2cbus.write_i2c_block_data ,reg ,data ,"write")
+
+  def read_reg(self ,reg ,len):
+    if self.stats is None:
+      return self._transfer(self.i2cbus.read_i2c_block_data ,reg ,len)
+    return self._measured(self.i2cbus.read_i2c_block_data ,reg ,len ,"read")
+
+  def _measured(self ,method ,reg ,arg ,direction):
+    stats = self.stats
+    retries = self.retries
+    start = _perf_counter()
+    try:
+      rslt = self._transfer(method ,reg ,arg)
+    except MCP9808Error:
+      stats.record(reg ,direction ,"failed" ,_perf_counter() - start)
+      raise
+    stats.record(reg ,direction ,"ok" if self.retries == retries else "retried" ,_perf_counter() - start)
+    return rslt
+
+  def _transfer(self ,method ,reg ,arg):
+    '''!
+      @brief Run one bus transaction, retried as the retry policy says
+      @exception MCP9808BusError     The last retry failed as well
+      @exception MCP9808TimeoutError The deadline ran out before the next retry
+    '''
+    policy = self.retry_policy
+    lock = self.bus_lock
+    start = _monotonic()
+    lock.acquire()
+    try:
+      return method(self.__addr ,reg ,arg)
+    except (IOError ,OSError) as e:
+      cause = e
+    finally:
+      lock.release()
+    attempts = 1
+    for delay in policy.delays():
+      self.errors += 1
+      if policy.deadline is not None and _monotonic() + delay - start > policy.deadline:
+        self.failures += 1
+        raise MCP9808TimeoutError(self.__addr ,reg ,attempts ,cause)
+      time.sleep(delay)
+      self.retries += 1
+      attempts += 1
+      lock.acquire()
+      try:
+        return method(self.__addr ,reg ,arg)
+      except (IOError ,OSError) as e:
+        cause = e
+      finally:
+        lock.release()
+    self.errors += 1
+    self.failures += 1
+    raise MCP9808BusError(self.__addr ,reg ,attempts ,cause)
+
+
+class MCP9808Scheduler(object):
+  '''!
+    @brief Paces reads of one sensor on a fixed monotonic grid, never faster than the conversion time
+    @n     Reading faster than the chip converts only returns the same conversion again, such a rate is raised to the conversion time
+  '''
+  def __init__(self ,sensor ,period=None ,resolution=None):
+    '''!
+      @param sensor     DFRobot_MCP9808 object
+      @param period     Wanted time between reads, unit: s, None for every conversion
+      @param resolution Resolution set on the sensor, read with get_resolution() when None
+    '''
+    self.sensor = sensor
+    if resolution is None:
+      resolution = sensor.get_resolution()
+    self.resolution = resolution
+    ## number of ticks skipped because the consumer fell behind
+    self.overruns = 0
+    self.set_period(period)
+
+  def set_period(self ,period):
+    '''!
+      @brief Set the wanted time between reads, the grid restarts at the next wait()
+      @n     A period at or above the conversion time is kept as it is, the period used is in the period attribute
+      @return state
+      @retval 0  the period can be delivered
+      @retval -1 the period is shorter than the conversion time, reads are spaced one conversion time apart
+    '''
+    conversion = CONVERSION_TIME[self.resolution]
+    ## time between reads asked for, unit: s
+    self.requested_period = period
+    ## True when the asked period is shorter than the conversion time
+    self.limited = period is not None and period < conversion
+    ## time between reads actually used, unit: s
+    self.period = conversion if period is None or self.limited else period
+    self._deadline = None
+    return -1 if self.limited else 0
+
+  def set_resolution(self ,resolution):
+    '''!
+      @brief Set the resolution of the sensor and respace the reads on its conversion time
+      @return state, see DFRobot_MCP9808.set_resolution
+    '''
+    rslt = self.sensor.set_resolution(resolution)
+    if rslt == 0:
+      self.resolution = resolution
+      self.set_period(self.requested_period)
+    return rslt
+
+  @property
+  def max_rate(self):
+    '''!
+      @brief Highest read rate the chip delivers at the current resolution, unit: Hz
+    '''
+    return 1.0/CONVERSION_TIME[self.resolution]
+
+  def wait(self):
+    '''!
+      @brief Sleep until the next deadline of the grid, deadlines missed by the caller are skipped and counted in overruns
+      @return The deadline, monotonic time, unit: s
+    '''
+    if self._deadline is None:
+      self._deadline = _monotonic()
+      return self._deadline
+    self._deadline ,missed = _sleep_to_grid(self._deadline ,self.period)
+    self.overruns += missed
+    return self._deadline
+
+  def samples(self ,count=None):
+    '''!
+      @brief Generator of MCP9808Sample read on the grid
+      @param count Number of samples, None for endless
+    '''
+    n = 0
+    while count is None or n < count:
+      self.wait()
+      yield self.sensor.read_sample()
+      n += 1
+
+  def __iter__(self):
+    return self.samples()
+
+
+class MCP9808Window(object):
+  '''!
+    @brief Aggregate of the samples of one tumbling window
+  '''
+  __slots__ = ('start' ,'end' ,'count' ,'minimum' ,'maximum' ,'mean')
+
+  def __init__(self ,start ,end ,count ,minimum ,maximum ,mean):
+    ## Window bounds, monotonic time, unit: s, start included and end excluded
+    self.start = start
+    self.end = end
+    ## Number of samples in the window
+    self.count = count
+    ## Lowest, highest and mean temp of the window (unit is ℃)
+    self.minimum = minimum
+    self.maximum = maximum
+    self.mean = mean
+
+  def __repr__(self):
+    return "MCP9808Window(start=%r, end=%r, count=%d, minimum=%r, maximum=%r, mean=%r)"%(self.start ,self.end ,self.count ,self.minimum ,self.maximum ,self.mean)
+
+
+def decimate(samples ,factor):
+  '''!
+    @brief Stage passing on every factor-th sample, starting with the first
+  '''
+  n = 0
+  for sample in samples:
+    if n == 0:
+      yield sample
+    n += 1
+    if n == factor:
+      n = 0
+
+def moving_average(samples ,size):
+  '''!
+    @brief Stage replacing the temp of every sample with the mean of the last size samples
+    @n     state, raw and timestamp are the ones of the newest sample
+  '''
+  from collections import deque
+  window = deque()
+  total = 0.0
+  for sample in samples:
+    window.append(sample.temperature)
+    total += sample.temperature
+    if len(window) > size:
+      total -= window.popleft()
+    yield MCP9808Sample(total/len(window) ,sample.state ,sample.raw ,sample.timestamp)
+
+def tumbling_window(samples ,seconds):
+  '''!
+    @brief Stage aggregating samples over consecutive windows of the given length, in constant memory
+    @n     Windows follow each other from the timestamp of the first sample, empty windows are skipped
+    @return generator of MCP9808Window
+  '''
+  start = None
+  for sample in samples:
+    t = sample.timestamp
+    if start is None:
+      start = t
+      count = 0
+    elif t >= start + seconds:
+      if count:
+        yield MCP9808Window(start ,start + seconds ,count ,minimum ,maximum ,total/count)
+      start += ((t - start)//seconds)*seconds
+      count = 0
+    value = sample.temperature
+    if count == 0:
+      minimum = maximum = total = value
+    else:
+      if value < minimum:
+        minimum = value
+      elif value > maximum:
+        maximum = value
+      total += value
+    count += 1
+  if start is not None and count:
+    yield MCP9808Window(start ,start + seconds ,count ,minimum ,maximum ,total/count)
+
+def deadband(samples ,delta):
+  '''!
+    @brief Stage passing on a sample only when its temp moved by at least delta from the last passed sample, or its comparator state changed
+  '''
+  last = None
+  for sample in samples:
+    if last is None or abs(sample.temperature - last.temperature) >= delta or sample.state != last.state:
+      last = sample
+      yield sample
+
+
+class MCP9808History(object):
+  '''!
+    @brief Fixed capacity ring buffer of samples, held in parallel array columns
+    @n     timestamps  array('d'), monotonic time, unit: s
+    @n     raw         array('H'), 13 bit temperature words
+    @n     flags       array('B'), comparator state bits, see get_comparator_state
+    @n     11 bytes per sample, appends are O(1), views of a time range are memoryview slices of the columns
+  '''
+  def __init__(self ,capacity):
+    '''!
+      @param capacity Number of samples kept, the oldest sample is overwritten when it is full
+    '''
+    self.capacity = capacity
+    self.timestamps = array('d' ,[0.0])*capacity
+    self.raw = array('H' ,[0])*capacity
+    self.flags = array('B' ,[0])*capacity
+    self._head = 0
+    self._count = 0
+
+  def __len__(self):
+    return self._count
+
+  def append(self ,timestamp ,raw):
+    '''!
+      @brief Add a sample
+      @param timestamp Monotonic time, unit: s, not older than the newest sample
+      @param raw       The raw 16 bit TEMPERATURE_REGISTER word
+    '''
+    i = self._head
+    self.timestamps[i] = timestamp
+    self.raw[i] = raw&0x1FFF
+    self.flags[i] = (raw>>13)&0x07
+    i += 1
+    self._head = 0 if i == self.capacity else i
+    if self._count < self.capacity:
+      self._count += 1
+
+  def append_sample(self ,sample):
+    '''!
+      @brief Add an MCP9808Sample
+    '''
+    self.append(sample.timestamp ,sample.raw)
+
+  def extend(self ,samples):
+    for sample in samples:
+      self.append(sample.timestamp ,sample.raw)
+
+  def _index(self ,n):
+    '''!
+      @brief Column index of the n-th oldest sample
+    '''
+    i = self._head - self._count + n
+    return i + self.capacity if i < 0 else i
+
+  def bisect(self ,timestamp):
+    '''!
+      @brief Number of the oldest samples older than timestamp
+    '''
+    lo = 0
+    hi = self._count
+    while lo < hi:
+      mid = (lo + hi)>>1
+      if self.timestamps[self._index(mid)] < timestamp:
+        lo = mid + 1
+      else:
+        hi = mid
+    return lo
+
+  def segments(self ,start=0 ,stop=None):
+    '''!
+      @brief Zero-copy views of the samples start to stop, counted from the oldest
+      @return Tuple of one or two (timestamps, raw, flags) memoryview segments in time order, two when the range wraps around the end of the columns
+    '''
+    if stop is None or stop > self._count:
+      stop = self._count
+    if start >= stop:
+      return ()
+    first = self._index(start)
+    last = self._index(stop - 1) + 1
+    columns = (memoryview(self.timestamps) ,memoryview(self.raw) ,memoryview(self.flags))
+    if first < last:
+      return (tuple(c[first:last] for c in columns) ,)
+    return (tuple(c[first:] for c in columns) ,tuple(c[:last] for c in columns))
+
+  def last(self ,seconds):
+    '''!
+      @brief Zero-copy views of the samples of the last seconds before the newest sample, see segments
+    '''
+    if self._count == 0:
+      return ()
+    newest = self.timestamps[self._index(self._count - 1)]
+    return self.segments(self.bisect(newest - seconds))
+
+  def temperatures(self ,seconds):
+    '''!
+      @brief List of the temps (unit is ℃) of the last seconds before the newest sample
+    '''
+    table = _temperature_table(0)
+    rslt = []
+    for _ ,raw ,_ in self.last(seconds):
+      rslt.extend(map(table.__getitem__ ,raw))
+    return rslt
+
+
+## sample log file: header (magic, version, record size, record count, base monotonic time in s, wall-clock time of the base)
+LOG_MAGIC                      = b"MCP9808L"
+LOG_VERSION                    = 1
+_LOG_HEADER                    = struct.Struct('<8sHHIdd')
+_LOG_COUNT_OFFSET              = 12
+## sample log record: time since the base in ms, sensor id, raw TEMPERATURE_REGISTER word
+_LOG_RECORD                    = struct.Struct('<IHH')
+_LOG_DELTA_MAX                 = 0xFFFFFFFF
+
+def _read_log_header(data ,size):
+  '''!
+    @brief Check a log header
+    @return Tuple (record count, base, wall), the count limited to the records the file holds
+  '''
+  if size == 0:
+    return 0 ,None ,0.0
+  if size < _LOG_HEADER.size:
+    raise ValueError("not an MCP9808 sample log, the file is too short")
+  magic ,version ,record ,count ,base ,wall = _LOG_HEADER.unpack_from(data ,0)
+  if magic == b"\0"*8:                                     # created, nothing appended yet
+    return 0 ,None ,0.0
+  if magic != LOG_MAGIC or record != _LOG_RECORD.size:
+    raise ValueError("not an MCP9808 sample log")
+  if version != LOG_VERSION:
+    raise ValueError("unsupported MCP9808 sample log version %d"%version)
+  return min(count ,(size - _LOG_HEADER.size)//_LOG_RECORD.size) ,base ,wall
+
+
+class MCP9808Log(object):
+  '''!
+    @brief Binary sample log, 8 bytes per sample, appended through a memory-mapped file grown one preallocated segment at a time
+    @n     A record holds the time since the first sample in ms (up to 49 days per file), a sensor id and the raw TEMPERATURE_REGISTER word,
+    @n     comparator bits included, read it back with MCP9808LogReader
+  '''
+  def __init__(self ,path ,segment=65536):
+    '''!
+      @param path    Log file, created when it doesn't exist, appended to when it does
+      @param segment Records preallocated each time the file grows
+    '''
+    import mmap
+    self._mmap = mmap.mmap
+    self.path = path
+    self.segment = segment
+    self._fd = os.open(path ,os.O_RDWR|os.O_CREAT ,0o644)
+    size = os.fstat(self._fd).st_size
+    self._mm = None
+    self._count = 0
+    self._last = 0
+    ## Monotonic time of the first sample, unit: s, None until the first append
+    self.base = None
+    ## Wall-clock time of the first sample, unit: s since the epoch
+    self.wall = 0.0
+    if size:
+      self._count ,self.base ,self.wall = _read_log_header(os.read(self._fd ,_LOG_HEADER.size) ,size)
+    self._map(self._count + segment)
+    if self._count:
+      self._last = _LOG_RECORD.unpack_from(self._mm ,_LOG_HEADER.size + (self._count - 1)*_LOG_RECORD.size)[0]
+
+  def _map(self ,capacity):
+    if self._mm is not None:
+      self._mm.close()
+    size = _LOG_HEADER.size + capacity*_LOG_RECORD.size
+    os.ftruncate(self._fd ,size)
+    self._mm = self._mmap(self._fd ,size)
+    self._capacity = capacity
+
+  def _start(self ,timestamp):
+    self.base = timestamp
+    self.wall = time.time() - (_monotonic() - timestamp)
+    _LOG_HEADER.pack_into(self._mm ,0 ,LOG_MAGIC ,LOG_VERSION ,_LOG_RECORD.size ,0 ,self.base ,self.wall)
+
+  def __len__(self):
+    return self._count
+
+  def append(self ,sensor ,raw ,timestamp):
+    '''!
+      @brief Add a sample
+      @param sensor    Sensor id, 0 to 65535, the I2C address for example
+      @param raw       The raw 16 bit TEMPERATURE_REGISTER word
+      @param timestamp Monotonic time, unit: s, not older than the newest sample
+      @exception ValueError The timestamp is older than the newest sample or more than 49 days after the first one
+    '''
+    if self.base is None:
+      self._start(timestamp)
+    delta = int((timestamp - self.base)*1000.0 + 0.5)
+    if delta < self._last or delta > _LOG_DELTA_MAX:
+      raise ValueError("timestamp %r is before the newest sample or too far after the first one, start a new log"%(timestamp ,))
+    count = self._count
+    if count == self._capacity:
+      self._map(count + self.segment)
+    _LOG_RECORD.pack_into(self._mm ,_LOG_HEADER.size + count*_LOG_RECORD.size ,delta ,sensor ,raw&0xFFFF)
+    count += 1
+    struct.pack_into('<I' ,self._mm ,_LOG_COUNT_OFFSET ,count)
+    self._count = count
+    self._last = delta
+
+  def append_sample(self ,sensor ,sample):
+    '''!
+      @brief Add an MCP9808Sample
+    '''
+    self.append(sensor ,sample.raw ,sample.timestamp)
+
+  def append_sweep(self ,sweep ,bus=0):
+    '''!
+      @brief Add every successful read of an MCP9808Sweep, the sensor id is bus<<8 | address
+    '''
+    bus <<= 8
+    for addr ,raw in zip(sweep.addresses ,sweep.raw):
+      if raw >= 0:
+        self.append(bus|addr ,raw ,sweep.timestamp)
+
+  def append_frame(self ,frame):
+    '''!
+      @brief Add every successful read of an MCP9808Frame, the sensor id is bus index<<8 | address
+    '''
+    for index ,sweep in enumerate(frame.sweeps):
+      if sweep is not None:
+        self.append_sweep(sweep ,index)
+
+  def flush(self):
+    '''!
+      @brief Write the mapped pages to the file
+    '''
+    self._mm.flush()
+
+  def close(self):
+    '''!
+      @brief Flush and cut the preallocated space off the file
+    '''
+    if self._mm is None:
+      return
+    self._mm.flush()
+    self._mm.close()
+    self._mm = None
+    os.ftruncate(self._fd ,_LOG_HEADER.size + self._count*_LOG_RECORD.size if self.base is not None else 0)
+    os.close(self._fd)
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self ,*exc):
+    self.close()
+
+
+class MCP9808LogReader(object):
+  '''!
+    @brief Random access to an MCP9808Log file through a read-only memory map, the records are decoded with decode_temperature
+    @n     Release the views of view() and array() before close()
+  '''
+  def __init__(self ,path):
+    import mmap
+    self.path = path
+    fd = os.open(path ,os.O_RDONLY)
+    try:
+      size = os.fstat(fd).st_size
+      self._mm = mmap.mmap(fd ,size ,access=mmap.ACCESS_READ) if size else b""
+    finally:
+      os.close(fd)
+    self._count ,self.base ,self.wall = _read_log_header(self._mm ,size)
+
+  def __len__(self):
+    return self._count
+
+  def _range(self ,start ,stop):
+    if start is None:
+      start = 0
+    if stop is None or stop > self._count:
+      stop = self._count
+    return start ,max(start ,stop)
+
+  def __getitem__(self ,i):
+    '''!
+      @brief Get record i
+      @return Tuple (timestamp, sensor id, raw word), timestamp is the monotonic time of the writer, unit: s
+    '''
+    if i < 0:
+      i += self._count
+    if not 0 <= i < self._count:
+      raise IndexError("log record out of range")
+    delta ,sensor ,raw = _LOG_RECORD.unpack_from(self._mm ,_LOG_HEADER.size + i*_LOG_RECORD.size)
+    return self.base + delta/1000.0 ,sensor ,raw
+
+  def _delta(self ,i):
+    return _LOG_RECORD.unpack_from(self._mm ,_LOG_HEADER.size + i*_LOG_RECORD.size)[0]
+
+  def bisect(self ,timestamp):
+    '''!
+      @brief Number of the oldest records older than timestamp, binary search on the record times
+    '''
+    if self.base is None:
+      return 0
+    delta = (timestamp - self.base)*1000.0
+    lo = 0
+    hi = self._count
+    while lo < hi:
+      mid = (lo + hi)>>1
+      if self._delta(mid) < delta:
+        lo = mid + 1
+      else:
+        hi = mid
+    return lo
+
+  def find(self ,begin ,end):
+    '''!
+      @brief Records from time begin up to, not including, time end
+      @return Tuple (start, stop) of record indexes
+    '''
+    start = self.bisect(begin)
+    return start ,max(start ,self.bisect(end))
+
+  def view(self ,start=None ,stop=None):
+    '''!
+      @brief Zero-copy memoryview of the bytes of records start to stop, 8 bytes '<IHH' per record
+    '''
+    start ,stop = self._range(start ,stop)
+    return memoryview(self._mm)[_LOG_HEADER.size + start*_LOG_RECORD.size:_LOG_HEADER.size + stop*_LOG_RECORD.size]
+
+  def array(self ,start=None ,stop=None):
+    '''!
+      @brief Zero-copy NumPy structured array of records start to stop, fields "delta" (ms since base), "sensor" and "raw"
+      @exception ImportError NumPy is not installed
+    '''
+    np = _load_numpy()
+    if not np:
+      raise ImportError("MCP9808LogReader.array() needs NumPy")
+    start ,stop = self._range(start ,stop)
+    dtype = np.dtype([("delta" ,"<u4") ,("sensor" ,"<u2") ,("raw" ,"<u2")])
+    if stop == start:                                        # empty or closed log, there is no buffer to view
+      return np.zeros(0 ,dtype=dtype)
+    return np.frombuffer(self._mm ,dtype=dtype ,count=stop - start ,offset=_LOG_HEADER.size + start*_LOG_RECORD.size)
+
+  def samples(self ,start=None ,stop=None ,sensor=None):
+    '''!
+      @brief Generator of (sensor id, MCP9808Sample) of records start to stop
+      @param sensor Only the records of this sensor id, None for all
+    '''
+    start ,stop = self._range(start ,stop)
+    table = _temperature_table(0)
+    base = self.base
+    mm = self._mm
+    offset = _LOG_HEADER.size + start*_LOG_RECORD.size
+    unpack = _LOG_RECORD.unpack_from
+    for _ in range(start ,stop):
+      delta ,sid ,raw = unpack(mm ,offset)
+      offset += _LOG_RECORD.size
+      if sensor is None or sid == sensor:
+        yield sid ,MCP9808Sample(table[raw&0x1FFF] ,raw>>13 ,raw ,base + delta/1000.0)
+
+  def temperatures(self ,start=None ,stop=None ,sensor=None):
+    '''!
+      @brief Timestamps and temps of records start to stop, see decode_temperature_array
+      @param sensor Only the records of this sensor id, None for all
+      @return Tuple (timestamps in s, temps in ℃), NumPy arrays, lists when NumPy is not installed
+    '''
+    np = _load_numpy()
+    if not np:
+      samples = [sample for _ ,sample in self.samples(start ,stop ,sensor)]
+      return [s.timestamp for s in samples] ,[s.temperature for s in samples]
+    records = self.array(start ,stop)
+    if sensor is not None:
+      records = records[records["sensor"] == sensor]
+    return (self.base or 0.0) + records["delta"]/1000.0 ,decode_temperature_array(records["raw"])[0]
+
+  def close(self):
+    if hasattr(self._mm ,"close"):
+      self._mm.close()
+    self._mm = b""
+    self._count = 0
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self ,*exc):
+    self.close()
+
+
+## compressed archive: header (magic, version, seconds per tick), blocks, block index, footer (index offset, block count, magic)
+ARCHIVE_MAGIC                  = b"MCP9808Z"
+ARCHIVE_VERSION                = 1
+_ARCHIVE_HEADER                = struct.Struct('<8sHd')
+_ARCHIVE_INDEX                 = struct.Struct('<qQQ')
+_ARCHIVE_FOOTER                = struct.Struct('<QI8s')
+
+def _zigzag(value):
+  return (value<<1) if value >= 0 else ((-value<<1) - 1)
+
+def _unzigzag(value):
+  return (value>>1) if not value&1 else -((value + 1)>>1)
+
+def _put_varint(buf ,value):
+  while value > 0x7F:
+    buf.append((value&0x7F)|0x80)
+    value >>= 7
+  buf.append(value)
+
+def _get_varint(data ,pos):
+  '''!
+    @return Tuple (value, position after the varint)
+  '''
+  value = 0
+  shift = 0
+  while True:
+    byte = data[pos]
+    pos += 1
+    value |= (byte&0x7F)<<shift
+    if byte < 0x80:
+      return value ,pos
+    shift += 7
+
+def _block_samples(body):
+  '''!
+    @brief Count the samples after the first one that the body of an archive block encodes
+    @return The number of samples, None when the body doesn't end on a complete token
+  '''
+  samples = 0
+  pos = 0
+  try:
+    while pos < len(body):
+      token ,pos = _get_varint(body ,pos)
+      if token&1:
+        samples += token>>1
+      else:
+        _ ,pos = _get_varint(body ,pos)
+        samples += 1
+  except IndexError:
+    return None
+  return samples
+
+
+class MCP9808ArchiveBlock(object):
+  '''!
+    @brief Entry of the block index of a compressed archive
+  '''
+  __slots__ = ('first_tick' ,'first_sample' ,'offset')
+
+  def __init__(self ,first_tick ,first_sample ,offset):
+    ## Time of the first sample of the block in ticks, number of samples before the block and file offset of the block
+    self.first_tick = first_tick
+    self.first_sample = first_sample
+    self.offset = offset
+
+
+class MCP9808Compressor(object):
+  '''!
+    @brief Streaming compressor of one sensor's (timestamp, raw word) series
+    @n     The timestamps are quantized to ticks, the samples are stored as the zigzag varint change of the sample interval
+    @n     and of the raw word, runs of samples with the same interval and the same word collapse into one run-length varint
+    @n     Every block of samples starts from absolute values and is listed in a block index written by close(), for seeking
+  '''
+  def __init__(self ,f ,block=4096 ,tick=0.001):
+    '''!
+      @param f     Binary file object open for writing, or a path
+      @param block Samples per block, a seek reads at most one block too many
+      @param tick  Time resolution of the timestamps, unit: s
+    '''
+    self._own = not hasattr(f ,"write")
+    self.f = open(f ,"wb") if self._own else f
+    self.block = block
+    self.tick = tick
+    self._rate = 1.0/tick
+    self.index = []
+    self._count = 0
+    self._buf = bytearray()
+    self._n = 0
+    self._run = 0
+    self._offset = _ARCHIVE_HEADER.size
+    self.f.write(_ARCHIVE_HEADER.pack(ARCHIVE_MAGIC ,ARCHIVE_VERSION ,tick))
+
+  def __len__(self):
+    return self._count
+
+  def append(self ,raw ,timestamp):
+    '''!
+      @brief Add a sample
+      @param raw       The raw 16 bit TEMPERATURE_REGISTER word
+      @param timestamp Time of the sample, unit: s
+    '''
+    tick = int(round(timestamp*self._rate))
+    raw &= 0xFFFF
+    if self._n == 0:
+      self.index.append(MCP9808ArchiveBlock(tick ,self._count ,self._offset))
+      self._first = (tick ,raw)
+      self._interval = 0
+    else:
+      interval = tick - self._tick
+      draw = ((raw - self._raw + 0x8000)&0xFFFF) - 0x8000
+      if interval == self._interval and draw == 0:
+        self._run += 1
+      else:
+        buf = self._buf
+        if self._run:
+          _put_varint(buf ,(self._run<<1)|1)
+          self._run = 0
+        _put_varint(buf ,_zigzag(interval - self._interval)<<1)
+        _put_varint(buf ,_zigzag(draw))
+        self._interval = interval
+    self._tick = tick
+    self._raw = raw
+    self._n += 1
+    self._count += 1
+    if self._n == self.block:
+      self._end_block()
+
+  def append_sample(self ,sample):
+    '''!
+      @brief Add an MCP9808Sample
+    '''
+    self.append(sample.raw ,sample.timestamp)
+
+  def extend(self ,samples):
+    '''!
+      @brief Add every MCP9808Sample of an iterable, stream() for example
+    '''
+    for sample in samples:
+      self.append(sample.raw ,sample.timestamp)
+
+  def tee(self ,samples):
+    '''!
+      @brief Stage adding every MCP9808Sample passing through, combine it with stream() and the other stages
+    '''
+    for sample in samples:
+      self.append(sample.raw ,sample.timestamp)
+      yield sample
+
+  def _end_block(self):
+    if self._run:
+      _put_varint(self._buf ,(self._run<<1)|1)
+      self._run = 0
+    head = bytearray()
+    tick ,raw = self._first
+    _put_varint(head ,self._n)
+    _put_varint(head ,_zigzag(tick))
+    _put_varint(head ,raw)
+    _put_varint(head ,len(self._buf))
+    self.f.write(bytes(head))
+    self.f.write(bytes(self._buf))
+    self._offset += len(head) + len(self._buf)
+    self._buf = bytearray()
+    self._n = 0
+
+  def flush(self):
+    '''!
+      @brief End the current block and flush the file, the blocks written so far can be read even without the index
+    '''
+    if self._n:
+      self._end_block()
+    self.f.flush()
+
+  def close(self):
+    '''!
+      @brief End the current block and write the block index
+    '''
+    if self.f is None:
+      return
+    if self._n:
+      self._end_block()
+    for entry in self.index:
+      self.f.write(_ARCHIVE_INDEX.pack(entry.first_tick ,entry.first_sample ,entry.offset))
+    self.f.write(_ARCHIVE_FOOTER.pack(self._offset ,len(self.index) ,ARCHIVE_MAGIC))
+    self.f.flush()
+    if self._own:
+      self.f.close()
+    self.f = None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self ,*exc):
+    self.close()
+
+
+class MCP9808Decompressor(object):
+  '''!
+    @brief Reader of an MCP9808Compressor archive, decodes back to the exact raw words
+    @n     An archive without block index, cut off by a crash, is scanned block by block up to the last complete block
+  '''
+  def __init__(self ,f):
+    '''!
+      @param f Binary file object open for reading, or a path
+    '''
+    self._own = not hasattr(f ,"read")
+    self.f = open(f ,"rb") if self._own else f
+    magic ,version ,self.tick = _ARCHIVE_HEADER.unpack(self.f.read(_ARCHIVE_HEADER.size))
+    if magic != ARCHIVE_MAGIC:
+      raise ValueError("not an MCP9808 archive")
+    if version != ARCHIVE_VERSION:
+      raise ValueError("unsupported MCP9808 archive version %d"%version)
+    self._rate = 1.0/self.tick                             # ticks per second, dividing by it keeps 1 ms ticks exact decimals
+    self.index ,self._count = self._read_index()
+
+  def _read_index(self):
+    f = self.f
+    f.seek(0 ,2)
+    size = f.tell()
+    if size >= _ARCHIVE_HEADER.size + _ARCHIVE_FOOTER.size:
+      f.seek(size - _ARCHIVE_FOOTER.size)
+      offset ,blocks ,magic = _ARCHIVE_FOOTER.unpack(f.read(_ARCHIVE_FOOTER.size))
+      if magic == ARCHIVE_MAGIC and offset + blocks*_ARCHIVE_INDEX.size + _ARCHIVE_FOOTER.size == size:
+        f.seek(offset)
+        data = f.read(blocks*_ARCHIVE_INDEX.size)
+        index = [MCP9808ArchiveBlock(*_ARCHIVE_INDEX.unpack_from(data ,i*_ARCHIVE_INDEX.size)) for i in range(blocks)]
+        count = 0
+        if index:
+          count = index[-1].first_sample + self._read_block(index[-1])[0]
+        return index ,count
+    return self._scan(size)
+
+  def _scan(self ,size):
+    '''!
+      @brief Rebuild the block index of an archive without a valid footer, the blocks carry no marker,
+      @n     so a block is accepted only when it lies inside the file and its body decodes to exactly its sample count,
+      @n     the scan stops at the first block failing that, a block cut off by a crash or the start of a partial index
+    '''
+    index = []
+    count = 0
+    offset = _ARCHIVE_HEADER.size
+    f = self.f
+    while offset < size:
+      f.seek(offset)
+      head = bytearray(f.read(40))
+      try:
+        n ,pos = _get_varint(head ,0)
+        tick ,pos = _get_varint(head ,pos)
+        raw ,pos = _get_varint(head ,pos)
+        length ,pos = _get_varint(head ,pos)
+      except IndexError:
+        break
+      if n == 0 or raw > 0xFFFF or offset + pos + length > size:
+        break
+      f.seek(offset + pos)
+      if _block_samples(bytearray(f.read(length))) != n - 1:
+        break
+      index.append(MCP9808ArchiveBlock(_unzigzag(tick) ,count ,offset))
+      count += n
+      offset += pos + length
+    return index ,count
+
+  def _read_block(self ,entry):
+    '''!
+      @return Tuple (samples, first tick, first raw, body bytes) of a block
+    '''
+    f = self.f
+    f.seek(entry.offset)
+    head = bytearray(f.read(40))
+    n ,pos = _get_varint(head ,0)
+    tick ,pos = _get_varint(head ,pos)
+    raw ,pos = _get_varint(head ,pos)
+    length ,pos = _get_varint(head ,pos)
+    f.seek(entry.offset + pos)
+    return n ,_unzigzag(tick) ,raw ,bytearray(f.read(length))
+
+  def __len__(self):
+    return self._count
+
+  def _decode_block(self ,entry):
+    '''!
+      @brief Generator of the (tick, raw) of one block
+    '''
+    n ,tick ,raw ,body = self._read_block(entry)
+    yield tick ,raw
+    n -= 1
+    interval = 0
+    pos = 0
+    while n > 0:
+      token ,pos = _get_varint(body ,pos)
+      if token&1:
+        run = token>>1
+        for _ in range(min(run ,n)):
+          tick += interval
+          yield tick ,raw
+        n -= run
+        continue
+      interval += _unzigzag(token>>1)
+      draw ,pos = _get_varint(body ,pos)
+      tick += interval
+      raw = (raw + _unzigzag(draw))&0xFFFF
+      yield tick ,raw
+      n -= 1
+
+  def _first_block(self ,begin):
+    if begin is None:
+      return 0
+    rate = self._rate
+    lo = 0
+    hi = len(self.index)
+    while lo < hi:                                         # blocks starting before begin
+      mid = (lo + hi)>>1
+      if self.index[mid].first_tick/rate < begin:
+        lo = mid + 1
+      else:
+        hi = mid
+    return max(0 ,lo - 1)
+
+  def raw(self ,begin=None ,end=None):
+    '''!
+      @brief Generator of (timestamp, raw word) from time begin up to, not including, time end, the block index is used to seek to begin
+    '''
+    rate = self._rate
+    for entry in self.index[self._first_block(begin):]:
+      if end is not None and entry.first_tick/rate >= end:
         return
-      except:
-        print("please check connect!")
-        #os.system('i2cdetect -y 1')
-        time.sleep(1)
+      for t ,raw in self._decode_block(entry):
+        timestamp = t/rate
+        if begin is not None and timestamp < begin:
+          continue
+        if end is not None and timestamp >= end:
+          return
+        yield timestamp ,raw
+
+  def __iter__(self):
+    return self.raw()
+
+  def samples(self ,begin=None ,end=None):
+    '''!
+      @brief Generator of MCP9808Sample from time begin up to, not including, time end, decoded like decode_temperature
+    '''
+    table = _temperature_table(0)
+    for timestamp ,raw in self.raw(begin ,end):
+      yield MCP9808Sample(table[raw&0x1FFF] ,raw>>13 ,raw ,timestamp)
+
+  def close(self):
+    if self._own and self.f is not None:
+      self.f.close()
+    self.f = None
+
+  def __enter__(self):
+    return self
+
+  def __exit__(self ,*exc):
+    self.close()
+
+
+class MCP9808Sweep(object):
+  '''!
+    @brief One read of TEMPERATURE_REGISTER of every sensor on a bus
+  '''
+  __slots__ = ('timestamp' ,'addresses' ,'raw')
+
+  def __init__(self ,timestamp ,addresses ,raw):
+    ## Monotonic time of the sweep, unit: s
+    self.timestamp = timestamp
+    ## Tuple of the sensor addresses
+    self.addresses = addresses
+    ## array of the raw register words in the order of addresses, -1 for a failed read
+    self.raw = raw
+
+  def __len__(self):
+    return len(self.addresses)
+
+  def temperatures(self):
+    '''!
+      @brief List of the temps (unit is ℃), None for a failed read
+    '''
+    table = _temperature_table(0)
+    return [None if w < 0 else table[w&0x1FFF] for w in self.raw]
+
+  def samples(self):
+    '''!
+      @brief List of MCP9808Sample, None for a failed read
+    '''
+    table = _temperature_table(0)
+    timestamp = self.timestamp
+    return [None if w < 0 else MCP9808Sample(table[w&0x1FFF] ,w>>13 ,w ,timestamp) for w in self.raw]
+
+  def __iter__(self):
+    return iter(zip(self.addresses ,self.temperatures()))
+
+  def __repr__(self):
+    return "MCP9808Sweep(timestamp=%r, %s)"%(self.timestamp ,", ".join("0x%02X: %r"%(a ,t) for a ,t in self))
+
+
+class MCP9808Breaker(object):
+  '''!
+    @brief Circuit breaker of one address of an MCP9808Bus
+    @n     closed: the address is read in every sweep, threshold failed reads in a row open the breaker
+    @n     open: the address is skipped by the sweeps until the cool-down has passed
+    @n     half-open: the address is probed once, success closes the breaker, failure opens it again with twice the cool-down
+  '''
+  __slots__ = ('state' ,'failures' ,'threshold' ,'cooldown' ,'base_cooldown' ,'max_cooldown' ,'retry_at' ,'trips')
+
+  def __init__(self ,threshold=3 ,cooldown=1.0 ,max_cooldown=30.0):
+    '''!
+      @param threshold    Failed reads in a row that open the breaker
+      @param cooldown     Time before the first probe of an open address, unit: s
+      @param max_cooldown Upper limit of the cool-down, unit: s
+    '''
+    self.state = BREAKER_CLOSED
+    ## failed reads in a row
+    self.failures = 0
+    self.threshold = threshold
+    self.cooldown = cooldown
+    self.base_cooldown = cooldown
+    self.max_cooldown = max_cooldown
+    ## monotonic time of the next probe while open, unit: s
+    self.retry_at = 0.0
+    ## number of times the breaker opened
+    self.trips = 0
+
+  def record_success(self):
+    self.state = BREAKER_CLOSED
+    self.failures = 0
+    self.cooldown = self.base_cooldown
+
+  def record_failure(self ,now):
+    '''!
+      @brief Count a failed read or probe
+      @return True when the breaker opened
+    '''
+    self.failures += 1
+    if self.state == BREAKER_HALF_OPEN:
+      self.cooldown = min(self.cooldown*2 ,self.max_cooldown)
+    elif self.state == BREAKER_CLOSED and self.failures >= self.threshold:
+      self.trips += 1
+    else:
+      return False
+    self.state = BREAKER_OPEN
+    self.retry_at = now + self.cooldown
+    return True
+
+  def open(self ,now):
+    self.state = BREAKER_OPEN
+    self.retry_at = now + self.cooldown
+
+  def __repr__(self):
+    return "MCP9808Breaker(state=%s, failures=%d, trips=%d)"%(("closed" ,"open" ,"half-open")[self.state] ,self.failures ,self.trips)
+
+
+class MCP9808Bus(object):
+  '''!
+    @brief Manager of all MCP9808 on one I2C bus, the bus is opened once and shared by the sensors
+    @n     Every address has an MCP9808Breaker, an address that keeps failing is skipped by the sweeps
+    @n     and probed by poll() instead, a sensor that comes back is attached again and the profile re-applied
+  '''
+  def __init__(self ,bus ,addresses=MCP9808_ADDRESSES ,profile=None ,threshold=3 ,cooldown=1.0 ,max_cooldown=30.0):
+    '''!
+      @param bus          I2C bus number, or an I2C backend object
+      @param addresses    Addresses searched by discover()
+      @param profile      MCP9808Config applied to every sensor when it's attached, None to leave the configuration alone
+      @param threshold    Failed reads in a row that open the breaker of an address
+      @param cooldown     Time before an open address is probed again, doubled on every failed probe, unit: s
+      @param max_cooldown Upper limit of the cool-down, unit: s
+    '''
+    if hasattr(bus ,"read_i2c_block_data"):
+      self.i2cbus = bus
+    else:
+      self.i2cbus = SMBusBackend.shared(bus)
+    self.addresses = tuple(addresses)
+    self.profile = profile
+    ## MCP9808BusLock of the bus, the sweeps take it at PRIORITY_BULK
+    self.bus_lock = MCP9808BusLock.for_bus(self.i2cbus)
+    ## dict of address: DFRobot_MCP9808_I2C of the discovered sensors
+    self.sensors = {}
+    ## dict of address: MCP9808Breaker of every searched address
+    self.breakers = dict((addr ,MCP9808Breaker(threshold ,cooldown ,max_cooldown)) for addr in self.addresses)
+    self._present = ()
+    self._active = ()
+    self._slots = ()
+    self._suspect = False
+    self._buffer = array('i')
+    self._active_buffer = self._buffer
+    self._lock = None
+    self._monitor = None
+
+  def _probe(self ,addr):
+    try:
+      with self.bus_lock:
+        device = self.i2cbus.read_i2c_block_data(addr ,DEVICE_REGISTER ,2)
+        manufacturer = self.i2cbus.read_i2c_block_data(addr ,MANUFACTURER_REGISTER ,2)
+    except (IOError ,OSError):
+      return False
+    return device[0] == DEVICE_ID and manufacturer[1] == MANUFACTURER_ID
+
+  def _attach(self ,addr):
+    '''!
+      @brief Attach the sensor of a responding address, forget its register shadow and apply the profile
+      @return False when the profile couldn't be applied
+    '''
+    sensor = self.sensors.get(addr)
+    if sensor is None:
+      sensor = self.sensors[addr] = DFRobot_MCP9808_I2C(self.i2cbus ,addr)
+    sensor.invalidate()
+    if self.profile is not None:
+      try:
+        sensor.apply(self.profile)
+      except MCP9808Error:
+        return False
+    return True
+
+  def _rebuild(self):
+    present = tuple(addr for addr in self.addresses if addr in self.sensors)
+    active = tuple(addr for addr in present if self.breakers[addr].state == BREAKER_CLOSED)
+    self._present = present
+    self._buffer = array('i' ,[-1])*len(present)
+    if active == present:
+      self._active = present
+      self._active_buffer = self._buffer
+    else:
+      self._active = active
+      self._active_buffer = array('i' ,[-1])*len(active)
+    self._slots = tuple(present.index(addr) for addr in active)
+    self._suspect = any(self.breakers[addr].failures for addr in active)
+
+  def discover(self):
+    '''!
+      @brief Find the responding sensors, an address is present when its device id and manufacturer id match, as sensor_init checks
+      @n     The breakers of the missing addresses are opened, so poll() keeps looking for them
+      @return Tuple of the present addresses
+    '''
+    now = _monotonic()
+    for addr in self.addresses:
+      breaker = self.breakers[addr]
+      if self._probe(addr) and self._attach(addr):
+        breaker.record_success()
+      else:
+        self.sensors.pop(addr ,None)
+        breaker.open(now)
+    self._rebuild()
+    return self._present
+
+  def poll(self):
+    '''!
+      @brief Probe the open addresses whose cool-down has passed, with the device id and manufacturer id checks of sensor_init
+      @n     A responding address is attached (again), its profile is re-applied and it is read by the sweeps from then on
+      @return Tuple of the addresses attached by this call
+    '''
+    lock = self._lock
+    if lock is not None:
+      lock.acquire()
+    try:
+      now = _monotonic()
+      attached = []
+      for addr in self.addresses:
+        breaker = self.breakers[addr]
+        if breaker.state != BREAKER_OPEN or now < breaker.retry_at:
+          continue
+        breaker.state = BREAKER_HALF_OPEN
+        if self._probe(addr) and self._attach(addr):
+          breaker.record_success()
+          attached.append(addr)
+        else:
+          breaker.record_failure(now)
+      if attached:
+        self._rebuild()
+      return tuple(attached)
+    finally:
+      if lock is not None:
+        lock.release()
+
+  def _monitor_run(self ,stop ,interval):
+    while not stop.wait(interval):
+      try:
+        self.poll()
+      except Exception:
+        pass
+
+  def start_monitor(self ,interval=0.5):
+    '''!
+      @brief Call poll() from a background thread, the sweeps and the probes are serialized by a reentrant lock from then on
+      @param interval Time between two polls, unit: s
+    '''
+    import threading
+    if self._monitor is not None:
+      return
+    self._lock = threading.RLock()
+    stop = threading.Event()
+    thread = threading.Thread(target=self._monitor_run ,args=(stop ,interval) ,name="MCP9808Bus-monitor")
+    thread.daemon = True
+    self._monitor = (thread ,stop)
+    thread.start()
+
+  def stop_monitor(self):
+    '''!
+      @brief Stop the background thread of start_monitor()
+    '''
+    if self._monitor is None:
+      return
+    thread ,stop = self._monitor
+    stop.set()
+    thread.join()
+    self._monitor = None
+    self._lock = None
+
+  @property
+  def present(self):
+    '''!
+      @brief Tuple of the attached addresses, the columns of the sweeps
+    '''
+    return self._present
+
+  @property
+  def healthy(self):
+    '''!
+      @brief Tuple of the attached addresses whose breaker is closed, the ones really read by the sweeps
+    '''
+    return self._active
+
+  def _account(self ,active ,out):
+    now = _monotonic()
+    breakers = self.breakers
+    tripped = False
+    suspect = False
+    i = 0
+    for addr in active:
+      breaker = breakers[addr]
+      if out[i] < 0:
+        tripped = breaker.record_failure(now) or tripped
+        suspect = True
+      elif breaker.failures:
+        breaker.record_success()
+      i += 1
+    self._suspect = suspect
+    if tripped:
+      self._rebuild()
+
+  def read_raw(self):
+    '''!
+      @brief Read TEMPERATURE_REGISTER of every present sensor into the shared buffer, the addresses with an open breaker aren't read
+      @return array of the raw register words in the order of present, -1 for a failed or skipped read, overwritten by the next sweep
+    '''
+    lock = self._lock
+    if lock is not None:
+      lock.acquire()
+    try:
+      buf = self._buffer
+      active = self._active
+      out = self._active_buffer
+      if not active:
+        return buf
+      bus_lock = self.bus_lock
+      if hasattr(self.i2cbus ,"read_words"):
+        bus_lock.acquire(PRIORITY_BULK)
+        try:
+          self.i2cbus.read_words(active ,TEMPERATURE_REGISTER ,out)
+        finally:
+          bus_lock.release()
+      else:
+        read = self.i2cbus.read_i2c_block_data
+        i = 0
+        for addr in active:                                # one transaction at a time, alert handling can get in between
+          bus_lock.acquire(PRIORITY_BULK)
+          try:
+            rslt = read(addr ,TEMPERATURE_REGISTER ,2)
+            out[i] = (rslt[0]<<8)|rslt[1]
+          except (IOError ,OSError):
+            out[i] = -1
+          finally:
+            bus_lock.release()
+          i += 1
+      if out is not buf:
+        i = 0
+        for slot in self._slots:
+          buf[slot] = out[i]
+          i += 1
+      if self._suspect or -1 in out:
+        self._account(active ,out)                          # may open a breaker, present and this buffer stay valid
+      return buf
+    finally:
+      if lock is not None:
+        lock.release()
+
+  def read_all(self):
+    '''!
+      @brief Read the temp of every present sensor in one sweep
+      @return MCP9808Sweep
+    '''
+    lock = self._lock
+    if lock is not None:
+      lock.acquire()
+    try:
+      timestamp = _monotonic()
+      return MCP9808Sweep(timestamp ,self._present ,array('i' ,self.read_raw()))
+    finally:
+      if lock is not None:
+        lock.release()
+
+  def close(self):
+    '''!
+      @brief Stop the monitor and let go of the bus, the backend is shared with the other sensors of the bus and is not closed here
+      @n     A shared SMBusBackend closes the bus once its last user is gone, a backend object passed in stays with its owner
+    '''
+    self.stop_monitor()
+    self.sensors = {}
+    self._rebuild()
+    self.i2cbus = None
+    self.bus_lock = None
+
+
+class MCP9808Frame(object):
+  '''!
+    @brief One time-aligned sweep of every bus of an MCP9808Acquisition
+  '''
+  __slots__ = ('timestamp' ,'sweeps' ,'latency')
+
+  def __init__(self ,timestamp ,sweeps ,latency):
+    ## Monotonic time the sweep of every bus was started, unit: s
+    self.timestamp = timestamp
+    ## List of MCP9808Sweep in the order of the buses, None for a bus whose sweep failed
+    self.sweeps = sweeps
+    ## Time until the slowest bus finished, unit: s
+    self.latency = latency
+
+  def items(self):
+    '''!
+      @brief Iterate over (bus index, address, temp) of every sensor, temp is None for a failed read
+    '''
+    for index ,sweep in enumerate(self.sweeps):
+      if sweep is not None:
+        for addr ,temperature in sweep:
+          yield index ,addr ,temperature
+
+
+class _BusWorker(object):
+  def __init__(self ,bus ,threading):
+    self.bus = bus
+    self.result = None
+    self.error = None
+    self.stopping = False
+    self.request = threading.Event()
+    self.done = threading.Event()
+    self.thread = threading.Thread(target=self.run ,name="MCP9808Bus-worker")
+    self.thread.daemon = True
+
+  def run(self):
+    while True:
+      self.request.wait()
+      self.request.clear()
+      if self.stopping:
         return
+      try:
+        self.result = self.bus.read_all()
+        self.error = None
+      except Exception as e:
+        self.result = None
+        self.error = e
+      self.done.set()
+
+
+class MCP9808Acquisition(object):
+  '''!
+    @brief Acquisition of sensors spread over several I2C buses, with one worker thread per bus
+    @n     Every sweep starts all buses at the same time, so it takes as long as the slowest bus instead of the sum of all buses
+    @n     Use I2CDevBackend for the buses, its ioctl releases the GIL while the transfer blocks
+  '''
+  def __init__(self ,buses):
+    '''!
+      @param buses List of MCP9808Bus, discover() is called for the ones without present sensors
+    '''
+    import threading
+    self.buses = list(buses)
+    for bus in self.buses:
+      if not bus.present:
+        bus.discover()
+    self._workers = [_BusWorker(bus ,threading) for bus in self.buses]
+    for worker in self._workers:
+      worker.thread.start()
+    ## number of ticks skipped by run() because a sweep took longer than the period
+    self.overruns = 0
+
+  def sweep(self):
+    '''!
+      @brief Read every sensor of every bus, the buses are read in parallel
+      @return MCP9808Frame
+    '''
+    timestamp = _monotonic()
+    for worker in self._workers:
+      worker.done.clear()
+      worker.request.set()
+    sweeps = []
+    for worker in self._workers:
+      worker.done.wait()
+      sweeps.append(worker.result)
+    return MCP9808Frame(timestamp ,sweeps ,_monotonic() - timestamp)
+
+  def run(self ,period ,count=None):
+    '''!
+      @brief Generator of MCP9808Frame started on a fixed monotonic grid, the grid doesn't drift with the sweep time
+      @n     Ticks missed because a sweep overran the period are skipped and counted in overruns
+      @param period Time between sweeps, unit: s
+      @param count  Number of frames, None for endless
+    '''
+    deadline = _monotonic()
+    n = 0
+    while count is None or n < count:
+      yield self.sweep()
+      n += 1
+      deadline ,missed = _sleep_to_grid(deadline ,period)
+      self.overruns += missed
+
+  def close(self):
+    '''!
+      @brief Stop the worker threads
+    '''
+    for worker in self._workers:
+      worker.stopping = True
+      worker.request.set()
+    for worker in self._workers:
+      worker.thread.join()
+    self._workers = []
+
+
+## outcomes of one device of an MCP9808Rollout
+ROLLOUT_CHANGED                = "changed"
+ROLLOUT_UNCHANGED              = "unchanged"
+ROLLOUT_LOCKED                 = "locked"
+ROLLOUT_FAILED                 = "failed"
+
+class MCP9808RolloutResult(object):
+  '''!
+    @brief Outcome of one device of an MCP9808Rollout
+  '''
+  __slots__ = ('bus' ,'addr' ,'status' ,'changed' ,'lock' ,'error')
+
+  def __init__(self ,bus ,addr ,status ,changed=() ,lock=None ,error=None):
+    ## Bus as given in the targets and I2C address of the device
+    self.bus = bus
+    self.addr = addr
+    ## ROLLOUT_CHANGED, ROLLOUT_UNCHANGED, ROLLOUT_LOCKED or ROLLOUT_FAILED
+    self.status = status
+    ## Tuple of the written registers
+    self.changed = tuple(changed)
+    ## Value of get_lock_state of a locked device
+    self.lock = lock
+    ## Error of a failed device, an exception or a message
+    self.error = error
+
+  def __repr__(self):
+    text = "MCP9808RolloutResult(bus=%r, addr=0x%02X, %s"%(self.bus ,self.addr ,self.status)
+    if self.changed:
+      text += ", changed=%s"%"/".join(REGISTER_NAMES.get(reg ,str(reg)) for reg in self.changed)
+    if self.lock is not None:
+      text += ", lock=0x%02X"%self.lock
+    if self.error is not None:
+      text += ", error=%s"%self.error
+    return text + ")"
+
 
-  def read_reg(self, reg ,len):
+class MCP9808RolloutReport(object):
+  '''!
+    @brief Per-device report of an MCP9808Rollout, iterate over it for the MCP9808RolloutResult in target order
+  '''
+  def __init__(self ,results ,elapsed):
+    self.results = results
+    ## Time the rollout took, unit: s
+    self.elapsed = elapsed
+
+  def __iter__(self):
+    return iter(self.results)
+
+  def __len__(self):
+    return len(self.results)
+
+  def counts(self):
+    '''!
+      @brief dict of status: number of devices, every status is present
+    '''
+    counts = dict((status ,0) for status in (ROLLOUT_CHANGED ,ROLLOUT_UNCHANGED ,ROLLOUT_LOCKED ,ROLLOUT_FAILED))
+    for result in self.results:
+      counts[result.status] += 1
+    return counts
+
+  def with_status(self ,status):
+    '''!
+      @brief List of the results with one status
+    '''
+    return [result for result in self.results if result.status == status]
+
+  def __repr__(self):
+    return "MCP9808RolloutReport(%s, %.3f s)"%(", ".join("%s=%d"%item for item in sorted(self.counts().items())) ,self.elapsed)
+
+
+class MCP9808Rollout(object):
+  '''!
+    @brief Bring many sensors to one MCP9808Config profile, each device is diffed against the profile and only the registers that differ are written
+    @n     Every bus is handled by its own thread, so buses are written and verified in parallel
+    @n     On a backend with read_words (I2CDevBackend) CONFIG and the thresholds of all devices of a bus are read with a few combined
+    @n     transfers first, a device that already matches the profile then costs no further transaction
+  '''
+  def __init__(self ,profile ,targets ,verify=True):
+    '''!
+      @param profile MCP9808Config to roll out
+      @param targets List of (bus, address), bus is an I2C bus number, an I2C backend object or an MCP9808Bus whose sensors are reused
+      @param verify  True to read back every written register
+      @exception ValueError The profile is invalid, see MCP9808Config.check
+    '''
+    rslt = profile.check()
+    if rslt != 0:
+      raise ValueError("invalid profile, check() returned %d"%rslt)
+    self.profile = profile
+    self.verify = verify
+    self.targets = list(targets)
+
+  @staticmethod
+  def _key(bus):
+    return bus if isinstance(bus ,int) else id(bus)
+
+  def _groups(self):
+    groups = {}
+    order = []
+    for bus ,addr in self.targets:
+      key = self._key(bus)
+      if key not in groups:
+        groups[key] = (bus ,[])
+        order.append(key)
+      addrs = groups[key][1]
+      if addr not in addrs:
+        addrs.append(addr)
+    return [groups[key] for key in order]
+
+  def _prefetch(self ,backend ,addrs):
+    '''!
+      @brief Read the 16 bit registers the profile compares of every device with read_words
+      @return dict of address: {register: [MSB, LSB]}, devices that didn't answer are left out
+    '''
+    regs = [CONFIG_REGISTER]
+    if self.profile.thresholds is not None:
+      regs += [T_UPPER_REGISTER ,T_LOWER_REGISTER ,T_CRIT_REGISTER]
+    addrs = tuple(addrs)
+    out = array('i' ,[-1])*len(addrs)
+    registers = dict((addr ,{}) for addr in addrs)
+    with MCP9808BusLock.for_bus(backend):
+      for reg in regs:
+        backend.read_words(addrs ,reg ,out)
+        for addr ,word in zip(addrs ,out):
+          if word >= 0:
+            registers[addr][reg] = [word>>8 ,word&(0xFF if reg != CONFIG_REGISTER else 0xDF)]
+    return dict((addr ,read) for addr ,read in registers.items() if len(read) == len(regs))
+
+  def _roll(self ,bus ,sensor ,addr ,registers):
+    shadow = sensor._shadow
+    if registers:                                          # serve the diff from the prefetched registers
+      if shadow is None:
+        sensor._shadow = dict(registers)
+      else:
+        shadow.update(registers)
     try:
-      rslt = self.i2cbus.read_i2c_block_data(self.__addr ,reg ,len)
-      #print("please check connect!")
-    except:
-      rslt = -1
-      print("please check connect!")
-      time.sleep(1)
-    return rslt
+      code ,changed = sensor._apply(self.profile ,self.verify)
+      if code == -1:
+        return MCP9808RolloutResult(bus ,addr ,ROLLOUT_LOCKED ,lock=sensor.get_lock_state())
+      if code == -4:
+        return MCP9808RolloutResult(bus ,addr ,ROLLOUT_FAILED ,changed ,error="read back differs")
+      if code != 0:
+        return MCP9808RolloutResult(bus ,addr ,ROLLOUT_FAILED ,changed ,error="apply() returned %d"%code)
+      return MCP9808RolloutResult(bus ,addr ,ROLLOUT_CHANGED if changed else ROLLOUT_UNCHANGED ,changed)
+    except Exception as e:                                 # one bad device must not end the worker of its bus
+      return MCP9808RolloutResult(bus ,addr ,ROLLOUT_FAILED ,error=e)
+    finally:
+      if shadow is None:
+        sensor._shadow = None
+
+  def _roll_bus(self ,bus ,addrs ,results):
+    sensors = {}
+    if isinstance(bus ,MCP9808Bus):
+      backend = bus.i2cbus
+      sensors = bus.sensors
+    elif hasattr(bus ,"read_i2c_block_data"):
+      backend = bus
+    else:
+      backend = SMBusBackend.shared(bus)
+    registers = {}
+    if hasattr(backend ,"read_words"):
+      try:
+        registers = self._prefetch(backend ,addrs)
+      except Exception:                                    # every device is read by its own apply() then
+        registers = {}
+    for addr in addrs:
+      sensor = sensors.get(addr) or DFRobot_MCP9808_I2C(backend ,addr)
+      results.append(self._roll(bus ,sensor ,addr ,registers.get(addr)))
+
+  def run(self):
+    '''!
+      @brief Roll the profile out to every target, a device whose apply() fails or raises is reported as ROLLOUT_FAILED
+      @return MCP9808RolloutReport, the results are in the order of the targets
+      @exception ValueError The profile was changed since and is invalid now, nothing is written
+    '''
+    rslt = self.profile.check()                            # once here instead of failing every device in the workers
+    if rslt != 0:
+      raise ValueError("invalid profile, check() returned %d"%rslt)
+    start = _monotonic()
+    groups = self._groups()
+    results = [[] for _ in groups]
+    if len(groups) == 1:
+      self._roll_bus(groups[0][0] ,groups[0][1] ,results[0])
+    else:
+      import threading
+      threads = [threading.Thread(target=self._roll_bus ,args=(bus ,addrs ,rslt) ,name="MCP9808Rollout-worker")
+                 for (bus ,addrs) ,rslt in zip(groups ,results)]
+      for thread in threads:
+        thread.start()
+      for thread in threads:
+        thread.join()
+    done = {}
+    for rslt in results:
+      for result in rslt:
+        done[(self._key(result.bus) ,result.addr)] = result
+    ordered = []
+    for bus ,addr in self.targets:
+      result = done.pop((self._key(bus) ,addr) ,None)
+      if result is not None:
+        ordered.append(result)
+    return MCP9808RolloutReport(ordered ,_monotonic() - start)
+
+
+class SimulatedMCP9808(object):
+  '''!
+    @brief Pure Python model of one MCP9808, register map, lock bits, resolution dependent conversion time and alert logic
+    @n     Attach it to a SimulatedBus to run the driver without hardware
+  '''
+  def __init__(self ,temperature=25.0 ,clock=None):
+    '''!
+      @param temperature Ambient temp in ℃, a number or a function of the clock time
+      @param clock       Time source in s, monotonic time by default
+    '''
+    self.temperature = temperature
+    self.clock = clock or _monotonic
+    ## False simulates an unplugged sensor, every transaction fails
+    self.present = True
+    ## functions called with the new pin ALE level (1 high, 0 low) when it changes
+    self.alert_listeners = []
+    self.power_cycle()
+
+  def power_cycle(self):
+    '''!
+      @brief Restore the power-on register values, this is the only way to clear the lock bits
+    '''
+    self.config = 0x0000
+    self.upper = 0x0000
+    self.lower = 0x0000
+    self.crit = 0x0000
+    self.resolution = RESOLUTION_0_0625
+    self.conversions = 0
+    self._ta = 0
+    self._converted_at = None
+    self._state = 0
+    self._window = 0
+    self._latched = False
+    self._level = self.alert_level()
+
+  def _sixteenths(self ,word):
+    word &= 0x1FFF
+    return word - ((word&0x1000)<<1)
+
+  def _convert(self):
+    if self.config&0x0100:                                 # shutdown, no conversion
+      return
+    now = self.clock()
+    period = CONVERSION_TIME[self.resolution]
+    if self._converted_at is not None and now - self._converted_at < period:
+      return
+    if self._converted_at is None:
+      self._converted_at = now
+    else:
+      self._converted_at += ((now - self._converted_at)//period)*period
+    temperature = self.temperature
+    if callable(temperature):
+      temperature = temperature(now)
+    step = 8>>self.resolution
+    value = (int(temperature*16.0)//step)*step
+    value = max(-0x1000 ,min(0x0FFF ,value))
+    self._ta = value&0x1FFF
+    self.conversions += 1
+    self._update_alert(value)
+
+  def _update_alert(self ,ta):
+    crit = self._sixteenths(self.crit)
+    upper = self._sixteenths(self.upper)
+    lower = self._sixteenths(self.lower)
+    self._state = (TCRIT_FLAG if ta >= crit else 0) | (TUPPER_FLAG if ta > upper else 0) | (TLOWER_FLAG if ta < lower else 0)
+    hysteresis = (0 ,24 ,48 ,96)[(self.config>>9)&0x03]
+    window = self._window
+    if ta > upper:
+      window = TUPPER_FLAG
+    elif ta < lower:
+      window = TLOWER_FLAG
+    elif window == TUPPER_FLAG and ta <= upper - hysteresis:
+      window = 0
+    elif window == TLOWER_FLAG:
+      window = 0
+    if window != self._window:
+      self._window = window
+      self._latched = True
+    self._notify()
+
+  def alert_asserted(self):
+    '''!
+      @brief Alert output status, True when the alert condition is active
+    '''
+    config = self.config
+    if not config&0x0008:
+      return False
+    crit = (self._state&TCRIT_FLAG) != 0
+    if config&0x0004:
+      return crit
+    if config&0x0001:
+      return crit or self._latched
+    return crit or self._window != 0
+
+  def alert_level(self):
+    '''!
+      @brief Level of pin ALE, 1 high, 0 low
+    '''
+    asserted = self.alert_asserted()
+    if self.config&0x0002:
+      return 1 if asserted else 0
+    return 0 if asserted else 1
+
+  def _notify(self):
+    level = self.alert_level()
+    if level != self._level:
+      self._level = level
+      for listener in self.alert_listeners:
+        listener(level)
+
+  def read_register(self ,reg ,length):
+    '''!
+      @brief Read length bytes of register reg
+      @return list of int
+    '''
+    if reg == TEMPERATURE_REGISTER:
+      self._convert()
+      word = (self._state<<13) | self._ta
+    elif reg == CONFIG_REGISTER:
+      word = self.config | (0x0010 if self.alert_asserted() else 0)
+    elif reg == T_UPPER_REGISTER:
+      word = self.upper
+    elif reg == T_LOWER_REGISTER:
+      word = self.lower
+    elif reg == T_CRIT_REGISTER:
+      word = self.crit
+    elif reg == MANUFACTURER_REGISTER:
+      word = MANUFACTURER_ID
+    elif reg == DEVICE_REGISTER:
+      word = DEVICE_ID<<8
+    elif reg == RESOLUTION_REGISTER:
+      return ([self.resolution] + [0xFF]*length)[:length]
+    else:
+      word = 0x0000
+    return ([word>>8 ,word&0xFF] + [0xFF]*length)[:length]
+
+  def write_register(self ,reg ,data):
+    '''!
+      @brief Write the bytes of data to register reg, locked and read-only bits keep their value
+    '''
+    word = (data[0]<<8) | (data[1] if len(data) > 1 else 0)
+    lock = self.config&0x00C0
+    if reg == CONFIG_REGISTER:
+      if word&0x0020:                                      # interrupt clear
+        self._latched = False
+      if lock:
+        self.config |= word&0x00C0
+      else:
+        self.config = word&0x07CF
+      self._notify()
+    elif reg == T_UPPER_REGISTER and not lock&WIN_LOCK:
+      self.upper = word&0x1FFC
+    elif reg == T_LOWER_REGISTER and not lock&WIN_LOCK:
+      self.lower = word&0x1FFC
+    elif reg == T_CRIT_REGISTER and not lock&CRIT_LOCK:
+      self.crit = word&0x1FFC
+    elif reg == RESOLUTION_REGISTER:
+      self.resolution = data[0]&0x03
+
+
+class SimulatedBus(I2CBackend):
+  '''!
+    @brief I2C bus backend hosting SimulatedMCP9808 devices, with injectable latency and faults and transaction counters
+  '''
+  def __init__(self ,devices=None ,latency=0.0 ,byte_time=0.0 ,fault_rate=0.0 ,seed=None):
+    '''!
+      @param devices    dict of address: SimulatedMCP9808
+      @param latency    Time added to every transaction, unit: s
+      @param byte_time  Time added for every byte on the bus, address and register pointer included, unit: s
+      @param fault_rate Probability of a failing transaction
+      @param seed       Seed of the fault generator
+    '''
+    import random
+    self.devices = dict(devices or {})
+    self.latency = latency
+    self.byte_time = byte_time
+    self.fault_rate = fault_rate
+    self._random = random.Random(seed)
+    self._faults = 0
+    self._pointers = {}
+    self.reset_counters()
+
+  def reset_counters(self):
+    ## number of ioctl calls made through ioctl()
+    self.ioctls = 0
+    ## number of transactions, failed ones included
+    self.transactions = 0
+    self.bytes_read = 0
+    self.bytes_written = 0
+    self.failures = 0
+
+  def attach(self ,addr ,device=None):
+    '''!
+      @brief Put a device on the bus at addr, a new SimulatedMCP9808 when device is None
+      @return the device
+    '''
+    if device is None:
+      device = SimulatedMCP9808()
+    self.devices[addr] = device
+    return device
+
+  def detach(self ,addr):
+    return self.devices.pop(addr ,None)
+
+  def inject_faults(self ,count=1):
+    '''!
+      @brief Make the next count transactions fail
+    '''
+    self._faults += count
+
+  def _transaction(self ,addr ,nbytes):
+    self.transactions += 1
+    delay = self.latency + self.byte_time*(nbytes + 2)
+    if delay:
+      time.sleep(delay)
+    device = self.devices.get(addr)
+    fault = self._faults > 0 or (self.fault_rate and self._random.random() < self.fault_rate)
+    if self._faults > 0:
+      self._faults -= 1
+    if fault or device is None or not device.present:
+      self.failures += 1
+      raise IOError(getattr(errno ,"EREMOTEIO" ,121) ,"Remote I/O error")
+    return device
+
+  def read_i2c_block_data(self ,addr ,reg ,length):
+    device = self._transaction(addr ,length)
+    self.bytes_read += length
+    return device.read_register(reg ,length)
+
+  def write_i2c_block_data(self ,addr ,reg ,data):
+    device = self._transaction(addr ,len(data))
+    self.bytes_written += len(data)
+    device.write_register(reg ,list(data))
+
+  def ioctl(self ,fd ,request ,arg):
+    '''!
+      @brief Fake ioctl layer of the i2c-dev I2C_RDWR transfer, for I2CDevBackend(bus ,ioctl=sim.ioctl ,fd=-1)
+      @n     Every message to a device counts as one transaction, a missing device aborts the transfer as the kernel does
+    '''
+    if request != I2C_RDWR:
+      raise IOError(errno.EINVAL ,"Invalid argument")
+    self.ioctls += 1
+    for i in range(arg.nmsgs):
+      msg = arg.msgs[i]
+      device = self._transaction(msg.addr ,msg.len)
+      if msg.flags&I2C_M_RD:
+        self.bytes_read += msg.len
+        rslt = device.read_register(self._pointers.get(msg.addr ,0) ,msg.len)
+        for j in range(msg.len):
+          msg.buf[j] = rslt[j]
+      else:
+        data = [msg.buf[j] for j in range(msg.len)]
+        self._pointers[msg.addr] = data[0]
+        if len(data) > 1:
+          self.bytes_written += len(data) - 1
+          device.write_register(data[0] ,data[1:])
+    return 0
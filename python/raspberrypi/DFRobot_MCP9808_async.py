@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*
+'''!
+  @file DFRobot_MCP9808_async.py
+  @brief asyncio interface of DFRobot_MCP9808, kept in its own module because the coroutine syntax is Python 3 only
+  @copyright Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license The MIT License (MIT)
+  @author [ZhixinLiu](zhixin.liu@dfrobot.com)
+  @version V1.1
+  @date 2026-10-18
+  @url https://github.com/DFRobot/DFRobot_MCP9808
+'''
+import asyncio
+import functools
+import weakref
+
+from DFRobot_MCP9808 import *
+from DFRobot_MCP9808 import _monotonic
+
+## WeakKeyDictionary of MCP9808BusLock: WeakKeyDictionary of event loop: asyncio.Lock
+## the blocking bus lock is shared by all sensors on a bus number, an asyncio.Lock only works on the loop it was made for
+_BUS_LOCKS = weakref.WeakKeyDictionary()
+
+def _running_loop():
+  get = getattr(asyncio ,"get_running_loop" ,None) or asyncio.get_event_loop
+  return get()
+
+def _loop_lock(bus_lock ,loop):
+  locks = _BUS_LOCKS.get(bus_lock)
+  if locks is None:
+    locks = _BUS_LOCKS[bus_lock] = weakref.WeakKeyDictionary()
+  lock = locks.get(loop)
+  if lock is None:
+    lock = locks[loop] = asyncio.Lock()
+  return lock
+
+class _AsyncDriver(DFRobot_MCP9808_I2C):
+  '''!
+    @brief Blocking driver run in the executor, each transaction is tried once and the retries are made on the event loop
+  '''
+  def __init__(self ,bus ,addr):
+    self._addr = addr
+    super(_AsyncDriver, self).__init__(bus ,addr)
+
+  def _transfer(self ,method ,reg ,arg):
+    lock = self.bus_lock
+    lock.acquire()
+    try:
+      return method(self._addr ,reg ,arg)
+    except (IOError ,OSError) as e:
+      self.errors += 1
+      raise MCP9808BusError(self._addr ,reg ,1 ,e)
+    finally:
+      lock.release()
+
+class AsyncMCP9808(object):
+  '''!
+    @brief Awaitable DFRobot_MCP9808, the bus transactions run in an executor off the event loop and are serialized per bus
+    @n     A failed call is retried as the RetryPolicy says, the back-off is an asyncio.sleep so the event loop is never blocked
+  '''
+  def __init__(self ,bus ,addr ,executor=None ,policy=None):
+    '''!
+      @param bus      I2C bus number, or an I2C backend object shared with other sensors on the same bus
+      @param addr     I2C address of the sensor
+      @param executor concurrent.futures executor running the transactions, the default executor of the loop when None
+      @param policy   RetryPolicy of the calls, DEFAULT_RETRY_POLICY when None
+    '''
+    self.sensor = _AsyncDriver(bus ,addr)
+    self.executor = executor
+    self.policy = policy or DEFAULT_RETRY_POLICY
+    self._resolution = None
+    self._last_read = None
+
+  async def _call(self ,method ,*args):
+    loop = _running_loop()
+    lock = _loop_lock(self.sensor.bus_lock ,loop)
+    policy = self.policy
+    sensor = self.sensor
+    start = _monotonic()
+    delays = policy.delays()
+    attempts = 1
+    while True:
+      try:
+        async with lock:
+          rslt = await loop.run_in_executor(self.executor ,functools.partial(method ,*args))
+        sensor.retries += attempts - 1
+        return rslt
+      except MCP9808BusError as e:
+        error = e
+      delay = next(delays ,None)
+      if delay is None:
+        error = MCP9808BusError(error.addr ,error.reg ,attempts ,error.cause)
+      elif policy.deadline is not None and _monotonic() + delay - start > policy.deadline:
+        error = MCP9808TimeoutError(error.addr ,error.reg ,attempts ,error.cause)
+      else:
+        await asyncio.sleep(delay)
+        attempts += 1
+        continue
+      sensor.retries += attempts - 1
+      sensor.failures += 1
+      raise error
+
+  async def wait_conversion(self):
+    '''!
+      @brief Wait until the sensor has finished a new conversion since the last read, the conversion time follows the resolution
+    '''
+    if self._last_read is None:
+      return
+    if self._resolution is None:
+      self._resolution = await self._call(self.sensor.get_resolution)
+    remaining = self._last_read + CONVERSION_TIME[self._resolution] - _monotonic()
+    if remaining > 0:
+      await asyncio.sleep(remaining)
+
+  async def sensor_init(self):
+    return await self._call(self.sensor.sensor_init)
+
+  async def get_temperature(self ,fresh=False):
+    '''!
+      @brief Get the current ambient temp, unit: ℃
+      @param fresh True to wait for a conversion newer than the last read
+    '''
+    if fresh:
+      await self.wait_conversion()
+    temperature = await self._call(self.sensor.get_temperature)
+    self._last_read = _monotonic()
+    return temperature
+
+  async def read_sample(self ,fresh=False):
+    '''!
+      @brief Get the current temp and comparator status with a single read, see DFRobot_MCP9808.read_sample
+      @param fresh True to wait for a conversion newer than the last read
+    '''
+    if fresh:
+      await self.wait_conversion()
+    sample = await self._call(self.sensor.read_sample)
+    self._last_read = sample.timestamp
+    return sample
+
+  async def get_comparator_state(self):
+    data = await self._call(self.sensor.get_comparator_state)
+    self._last_read = _monotonic()
+    return data
+
+  async def set_threshold(self ,crit ,upper ,lower):
+    return await self._call(self.sensor.set_threshold ,crit ,upper ,lower)
+
+  async def set_resolution(self ,resolution):
+    rslt = await self._call(self.sensor.set_resolution ,resolution)
+    if rslt == 0:
+      self._resolution = resolution
+    return rslt
+
+  async def get_resolution(self):
+    self._resolution = await self._call(self.sensor.get_resolution)
+    return self._resolution
+
+  async def sleep_mode(self):
+    return await self._call(self.sensor.sleep_mode)
+
+  async def wakeup_mode(self):
+    return await self._call(self.sensor.wakeup_mode)
+
+  async def set_power_mode(self ,mode):
+    return await self._call(self.sensor.set_power_mode ,mode)
+
+  async def set_lock_state(self ,lock):
+    return await self._call(self.sensor.set_lock_state ,lock)
+
+  async def set_alert_hysteresis(self ,mode):
+    return await self._call(self.sensor.set_alert_hysteresis ,mode)
+
+  async def set_polarity(self ,polarity):
+    return await self._call(self.sensor.set_polarity ,polarity)
+
+  async def set_alert_output_mode(self ,mode):
+    return await self._call(self.sensor.set_alert_output_mode ,mode)
+
+  async def set_alert_enable(self ,mode):
+    return await self._call(self.sensor.set_alert_enable ,mode)
+
+  async def set_alert_response_mode(self ,mode):
+    return await self._call(self.sensor.set_alert_response_mode ,mode)
+
+  async def clear_interrupt(self):
+    return await self._call(self.sensor.clear_interrupt)
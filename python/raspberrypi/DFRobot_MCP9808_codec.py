@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*
+'''!
+  @file DFRobot_MCP9808_codec.py
+  @brief Conversion between the MCP9808 register words and temps, imported and re-exported by DFRobot_MCP9808
+  @n     TEMPERATURE_REGISTER and the T_UPPER/T_LOWER/T_CRIT registers hold 13 bit two's complement words of 1/16℃,
+  @n     the threshold registers only keep whole quarter degrees
+  @copyright Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license The MIT License (MIT)
+  @author [ZhixinLiu](zhixin.liu@dfrobot.com)
+  @version V1.1
+  @date 2026-10-18
+  @url https://github.com/DFRobot/DFRobot_MCP9808
+'''
+import struct
+
+## [float table, milli-degree table], each built on first use
+_TEMPERATURE_TABLES = [None ,None]
+## translate table masking the MSB of a raw word down to the 13 bit temperature
+_MASK_13BIT = bytes(bytearray(i&0x1F for i in range(256)))
+
+def _temperature_table(milli):
+  '''!
+    @brief The 8192 entry table mapping raw 13 bit temperature words to the temp, built on the first call
+  '''
+  table = _TEMPERATURE_TABLES[milli]
+  if table is None:
+    if milli:
+      table = [(v*125+1)//2 for v in range(0x1000)] + [-((1-v*125)//2) for v in range(-0x1000 ,0)]
+    else:
+      table = [v/16.0 for v in range(0x1000)] + [v/16.0 for v in range(-0x1000 ,0)]
+    _TEMPERATURE_TABLES[milli] = table
+  return table
+
+def decode_temperature(raw ,milli=False):
+  '''!
+    @brief Convert a raw TEMPERATURE_REGISTER word to the temp, the comparator bits are ignored
+    @param raw   The raw 16 bit register word
+    @param milli False for the temp in ℃ as a floating point, True for an int in 0.001℃ rounded half away from zero
+    @return The temp value
+  '''
+  return _temperature_table(milli)[raw&0x1FFF]
+
+def decode_temperatures(data ,milli=False):
+  '''!
+    @brief Convert many raw TEMPERATURE_REGISTER words at once
+    @param data  bytes, bytearray or memoryview of big-endian 16 bit words, as read from the register
+    @param milli False for the temps in ℃ as floating points, True for ints in 0.001℃
+    @return List of the temp values
+  '''
+  data = bytearray(data)
+  if len(data)&1:
+    raise ValueError("raw temperature data must hold whole 16 bit words")
+  data[0::2] = data[0::2].translate(_MASK_13BIT)
+  table = _temperature_table(milli)
+  return list(map(table.__getitem__ ,struct.unpack(">%dH"%(len(data)>>1) ,data)))
+
+## numpy module, False when it is not installed, loaded on first use
+_np = None
+
+def _load_numpy():
+  global _np
+  if _np is None:
+    try:
+      import numpy
+      _np = numpy
+    except ImportError:
+      _np = False
+  return _np
+
+def _raw_words(data):
+  if isinstance(data ,(bytes ,bytearray ,memoryview)):
+    data = bytes(data)
+    return struct.unpack(">%dH"%(len(data)>>1) ,data)
+  return data
+
+def decode_temperature_array(data):
+  '''!
+    @brief Convert an array of raw TEMPERATURE_REGISTER words to temps and comparator bits without Python loops, NumPy is used when it is installed
+    @param data  bytes, bytearray or memoryview of big-endian 16 bit words, or an array/sequence of int words
+    @return Tuple (temperature, tcrit, tupper, tlower)
+    @n      temperature  float32 array of the temps (unit is ℃)
+    @n      tcrit        bool array, TA ≥ TCRIT
+    @n      tupper       bool array, TA > TUPPER
+    @n      tlower       bool array, TA < TLOWER
+    @n      Lists of the same values are returned when NumPy is not installed
+  '''
+  np = _load_numpy()
+  if not np:
+    if isinstance(data ,(bytes ,bytearray ,memoryview)):
+      temperature = decode_temperatures(data)
+    else:
+      temperature = [decode_temperature(w) for w in data]
+    words = _raw_words(data)
+    return (temperature ,[(w&0x8000) != 0 for w in words] ,[(w&0x4000) != 0 for w in words] ,[(w&0x2000) != 0 for w in words])
+  if isinstance(data ,(bytes ,bytearray ,memoryview)):
+    words = np.frombuffer(data ,dtype=">u2").astype(np.uint16)
+  else:
+    words = np.asarray(data ,dtype=np.uint16)
+  value = (words&0x1FFF).astype(np.int16)
+  value -= (value&0x1000)<<1
+  temperature = value.astype(np.float32)
+  temperature /= np.float32(16.0)
+  return (temperature ,(words&0x8000) != 0 ,(words&0x4000) != 0 ,(words&0x2000) != 0)
+
+## quarter degrees covered by the threshold encode table, the specified range of the sensor, -40 to +125℃
+THRESHOLD_MIN_QUARTER          = -160
+THRESHOLD_MAX_QUARTER          = 500
+
+## threshold register words of every quarter degree from THRESHOLD_MIN_QUARTER, built on first use
+_THRESHOLD_TABLE = []
+
+def _threshold_table():
+  if not _THRESHOLD_TABLE:
+    _THRESHOLD_TABLE.extend((q<<2)&0x1FFC for q in range(THRESHOLD_MIN_QUARTER ,THRESHOLD_MAX_QUARTER + 1))
+  return _THRESHOLD_TABLE
+
+def _threshold_quarter(value):
+  '''!
+    @brief Round a temp to the nearest quarter degree, half away from zero, 0.0 and -0.0 are both 0
+  '''
+  if value < 0:
+    return -int(-value*4 + 0.5)
+  return int(value*4 + 0.5)
+
+def encode_threshold(value):
+  '''!
+    @brief Convert a threshold temp to the T_UPPER/T_LOWER/T_CRIT register word, see set_threshold
+    @n     The temp is rounded to the nearest multiple of 0.25 and stored as 13 bit two's complement, like TEMPERATURE_REGISTER
+    @param value Temp, -256 to +255.75℃, -40 to +125℃ come from a precomputed table
+    @return The 16 bit register word, decode_threshold(encode_threshold(value)) is value rounded to a quarter degree
+    @exception ValueError The temp can't be held by the register
+  '''
+  q = _threshold_quarter(value)
+  if THRESHOLD_MIN_QUARTER <= q <= THRESHOLD_MAX_QUARTER:
+    return _threshold_table()[q - THRESHOLD_MIN_QUARTER]
+  if -1024 <= q <= 1023:
+    return (q<<2)&0x1FFC
+  raise ValueError("threshold %r is outside the register range -256 to +255.75" % (value ,))
+
+def encode_threshold_array(values):
+  '''!
+    @brief Convert an array of threshold temps to register words without Python loops, NumPy is used when it is installed
+    @param values Array or sequence of temps, each processed as encode_threshold does
+    @return uint16 array of the register words, a list when NumPy is not installed
+    @exception ValueError A temp can't be held by the register
+  '''
+  np = _load_numpy()
+  if not np:
+    return [encode_threshold(v) for v in values]
+  value = np.asarray(values ,dtype=np.float64)
+  q = (np.sign(value)*np.floor(np.abs(value)*4 + 0.5)).astype(np.int64)
+  if q.size and (q.min() < -1024 or q.max() > 1023):
+    raise ValueError("thresholds outside the register range -256 to +255.75")
+  return ((q<<2)&0x1FFC).astype(np.uint16)
+
+def decode_threshold(word):
+  '''!
+    @brief Convert a T_UPPER/T_LOWER/T_CRIT register word to the threshold temp
+    @param word The 16 bit register word
+    @return The temp value is a floating point (unit is ℃), a multiple of 0.25
+  '''
+  return _temperature_table(0)[word&0x1FFC]
+
+def _parsing_decimal(value):
+  return (_threshold_quarter(abs(value))&0x03)<<2
+
+def _decode_temperature(msb ,lsb):
+  '''!
+    @brief Convert the two bytes of TEMPERATURE_REGISTER to the temp, unit: ℃
+  '''
+  return _temperature_table(0)[((msb&0x1F)<<8)|lsb]
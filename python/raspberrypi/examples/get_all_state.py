@@ -35,7 +35,13 @@ tmp = DFRobot_MCP9808_I2C(I2C_BUS ,MCP9808_ADDRESS_7)
 def setup():
   while ERROR == tmp.sensor_init():
     print("sensor init error ,please check connect or device id or manufacturer id error")
+    time.sleep(1)
   print("sensor init success")
+
+  '''
+    Read every register once, all the states below are decoded from this snapshot
+  '''
+  snapshot = tmp.snapshot()
   
   '''
     Get resolution of the temperature sensor, the accuracy of the acquired temp is different in different resolution
@@ -45,7 +51,7 @@ def setup():
     RESOLUTION_0_125  The decimal part of the obtained temp is a multiple of 0.125   e.g. 0.125°C, 0.250°C, 0.375°C
     RESOLUTION_0_0625 The decimal part of the obtained temp is a multiple of 0.0625  e.g. 0.0625°C, 0.1250°C, 0.1875°C
   '''
-  resolution = tmp.get_resolution()
+  resolution = snapshot.resolution
   if resolution == RESOLUTION_0_5:
     print("resolution = 0.5 .C")
   elif resolution == RESOLUTION_0_25:
@@ -60,7 +66,7 @@ def setup():
     Wake-up mode: in this mode, the register can be accessed and the temp can be obtained normally.；
     Sleep mode: temp measurement stop and the register can be read or written, but bus activity will cause higher power consumption
   '''
-  if 0 == tmp.get_power_mode():
+  if 0 == snapshot.power_mode:
     print("sleep mode")
   else:
     print("wakeup mode")
@@ -70,7 +76,7 @@ def setup():
       COMPARATOR_OUTPUT_MODE     Comparator output mode
       INTERRPUT_OUTPUT_MODE      Interrupt output mode
   '''
-  state = tmp.get_alert_output_mode()
+  state = snapshot.alert_output_mode
   if state == COMPARATOR_OUTPUT_MODE:
     print("Comparator output mode")
   elif state == INTERRPUT_OUTPUT_MODE:
@@ -84,7 +90,7 @@ def setup():
     POLARITY_HIGH    high polarity
     POLARITY_LOW     low polarity
   '''
-  state = tmp.get_polarity_state()
+  state = snapshot.polarity
   if state == POLARITY_HIGH:
     print("Pin polarity is high")
   else:
@@ -95,7 +101,7 @@ def setup():
     UPPER_LOWER_CRIT_RESPONSE       enable upper/lower limits and threshold response
     ONLY_CRIT_RESPONSE              disable upper/lower limits response, only enable threshold response
   '''
-  state = tmp.get_alert_response_mode()
+  state = snapshot.response_mode
   if state == UPPER_LOWER_CRIT_RESPONSE:
     print("Both upper/lower and crti values respond")
   else:
@@ -111,7 +117,7 @@ def setup():
     HYSTERESIS_3_0      3.0℃ lag from hot to cold
     HYSTERESIS_6_0      6.0℃ lag from hot to cold
   '''
-  state = tmp.get_alert_hysteresis()
+  state = snapshot.hysteresis
   if state == HYSTERESIS_0_0:
     print("The temperature lag range is 0 degrees")
   elif state == HYSTERESIS_1_5:
@@ -129,7 +135,7 @@ def setup():
     CRIT_WIN_LOCK  Lock threshold value, upper and lower limit, which are not allowed to be changed
     NO_LOCK        No locking of register
   '''
-  state = tmp.get_lock_state()
+  state = snapshot.lock
   if state == CRIT_LOCK:
     print("The crit is locked")
   elif state == WIN_LOCK:
@@ -139,6 +145,8 @@ def setup():
   else:
     print("no locked")
 
+  print("crit = %.2f .C, upper = %.2f .C, lower = %.2f .C"%(snapshot.crit ,snapshot.upper ,snapshot.lower))
+
 def loop():
   time.sleep(0.1)
   exit()
@@ -35,6 +35,7 @@ tmp = DFRobot_MCP9808_I2C(I2C_BUS ,MCP9808_ADDRESS_7)
 def setup():
   while ERROR == tmp.sensor_init():
     print("sensor init error ,please check connect or device id or manufacturer id error")
+    time.sleep(1)
   print("sensor init success")
   
   '''
@@ -36,20 +36,11 @@ MCP9808_ADDRESS = MCP9808_ADDRESS_7
 tmp = DFRobot_MCP9808_I2C(I2C_BUS ,MCP9808_ADDRESS_7)
 
 RASPBERR_PIN_INT = 25              #INT interrupt connection pin, BCM25  i.e. GPIO 6
-global interrupt_state
-interrupt_state = 0
-
-'''
-  io port interrupt function, enter the function when pin 25 trigger interrupt
-  Clear the interrupt generated by temp jump
-'''
-def my_interrupt(channel):
-  global interrupt_state
-  interrupt_state = 1
 
 def setup():
   while ERROR == tmp.sensor_init():
     print("sensor init error ,please check connect or device id or manufacturer id error")
+    time.sleep(1)
   print("sensor init success")
     
   '''
@@ -148,32 +139,21 @@ def setup():
 
   tmp.clear_interrupt()     # The interrupt must be cleared once after enabling interrupt alert mode.
   
-  GPIO.setmode(GPIO.BCM)
-  '''
-    Set pin mode, configured to be input mode,
-    pull_up_down=GPIO.PUD_DOWN   when pin ALE is configured to be high polarity, pin BCM 25 is to be pull down input
-    pull_up_down=GPIO.PUD_UP     when pin ALE is configured to be low polarity, pin BCM 25 is to be pull up input
-  '''
-  GPIO.setup(RASPBERR_PIN_INT ,GPIO.IN ,pull_up_down=GPIO.PUD_UP)
-  
   '''
-    Set pin interrupt mode, select rising edge interrupt if pin ALE pin polarity is high and falling edge interrupt if it's low
-    GPIO.RISING     rising edge interrupt
-    GPIO.FALLING    falling edge interrupt
+    Let the driver handle pin ALE, the pin is configured as input with a pull up when pin ALE is active on low (pull down when active on high),
+    and the edge detection follows the polarity, falling edge when pin ALE is active on low, rising edge when active on high.
+    On every edge the driver reads the temp and status once and clears the interrupt in interrupt mode
   '''
-  GPIO.add_event_detect(RASPBERR_PIN_INT, GPIO.FALLING, callback=my_interrupt, bouncetime=500)
-  
+  tmp.enable_alert_events(RASPBERR_PIN_INT ,bouncetime=500)
+
+events = tmp.subscribe_alerts()
+
 def loop():
-  global interrupt_state
-  temperature = tmp.get_temperature()
-  print("temperature = %.2f .C"%temperature)
+  sample = events.get()              # sleep until the temperature state changes
+  print("The temperature state has changed")
+  print("temperature = %.2f .C"%sample.temperature)
+  print(sample.text)
   print("")
-  time.sleep(1)
-  
-  if interrupt_state == 1:
-    interrupt_state = 0
-    tmp.clear_interrupt()
-    print("The temperature state has changed")
 
 if __name__ == "__main__":
   setup()
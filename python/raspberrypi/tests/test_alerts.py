@@ -0,0 +1,143 @@
+# -*- coding: utf-8 -*
+'''!
+  @file test_alerts.py
+  @brief Tests of the alert events of pin ALE on SimulatedBus and SimulatedGPIO
+  @copyright Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license The MIT License (MIT)
+  @author [ZhixinLiu](zhixin.liu@dfrobot.com)
+  @version V1.1
+  @date 2026-10-18
+  @url https://github.com/DFRobot/DFRobot_MCP9808
+'''
+import os
+import sys
+import time
+import unittest
+
+sys.path.insert(0 ,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DFRobot_MCP9808 import *
+
+try:
+  import queue
+except ImportError:
+  import Queue as queue
+
+PIN = 17
+NO_FLAG = 0
+
+
+class AlertTest(unittest.TestCase):
+  output_mode = COMPARATOR_OUTPUT_MODE
+
+  def setUp(self):
+    self.now = 0.0
+    self.bus = SimulatedBus()
+    self.device = self.bus.attach(MCP9808_ADDRESS_0 ,SimulatedMCP9808(25.0 ,clock=lambda: self.now))
+    self.gpio = SimulatedGPIO()
+    self.gpio.connect(PIN ,self.device)
+    self.sensor = DFRobot_MCP9808_I2C(self.bus ,MCP9808_ADDRESS_0)
+    self.assertEqual(self.sensor.set_threshold(34.0 ,30.0 ,20.0) ,0)
+    self.sensor.set_alert_output_mode(self.output_mode)
+    self.sensor.set_alert_enable(ENABLE_ALERT)
+    self.sensor.enable_alert_events(PIN ,self.gpio ,recheck=0.005)
+    self.events = self.sensor.subscribe_alerts()
+
+  def tearDown(self):
+    self.sensor.disable_alert_events()
+
+  def step(self ,temperature):
+    self.device.temperature = temperature
+    self.now += 1.0
+    self.sensor.get_temperature()
+
+  def next_state(self):
+    return self.events.get(timeout=2.0).state
+
+  def assertNoEvent(self):
+    time.sleep(0.05)
+    self.assertTrue(self.events.empty())
+
+
+class ComparatorTest(AlertTest):
+  def test_upper_transition(self):
+    self.step(31.0)
+    self.assertEqual(self.next_state() ,TUPPER_FLAG)
+    self.assertEqual(self.gpio.input(PIN) ,0)
+    self.step(25.0)
+    self.assertEqual(self.gpio.input(PIN) ,1)
+    self.assertNoEvent()
+
+  def test_lower_transition(self):
+    self.step(15.0)
+    self.assertEqual(self.next_state() ,TLOWER_FLAG)
+    self.step(25.0)
+    self.assertEqual(self.gpio.input(PIN) ,1)
+
+  def test_crit_transition(self):
+    self.step(35.0)
+    self.assertEqual(self.next_state() ,TCRIT_FLAG|TUPPER_FLAG)
+    self.assertNoEvent()
+
+  def test_fan_out(self):
+    other = self.sensor.subscribe_alerts()
+    small = self.sensor.subscribe_alerts(maxsize=1)
+    self.step(31.0)
+    self.step(25.0)
+    self.step(15.0)
+    self.assertEqual([self.next_state() ,self.next_state()] ,[TUPPER_FLAG ,TLOWER_FLAG])
+    self.assertEqual([other.get_nowait().state ,other.get_nowait().state] ,[TUPPER_FLAG ,TLOWER_FLAG])
+    self.assertEqual(small.get_nowait().state ,TLOWER_FLAG)
+    self.assertEqual(self.sensor.alert_drops ,1)
+    self.sensor.unsubscribe_alerts(other)
+    self.step(25.0)
+    self.step(31.0)
+    self.assertEqual(self.next_state() ,TUPPER_FLAG)
+    self.assertTrue(other.empty())
+
+
+class InterruptTest(AlertTest):
+  output_mode = INTERRPUT_OUTPUT_MODE
+
+  def test_interrupt_is_cleared(self):
+    self.step(31.0)
+    self.assertEqual(self.next_state() ,TUPPER_FLAG)
+    self.assertEqual(self.gpio.input(PIN) ,1)
+    self.step(25.0)
+    self.assertEqual(self.next_state() ,NO_FLAG)
+    self.assertEqual(self.gpio.input(PIN) ,1)
+
+  def test_events_continue_after_crit(self):
+    self.step(35.0)
+    self.assertEqual(self.next_state() ,TCRIT_FLAG|TUPPER_FLAG)
+    self.assertEqual(self.gpio.input(PIN) ,0)              # TA >= TCRIT keeps pin ALE asserted
+    self.assertNoEvent()
+    self.step(10.0)
+    self.assertEqual(self.next_state() ,TLOWER_FLAG)
+    self.step(25.0)
+    self.assertEqual(self.next_state() ,NO_FLAG)
+    self.step(40.0)
+    self.assertEqual(self.next_state() ,TCRIT_FLAG|TUPPER_FLAG)
+
+  def test_bus_error_in_the_callback(self):
+    armed = [True]
+    def fail_next_read(level):
+      if armed[0]:
+        armed[0] = False
+        self.bus.inject_faults(DEFAULT_RETRY_POLICY.retries + 1)
+    self.device.alert_listeners.insert(0 ,fail_next_read)
+    self.step(31.0)
+    self.assertEqual(self.next_state() ,TUPPER_FLAG)
+    self.assertEqual(self.sensor.alert_errors ,1)
+    deadline = time.time() + 2.0
+    while self.gpio.input(PIN) != 1 and time.time() < deadline:
+      time.sleep(0.005)
+    self.assertEqual(self.gpio.input(PIN) ,1)
+    self.step(15.0)
+    self.assertEqual(self.next_state() ,TLOWER_FLAG)
+
+
+del AlertTest
+
+if __name__ == "__main__":
+  unittest.main()
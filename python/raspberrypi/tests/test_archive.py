@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*
+'''!
+  @file test_archive.py
+  @brief Tests of the compressed archive, exact round trip of the raw words and recovery of an archive cut off by a crash
+  @copyright Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license The MIT License (MIT)
+  @author [ZhixinLiu](zhixin.liu@dfrobot.com)
+  @version V1.1
+  @date 2026-10-18
+  @url https://github.com/DFRobot/DFRobot_MCP9808
+'''
+import io
+import os
+import sys
+import random
+import unittest
+
+sys.path.insert(0 ,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DFRobot_MCP9808 import *
+
+
+def _series(count ,seed=1):
+  '''!
+    @brief (tick, raw word) pairs with runs, steps, jittered intervals, comparator bits and 16 bit wrap-around
+  '''
+  rng = random.Random(seed)
+  tick = 1000
+  raw = 0x0190
+  series = []
+  for i in range(count):
+    mode = (i//50)%4
+    if mode == 1:
+      raw = (raw + rng.choice((-1 ,0 ,1)))&0xFFFF
+      tick += 250 + rng.randint(-3 ,3)
+    elif mode == 2:
+      raw = rng.randint(0 ,0xFFFF)
+      tick += rng.randint(1 ,5000)
+    else:
+      tick += 250
+    series.append((tick ,raw))
+  series.append((tick + 250 ,0xFFFF))
+  series.append((tick + 500 ,0x0000))
+  return series
+
+
+class ArchiveTest(unittest.TestCase):
+  def write(self ,series ,block=64):
+    f = io.BytesIO()
+    compressor = MCP9808Compressor(f ,block=block ,tick=0.001)
+    for tick ,raw in series:
+      compressor.append(raw ,tick/1000.0)
+    compressor.flush()
+    blocks_end = len(f.getvalue())
+    compressor.close()
+    return f.getvalue() ,blocks_end ,compressor.index
+
+  def read(self ,data):
+    return MCP9808Decompressor(io.BytesIO(data))
+
+  def ticks(self ,reader):
+    return [(int(round(t*1000)) ,raw) for t ,raw in reader.raw()]
+
+  def test_round_trip(self):
+    series = _series(1000)
+    data ,_ ,index = self.write(series)
+    reader = self.read(data)
+    self.assertEqual(len(reader) ,len(series))
+    self.assertEqual(len(reader.index) ,len(index))
+    self.assertEqual(self.ticks(reader) ,series)
+    self.assertEqual([s.raw for s in reader.samples()] ,[raw for _ ,raw in series])
+
+  def test_seek(self):
+    series = _series(1000)
+    reader = self.read(self.write(series)[0])
+    begin ,end = series[300][0]/1000.0 ,series[700][0]/1000.0
+    self.assertEqual([(int(round(t*1000)) ,raw) for t ,raw in reader.raw(begin ,end)] ,series[300:700])
+
+  def test_empty_archive(self):
+    reader = self.read(self.write([])[0])
+    self.assertEqual((len(reader) ,list(reader)) ,(0 ,[]))
+
+  def test_truncated_index_or_footer(self):
+    series = _series(500)
+    data ,blocks_end ,_ = self.write(series)
+    for size in range(blocks_end ,len(data)):              # close() interrupted while writing the index or the footer
+      reader = self.read(data[:size])
+      self.assertEqual(len(reader) ,len(series) ,size)
+      self.assertEqual(self.ticks(reader) ,series ,size)
+
+  def test_truncated_block(self):
+    series = _series(500)
+    data ,blocks_end ,index = self.write(series ,block=50)
+    offsets = [entry.offset for entry in index] + [blocks_end]
+    for size in range(offsets[0] ,blocks_end ,7):          # crash while a block was written, the complete blocks survive
+      complete = max(i for i ,offset in enumerate(offsets) if offset <= size)
+      reader = self.read(data[:size])
+      self.assertEqual(len(reader.index) ,complete ,size)
+      self.assertEqual(self.ticks(reader) ,series[:complete*50] ,size)
+
+  def test_garbage_after_the_blocks(self):
+    series = _series(120)
+    data ,blocks_end ,_ = self.write(series)
+    rng = random.Random(2)
+    for _ in range(200):
+      tail = bytes(bytearray(rng.randint(0 ,255) for _ in range(rng.randint(1 ,40))))
+      self.assertEqual(self.ticks(self.read(data[:blocks_end] + tail))[:len(series)] ,series)
+
+
+if __name__ == "__main__":
+  unittest.main()
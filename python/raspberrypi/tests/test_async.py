@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*
+'''!
+  @file test_async.py
+  @brief Tests of the asyncio interface, the bus locks across event loops and the error counters
+  @copyright Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license The MIT License (MIT)
+  @author [ZhixinLiu](zhixin.liu@dfrobot.com)
+  @version V1.1
+  @date 2026-10-18
+  @url https://github.com/DFRobot/DFRobot_MCP9808
+'''
+import asyncio
+import gc
+import os
+import sys
+import unittest
+
+sys.path.insert(0 ,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DFRobot_MCP9808 import *
+import DFRobot_MCP9808_async
+from DFRobot_MCP9808_async import AsyncMCP9808
+
+
+def _run(coroutine):
+  loop = asyncio.new_event_loop()
+  try:
+    return loop.run_until_complete(coroutine)
+  finally:
+    loop.close()
+
+
+class LockTest(unittest.TestCase):
+  def setUp(self):
+    self.bus = SimulatedBus()
+    self.bus.attach(MCP9808_ADDRESS_0).temperature = 25.0
+    self.bus.attach(MCP9808_ADDRESS_1).temperature = 30.0
+
+  def test_sensors_on_a_bus_share_the_lock_per_loop(self):
+    first = AsyncMCP9808(self.bus ,MCP9808_ADDRESS_0)
+    second = AsyncMCP9808(self.bus ,MCP9808_ADDRESS_1)
+    async def locks():
+      loop = asyncio.get_event_loop()
+      return (DFRobot_MCP9808_async._loop_lock(first.sensor.bus_lock ,loop) ,
+              DFRobot_MCP9808_async._loop_lock(second.sensor.bus_lock ,loop))
+    a ,b = _run(locks())
+    c ,d = _run(locks())
+    self.assertIs(a ,b)
+    self.assertIs(c ,d)
+    self.assertIsNot(a ,c)
+
+  def test_sensor_runs_under_successive_loops(self):
+    sensor = AsyncMCP9808(self.bus ,MCP9808_ADDRESS_0)
+    async def read():
+      return await asyncio.gather(sensor.get_temperature() ,sensor.get_temperature())
+    self.assertEqual(_run(read()) ,[25.0 ,25.0])
+    self.assertEqual(_run(read()) ,[25.0 ,25.0])
+
+  def test_registry_releases_unused_buses(self):
+    gc.collect()
+    before = len(DFRobot_MCP9808_async._BUS_LOCKS)
+    _run(AsyncMCP9808(SimulatedBus({MCP9808_ADDRESS_0: SimulatedMCP9808()}) ,MCP9808_ADDRESS_0).get_temperature())
+    gc.collect()
+    self.assertEqual(len(DFRobot_MCP9808_async._BUS_LOCKS) ,before)
+
+
+class RetryTest(unittest.TestCase):
+  def setUp(self):
+    self.bus = SimulatedBus()
+    self.bus.attach(MCP9808_ADDRESS_0).temperature = 25.0
+
+  def test_recovered_call_is_not_a_failure(self):
+    sensor = AsyncMCP9808(self.bus ,MCP9808_ADDRESS_0 ,policy=RetryPolicy(retries=2 ,backoff=0.0 ,jitter=0.0 ,deadline=None))
+    self.bus.inject_faults(2)
+    self.assertEqual(_run(sensor.get_temperature()) ,25.0)
+    self.assertEqual(sensor.sensor.get_error_stats() ,{"errors": 2 ,"retries": 2 ,"failures": 0})
+
+  def test_failed_call_counts_once(self):
+    sensor = AsyncMCP9808(self.bus ,MCP9808_ADDRESS_0 ,policy=RetryPolicy(retries=2 ,backoff=0.0 ,jitter=0.0 ,deadline=None))
+    self.bus.inject_faults(3)
+    with self.assertRaises(MCP9808BusError) as raised:
+      _run(sensor.get_temperature())
+    self.assertEqual(raised.exception.attempts ,3)
+    self.assertEqual(sensor.sensor.get_error_stats() ,{"errors": 3 ,"retries": 2 ,"failures": 1})
+
+
+if __name__ == "__main__":
+  unittest.main()
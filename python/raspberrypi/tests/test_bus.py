@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*
+'''!
+  @file test_bus.py
+  @brief Tests of MCP9808Bus, discover(), the breakers of the addresses, poll() and close()
+  @copyright Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license The MIT License (MIT)
+  @author [ZhixinLiu](zhixin.liu@dfrobot.com)
+  @version V1.1
+  @date 2026-10-18
+  @url https://github.com/DFRobot/DFRobot_MCP9808
+'''
+import os
+import gc
+import sys
+import unittest
+
+sys.path.insert(0 ,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import DFRobot_MCP9808 as driver
+from DFRobot_MCP9808 import *
+
+A ,B ,C = MCP9808_ADDRESS_0 ,MCP9808_ADDRESS_1 ,MCP9808_ADDRESS_2
+
+
+class BusTest(unittest.TestCase):
+  def setUp(self):
+    self.now = 100.0
+    self.saved = driver._monotonic
+    driver._monotonic = lambda: self.now
+    self.sim = SimulatedBus()
+    self.devices = {}
+    for addr in (A ,B):
+      self.devices[addr] = self.sim.attach(addr ,SimulatedMCP9808(25.0 ,clock=lambda: self.now))
+    self.profile = MCP9808Config(resolution=RESOLUTION_0_125)
+    self.bus = MCP9808Bus(self.sim ,(A ,B ,C) ,self.profile ,threshold=3 ,cooldown=1.0 ,max_cooldown=4.0)
+
+  def tearDown(self):
+    driver._monotonic = self.saved
+
+  def sweep(self ,count=1):
+    for _ in range(count):
+      self.now += 0.2
+      raw = list(self.bus.read_raw())
+    return raw
+
+  def test_discover(self):
+    self.assertEqual(self.bus.discover() ,(A ,B))
+    self.assertEqual(sorted(self.bus.sensors) ,[A ,B])
+    self.assertEqual(self.bus.healthy ,(A ,B))
+    self.assertEqual(self.bus.breakers[A].state ,BREAKER_CLOSED)
+    self.assertEqual(self.bus.breakers[C].state ,BREAKER_OPEN)
+    self.assertEqual(self.bus.breakers[C].retry_at ,101.0)
+    self.assertEqual(self.devices[A].resolution ,RESOLUTION_0_125)
+    self.assertEqual(self.devices[B].resolution ,RESOLUTION_0_125)
+
+  def test_discover_checks_the_ids(self):
+    self.sim.attach(C ,SimulatedMCP9808())
+    self.sim.devices[C].read_register = lambda reg ,length: [0x00 ,0x00]
+    self.assertEqual(self.bus.discover() ,(A ,B))
+    self.assertNotIn(C ,self.bus.sensors)
+
+  def test_breaker_opens_after_threshold_failures(self):
+    self.bus.discover()
+    self.devices[B].present = False
+    raw = self.sweep(2)
+    self.assertEqual(raw[1] ,-1)
+    self.assertEqual(self.bus.breakers[B].state ,BREAKER_CLOSED)
+    self.assertEqual(self.bus.breakers[B].failures ,2)
+    self.sweep()
+    breaker = self.bus.breakers[B]
+    self.assertEqual((breaker.state ,breaker.trips) ,(BREAKER_OPEN ,1))
+    self.assertEqual(self.bus.present ,(A ,B))
+    self.assertEqual(self.bus.healthy ,(A ,))
+    self.sim.reset_counters()
+    raw = self.sweep()
+    self.assertEqual(self.sim.transactions ,1)             # the open address is skipped
+    self.assertEqual(raw[1] ,-1)
+    self.assertEqual(raw[0]&0x1FFF ,25*16)
+
+  def test_a_success_resets_the_failures(self):
+    self.bus.discover()
+    self.devices[B].present = False
+    self.sweep(2)
+    self.devices[B].present = True
+    self.sweep()
+    self.assertEqual(self.bus.breakers[B].failures ,0)
+    self.devices[B].present = False
+    self.sweep(2)
+    self.assertEqual(self.bus.breakers[B].state ,BREAKER_CLOSED)
+
+  def test_half_open_probe_failure_doubles_the_cooldown(self):
+    self.bus.discover()
+    breaker = self.bus.breakers[C]
+    self.now = 100.5
+    self.assertEqual(self.bus.poll() ,())
+    self.assertEqual(breaker.failures ,0)                  # still cooling down, not probed
+    self.now = 101.0
+    self.assertEqual(self.bus.poll() ,())
+    self.assertEqual((breaker.state ,breaker.cooldown ,breaker.retry_at) ,(BREAKER_OPEN ,2.0 ,103.0))
+    self.now = 103.0
+    self.bus.poll()
+    self.now = 107.0
+    self.bus.poll()
+    self.assertEqual((breaker.cooldown ,breaker.retry_at) ,(4.0 ,111.0))
+
+  def test_poll_reattaches_a_sensor(self):
+    self.bus.discover()
+    self.devices[B].present = False
+    self.sweep(3)
+    self.devices[B].power_cycle()
+    self.devices[B].present = True
+    self.assertNotEqual(self.devices[B].resolution ,RESOLUTION_0_125)
+    self.now += 1.0
+    self.assertEqual(self.bus.poll() ,(B ,))
+    breaker = self.bus.breakers[B]
+    self.assertEqual((breaker.state ,breaker.failures ,breaker.cooldown) ,(BREAKER_CLOSED ,0 ,1.0))
+    self.assertEqual(self.bus.healthy ,(A ,B))
+    self.assertEqual(self.devices[B].resolution ,RESOLUTION_0_125)
+    self.assertEqual(self.sweep()[1]&0x1FFF ,25*16)
+
+  def test_poll_attaches_a_new_sensor(self):
+    self.bus.discover()
+    self.sim.attach(C ,SimulatedMCP9808(30.0 ,clock=lambda: self.now))
+    self.now += 1.0
+    self.assertEqual(self.bus.poll() ,(C ,))
+    self.assertEqual(self.bus.present ,(A ,B ,C))
+    self.assertEqual(self.sweep()[2]&0x1FFF ,30*16)
+
+
+class FakeSMBus(object):
+  def __init__(self ,sim):
+    self.sim = sim
+    self.closed = False
+
+  def read_i2c_block_data(self ,addr ,reg ,length):
+    return self.sim.read_i2c_block_data(addr ,reg ,length)
+
+  def close(self):
+    self.closed = True
+
+
+class CloseTest(unittest.TestCase):
+  def test_close_keeps_the_shared_backend_open(self):
+    sim = SimulatedBus()
+    sim.attach(A)
+    backend = SMBusBackend.shared(97)
+    handle = backend._smbus = FakeSMBus(sim)
+    bus = MCP9808Bus(97 ,(A ,))
+    sensor = DFRobot_MCP9808_I2C(97 ,A)
+    self.assertIs(bus.i2cbus ,backend)
+    self.assertEqual(bus.discover() ,(A ,))
+    bus.close()
+    self.assertFalse(handle.closed)
+    self.assertEqual(sensor.get_device_id() ,DEVICE_ID)
+    self.assertEqual(bus.present ,())
+    del backend ,bus ,sensor
+    gc.collect()
+    self.assertTrue(handle.closed)                          # the last user is gone
+
+  def test_close_leaves_a_backend_object_alone(self):
+    sim = SimulatedBus()
+    sim.attach(A)
+    sim.close = lambda: self.fail("closed a backend owned by the caller")
+    bus = MCP9808Bus(sim ,(A ,))
+    bus.discover()
+    bus.close()
+    self.assertEqual(DFRobot_MCP9808_I2C(sim ,A).get_device_id() ,DEVICE_ID)
+
+
+if __name__ == "__main__":
+  unittest.main()
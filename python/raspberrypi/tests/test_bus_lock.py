@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*
+'''!
+  @file test_bus_lock.py
+  @brief Concurrency tests of the shared bus lock, run with python -m pytest tests
+  @copyright Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license The MIT License (MIT)
+  @author [ZhixinLiu](zhixin.liu@dfrobot.com)
+  @version V1.1
+  @date 2026-10-18
+  @url https://github.com/DFRobot/DFRobot_MCP9808
+'''
+import gc
+import os
+import sys
+import threading
+import unittest
+
+sys.path.insert(0 ,os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+from DFRobot_MCP9808 import *
+
+
+class ReadModifyWriteTest(unittest.TestCase):
+  ROUNDS = 20
+
+  def sensor(self):
+    bus = SimulatedBus(latency=0.0002)
+    bus.attach(MCP9808_ADDRESS_0)
+    return DFRobot_MCP9808_I2C(bus ,MCP9808_ADDRESS_0)
+
+  def run_concurrently(self ,*calls):
+    start = threading.Barrier(len(calls)) if hasattr(threading ,"Barrier") else None
+    def run(call):
+      if start is not None:
+        start.wait()
+      call()
+    threads = [threading.Thread(target=run ,args=(call ,)) for call in calls]
+    for thread in threads:
+      thread.start()
+    for thread in threads:
+      thread.join()
+
+  def test_polarity_and_lock_state(self):
+    for _ in range(self.ROUNDS):
+      sensor = self.sensor()
+      self.run_concurrently(lambda: sensor.set_polarity(POLARITY_HIGH) ,lambda: sensor.set_lock_state(NO_LOCK))
+      self.assertEqual(sensor.get_polarity_state() ,POLARITY_HIGH)
+
+  def test_polarity_and_hysteresis(self):
+    for _ in range(self.ROUNDS):
+      sensor = self.sensor()
+      self.run_concurrently(lambda: sensor.set_polarity(POLARITY_HIGH) ,lambda: sensor.set_alert_hysteresis(HYSTERESIS_3_0) ,
+                            sensor.clear_interrupt)
+      self.assertEqual(sensor.get_polarity_state() ,POLARITY_HIGH)
+      self.assertEqual(sensor.get_alert_hysteresis() ,HYSTERESIS_3_0)
+
+
+class PriorityTest(unittest.TestCase):
+  def test_alert_served_before_bulk(self):
+    lock = MCP9808BusLock()
+    order = []
+    waiting = threading.Event()
+    def take(priority ,name):
+      with lock.hold(priority):
+        order.append(name)
+    lock.acquire()
+    threads = []
+    for priority ,name in ((PRIORITY_BULK ,"bulk") ,(PRIORITY_NORMAL ,"normal") ,(PRIORITY_ALERT ,"alert")):
+      thread = threading.Thread(target=take ,args=(priority ,name))
+      thread.start()
+      threads.append(thread)
+      while len(lock._waiters) < len(threads):
+        waiting.wait(0.001)
+    lock.release()
+    for thread in threads:
+      thread.join()
+    self.assertEqual(order ,["alert" ,"normal" ,"bulk"])
+    self.assertEqual(lock.get_stats()["contended"] ,3)
+
+
+class RegistryTest(unittest.TestCase):
+  def test_bus_number_shares_backend_and_lock(self):
+    first = DFRobot_MCP9808_I2C(1 ,MCP9808_ADDRESS_0)
+    second = DFRobot_MCP9808_I2C(1 ,MCP9808_ADDRESS_1)
+    other = DFRobot_MCP9808_I2C(2 ,MCP9808_ADDRESS_0)
+    self.assertIs(first.i2cbus ,second.i2cbus)
+    self.assertIs(first.bus_lock ,second.bus_lock)
+    self.assertIsNot(first.bus_lock ,other.bus_lock)
+    self.assertIs(MCP9808BusLock.for_bus(I2CDevBackend(1)) ,first.bus_lock)
+
+  def test_registry_releases_unused_buses(self):
+    import DFRobot_MCP9808
+    gc.collect()
+    before = (len(DFRobot_MCP9808._BUS_LOCKS) ,len(DFRobot_MCP9808._SMBUS_BACKENDS))
+    for _ in range(5):
+      bus = SimulatedBus()
+      bus.attach(MCP9808_ADDRESS_0)
+      MCP9808Rollout(MCP9808Config(polarity=POLARITY_HIGH) ,[(bus ,MCP9808_ADDRESS_0)]).run()
+      DFRobot_MCP9808_I2C(4 ,MCP9808_ADDRESS_0)
+    bus = None
+    gc.collect()
+    self.assertEqual((len(DFRobot_MCP9808._BUS_LOCKS) ,len(DFRobot_MCP9808._SMBUS_BACKENDS)) ,before)
+
+
+if __name__ == "__main__":
+  unittest.main()
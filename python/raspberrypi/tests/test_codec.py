@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*
+'''!
+  @file test_codec.py
+  @brief Round trip of the temperature and threshold codec through the simulated MCP9808, -256 to +255.75℃
+  @copyright Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license The MIT License (MIT)
+  @author [ZhixinLiu](zhixin.liu@dfrobot.com)
+  @version V1.1
+  @date 2026-10-18
+  @url https://github.com/DFRobot/DFRobot_MCP9808
+'''
+import os
+import sys
+import unittest
+
+sys.path.insert(0 ,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import DFRobot_MCP9808_codec
+from DFRobot_MCP9808 import *
+
+## every quarter degree the threshold registers hold
+QUARTERS = [q/4.0 for q in range(-1024 ,1024)]
+## every sixteenth of a degree TEMPERATURE_REGISTER holds
+SIXTEENTHS = [v/16.0 for v in range(-4096 ,4096)]
+
+
+class Clock(object):
+  def __init__(self):
+    self.now = 0.0
+
+  def __call__(self):
+    return self.now
+
+
+class SimulatedTest(unittest.TestCase):
+  def setUp(self):
+    self.clock = Clock()
+    self.bus = SimulatedBus()
+    self.device = self.bus.attach(MCP9808_ADDRESS_0)
+    self.device.clock = self.clock
+    self.sensor = DFRobot_MCP9808_I2C(self.bus ,MCP9808_ADDRESS_0)
+
+  def convert(self ,temperature):
+    self.device.temperature = temperature
+    self.clock.now += 1.0
+    return self.sensor.read_sample()
+
+  def word(self ,reg):
+    data = self.sensor.read_reg(reg ,2)
+    return (data[0]<<8) | data[1]
+
+
+class TemperatureTest(SimulatedTest):
+  def test_decode_every_word(self):
+    words = []
+    for temperature in SIXTEENTHS:
+      sample = self.convert(temperature)
+      self.assertEqual(sample.temperature ,temperature)
+      self.assertEqual(decode_temperature(sample.raw) ,temperature)
+      self.assertEqual(decode_temperature(sample.raw ,milli=True) ,int(temperature*1000 + (0.5 if temperature >= 0 else -0.5)))
+      words.append(sample.raw)
+    data = bytearray()
+    for word in words:
+      data += bytearray((word>>8 ,word&0xFF))
+    self.assertEqual(decode_temperatures(data) ,SIXTEENTHS)
+    self.assertEqual([float(t) for t in decode_temperature_array(data)[0]] ,SIXTEENTHS)
+    self.assertEqual([float(t) for t in decode_temperature_array(words)[0]] ,SIXTEENTHS)
+
+  def test_comparator_bits_are_ignored(self):
+    for state in range(8):
+      self.assertEqual(decode_temperature((state<<13) | 0x1FF0) ,-1.0)
+
+
+class ThresholdTest(SimulatedTest):
+  def check_registers(self ,crit ,upper ,lower):
+    self.assertEqual(self.word(T_CRIT_REGISTER) ,encode_threshold(crit))
+    self.assertEqual(decode_threshold(self.word(T_CRIT_REGISTER)) ,crit)
+    self.assertEqual(decode_threshold(self.word(T_UPPER_REGISTER)) ,upper)
+    self.assertEqual(decode_threshold(self.word(T_LOWER_REGISTER)) ,lower)
+
+  def test_set_threshold_every_quarter(self):
+    for lower in QUARTERS:
+      if lower + 2.25 > 255.75:
+        break
+      self.assertEqual(self.sensor.set_threshold(lower + 2.25 ,lower + 2.0 ,lower) ,0)
+      self.check_registers(lower + 2.25 ,lower + 2.0 ,lower)
+    for crit in QUARTERS[-10:]:
+      self.assertEqual(self.sensor.set_threshold(crit ,crit - 0.25 ,crit - 2.25) ,0)
+      self.check_registers(crit ,crit - 0.25 ,crit - 2.25)
+
+  def test_out_of_range_writes_nothing(self):
+    self.assertEqual(self.sensor.set_threshold(34.0 ,30.0 ,20.0) ,0)
+    for crit ,upper ,lower in ((300.0 ,30.0 ,20.0) ,(34.0 ,256.0 ,20.0) ,(34.0 ,30.0 ,-300.0) ,(None ,30.0 ,20.0)):
+      self.bus.reset_counters()
+      self.assertEqual(self.sensor.set_threshold(crit ,upper ,lower) ,0xFE)
+      self.assertEqual((self.bus.transactions ,self.bus.bytes_written) ,(0 ,0))
+    self.check_registers(34.0 ,30.0 ,20.0)
+
+  def test_comparator_at_every_quarter(self):
+    for upper in QUARTERS:
+      self.sensor.write_reg(T_UPPER_REGISTER ,[encode_threshold(upper)>>8 ,encode_threshold(upper)&0xFF])
+      self.assertFalse(self.convert(upper).state&TUPPER_FLAG)
+      if upper < 255.75:
+        self.assertTrue(self.convert(upper + 1/16.0).state&TUPPER_FLAG)
+
+  def test_rounding(self):
+    self.assertEqual(decode_threshold(encode_threshold(8.01)) ,8.0)
+    self.assertEqual(decode_threshold(encode_threshold(8.02)) ,8.0)
+    self.assertEqual(decode_threshold(encode_threshold(8.125)) ,8.25)
+    self.assertEqual(decode_threshold(encode_threshold(-8.125)) ,-8.25)
+    self.assertEqual(encode_threshold(-0.0) ,encode_threshold(0.0))
+    self.assertRaises(ValueError ,encode_threshold ,256.0)
+    self.assertRaises(ValueError ,encode_threshold ,-256.25)
+
+  def test_array_encoder_matches(self):
+    values = QUARTERS + [v + 0.1 for v in QUARTERS[:-1]] + [v + 0.125 for v in QUARTERS[:-1]]
+    self.assertEqual([int(w) for w in encode_threshold_array(values)] ,[encode_threshold(v) for v in values])
+
+
+class ExportTest(unittest.TestCase):
+  def test_driver_reexports_the_codec(self):
+    import DFRobot_MCP9808
+    for name in ("decode_temperature" ,"decode_temperatures" ,"decode_temperature_array" ,"encode_threshold" ,
+                 "encode_threshold_array" ,"decode_threshold"):
+      self.assertIs(getattr(DFRobot_MCP9808 ,name) ,getattr(DFRobot_MCP9808_codec ,name))
+
+
+if __name__ == "__main__":
+  unittest.main()
@@ -0,0 +1,70 @@
+# -*- coding: utf-8 -*
+'''!
+  @file test_config.py
+  @brief Tests of the configuration profiles applied with DFRobot_MCP9808.apply()
+  @copyright Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license The MIT License (MIT)
+  @author [ZhixinLiu](zhixin.liu@dfrobot.com)
+  @version V1.1
+  @date 2026-10-18
+  @url https://github.com/DFRobot/DFRobot_MCP9808
+'''
+import os
+import sys
+import unittest
+
+sys.path.insert(0 ,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DFRobot_MCP9808 import *
+
+
+class LockTest(unittest.TestCase):
+  def setUp(self):
+    self.bus = SimulatedBus()
+    self.device = self.bus.attach(MCP9808_ADDRESS_0)
+    self.sensor = DFRobot_MCP9808_I2C(self.bus ,MCP9808_ADDRESS_0)
+
+  def test_no_lock_on_unlocked_sensor(self):
+    self.assertEqual(self.sensor.apply(MCP9808Config(lock=NO_LOCK)) ,0)
+    self.assertEqual(self.sensor.get_lock_state() ,NO_LOCK)
+
+  def test_no_lock_on_locked_sensor_fails(self):
+    self.assertEqual(self.sensor.apply(MCP9808Config(lock=CRIT_LOCK)) ,0)
+    self.assertEqual(self.sensor.apply(MCP9808Config(lock=NO_LOCK)) ,-1)
+    self.assertEqual(self.sensor.get_lock_state() ,CRIT_LOCK)
+
+  def test_lock_is_kept_by_a_profile_without_lock(self):
+    self.assertEqual(self.sensor.apply(MCP9808Config(lock=WIN_LOCK)) ,0)
+    self.assertEqual(self.sensor.apply(MCP9808Config(resolution=RESOLUTION_0_25)) ,0)
+    self.assertEqual(self.sensor.get_lock_state() ,WIN_LOCK)
+
+
+class CheckTest(unittest.TestCase):
+  def test_valid_thresholds(self):
+    self.assertEqual(MCP9808Config(thresholds=(34.0 ,30.0 ,20.0)).check() ,0)
+    self.assertEqual(MCP9808Config(thresholds=(255.75 ,-254.0 ,-256.0)).check() ,0)
+
+  def test_threshold_rules(self):
+    self.assertEqual(MCP9808Config(thresholds=(30.0 ,30.0 ,20.0)).check() ,-3)
+    self.assertEqual(MCP9808Config(thresholds=(34.0 ,30.0 ,29.0)).check() ,-2)
+
+  def test_thresholds_outside_the_register_range(self):
+    self.assertEqual(MCP9808Config(thresholds=(300.0 ,100.0 ,50.0)).check() ,0xFE)
+    self.assertEqual(MCP9808Config(thresholds=(34.0 ,30.0 ,-257.0)).check() ,0xFE)
+
+  def test_malformed_thresholds(self):
+    self.assertEqual(MCP9808Config(thresholds=(34.0 ,30.0)).check() ,0xFE)
+    self.assertEqual(MCP9808Config(thresholds=30.0).check() ,0xFE)
+    self.assertEqual(MCP9808Config(thresholds=(34.0 ,"30" ,20.0)).check() ,0xFE)
+
+  def test_apply_rejects_before_any_transaction(self):
+    bus = SimulatedBus()
+    bus.attach(MCP9808_ADDRESS_0)
+    sensor = DFRobot_MCP9808_I2C(bus ,MCP9808_ADDRESS_0)
+    bus.reset_counters()
+    self.assertEqual(sensor.apply(MCP9808Config(thresholds=(300.0 ,100.0 ,50.0))) ,0xFE)
+    self.assertEqual(bus.transactions ,0)
+
+
+if __name__ == "__main__":
+  unittest.main()
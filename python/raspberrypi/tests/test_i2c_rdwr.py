@@ -0,0 +1,88 @@
+# -*- coding: utf-8 -*
+'''!
+  @file test_i2c_rdwr.py
+  @brief Tests of the combined I2C_RDWR reads of I2CDevBackend on the fake ioctl layer of SimulatedBus
+  @copyright Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license The MIT License (MIT)
+  @author [ZhixinLiu](zhixin.liu@dfrobot.com)
+  @version V1.1
+  @date 2026-10-18
+  @url https://github.com/DFRobot/DFRobot_MCP9808
+'''
+import os
+import sys
+import unittest
+from array import array
+
+sys.path.insert(0 ,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DFRobot_MCP9808 import *
+
+
+class ReadWordsTest(unittest.TestCase):
+  def setUp(self):
+    self.sim = SimulatedBus()
+    self.backend = I2CDevBackend(1 ,ioctl=self.sim.ioctl ,fd=-1)
+    self.now = 0.0
+
+  def attach(self ,addrs):
+    for i ,addr in enumerate(addrs):
+      self.sim.attach(addr ,SimulatedMCP9808(20.0 + i ,clock=lambda: self.now))
+    return tuple(addrs)
+
+  def read(self ,addrs):
+    out = array('i' ,[0])*len(addrs)
+    self.sim.reset_counters()
+    self.backend.read_words(addrs ,TEMPERATURE_REGISTER ,out)
+    return [decode_temperature(w) if w >= 0 else None for w in out]
+
+  def test_one_transfer_for_all_devices(self):
+    addrs = self.attach(MCP9808_ADDRESSES)
+    self.assertEqual(self.read(addrs) ,[20.0 + i for i in range(len(addrs))])
+    self.assertEqual(self.sim.ioctls ,1)
+    self.assertEqual(self.sim.transactions ,2*len(addrs))
+
+  def test_prepared_messages_are_reused(self):
+    addrs = self.attach(MCP9808_ADDRESSES[:3])
+    self.read(addrs)
+    self.sim.devices[addrs[1]].temperature = -5.5
+    self.now += 1.0
+    self.assertEqual(self.read(addrs) ,[20.0 ,-5.5 ,22.0])
+    self.assertEqual(len(self.backend._batches) ,1)
+    self.assertEqual(self.sim.ioctls ,1)
+
+  def test_transfers_are_split_at_the_message_limit(self):
+    addrs = self.attach(range(0x20 ,0x20 + I2C_RDWR_MAX_MSGS//2 + 4))
+    self.assertEqual(self.read(addrs) ,[20.0 + i for i in range(len(addrs))])
+    self.assertEqual(self.sim.ioctls ,2)
+
+  def test_missing_device_falls_back_to_single_reads(self):
+    addrs = self.attach(MCP9808_ADDRESSES[:4])
+    self.sim.detach(addrs[2])
+    self.assertEqual(self.read(addrs) ,[20.0 ,21.0 ,None ,23.0])
+    self.assertEqual(self.sim.ioctls ,1 + len(addrs))
+
+  def test_failed_chunk_leaves_the_other_chunk_batched(self):
+    addrs = self.attach(range(0x20 ,0x20 + I2C_RDWR_MAX_MSGS//2 + 2))
+    self.sim.devices[addrs[-1]].present = False
+    rslt = self.read(addrs)
+    self.assertEqual(rslt[:-1] ,[20.0 + i for i in range(len(addrs) - 1)])
+    self.assertIsNone(rslt[-1])
+    self.assertEqual(self.sim.ioctls ,1 + 1 + 2)
+
+
+class SweepTest(unittest.TestCase):
+  def test_sweep_costs_one_ioctl(self):
+    sim = SimulatedBus()
+    for i ,addr in enumerate(MCP9808_ADDRESSES[:5]):
+      sim.attach(addr).temperature = 30.0 + i
+    bus = MCP9808Bus(I2CDevBackend(1 ,ioctl=sim.ioctl ,fd=-1))
+    self.assertEqual(bus.discover() ,MCP9808_ADDRESSES[:5])
+    sim.reset_counters()
+    sweep = bus.read_all()
+    self.assertEqual([temperature for _ ,temperature in sweep] ,[30.0 ,31.0 ,32.0 ,33.0 ,34.0])
+    self.assertEqual((sim.ioctls ,sim.transactions) ,(1 ,10))
+
+
+if __name__ == "__main__":
+  unittest.main()
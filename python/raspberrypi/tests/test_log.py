@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*
+'''!
+  @file test_log.py
+  @brief Tests of the binary sample log and its memory-mapped reader
+  @copyright Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license The MIT License (MIT)
+  @author [ZhixinLiu](zhixin.liu@dfrobot.com)
+  @version V1.1
+  @date 2026-10-18
+  @url https://github.com/DFRobot/DFRobot_MCP9808
+'''
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0 ,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DFRobot_MCP9808 import *
+
+try:
+  import numpy
+except ImportError:
+  numpy = None
+
+
+def _word(temperature):
+  return int(round(temperature*16))&0x1FFF
+
+
+class LogReaderTest(unittest.TestCase):
+  def setUp(self):
+    self.dir = tempfile.mkdtemp()
+    self.path = os.path.join(self.dir ,"samples.log")
+
+  def tearDown(self):
+    shutil.rmtree(self.dir)
+
+  def test_records(self):
+    with MCP9808Log(self.path) as log:
+      log.append(1 ,_word(25.0) ,100.0)
+      log.append(2 ,_word(-10.5) ,100.5)
+    with MCP9808LogReader(self.path) as reader:
+      self.assertEqual(len(reader) ,2)
+      self.assertEqual(reader[1][1:] ,(2 ,_word(-10.5)))
+      self.assertEqual([sample.temperature for _ ,sample in reader.samples()] ,[25.0 ,-10.5])
+      timestamps ,temperatures = reader.temperatures(sensor=2)
+      self.assertEqual(list(temperatures) ,[-10.5])
+
+  def check_empty(self ,reader):
+    self.assertEqual(len(reader) ,0)
+    self.assertEqual(list(reader.samples()) ,[])
+    self.assertEqual(reader.find(0.0 ,1e9) ,(0 ,0))
+    timestamps ,temperatures = reader.temperatures()
+    self.assertEqual(len(timestamps) ,0)
+    self.assertEqual(len(temperatures) ,0)
+    if numpy is not None:
+      self.assertEqual(len(reader.array()) ,0)
+
+  def test_empty_file(self):
+    open(self.path ,"wb").close()
+    with MCP9808LogReader(self.path) as reader:
+      self.check_empty(reader)
+
+  def test_log_without_records(self):
+    MCP9808Log(self.path).close()
+    with MCP9808LogReader(self.path) as reader:
+      self.check_empty(reader)
+
+  def test_closed_reader(self):
+    with MCP9808Log(self.path) as log:
+      log.append(1 ,_word(25.0) ,100.0)
+    reader = MCP9808LogReader(self.path)
+    reader.close()
+    self.check_empty(reader)
+
+
+if __name__ == "__main__":
+  unittest.main()
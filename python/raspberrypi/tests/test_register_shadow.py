@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*
+'''!
+  @file test_register_shadow.py
+  @brief Tests of the register shadow, bus transactions counted on the simulated bus
+  @copyright Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license The MIT License (MIT)
+  @author [ZhixinLiu](zhixin.liu@dfrobot.com)
+  @version V1.1
+  @date 2026-10-18
+  @url https://github.com/DFRobot/DFRobot_MCP9808
+'''
+import os
+import sys
+import unittest
+
+sys.path.insert(0 ,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DFRobot_MCP9808 import *
+
+
+class ShadowTest(unittest.TestCase):
+  def setUp(self):
+    self.bus = SimulatedBus()
+    self.device = self.bus.attach(MCP9808_ADDRESS_0)
+    self.sensor = DFRobot_MCP9808_I2C(self.bus ,MCP9808_ADDRESS_0)
+
+  def transactions(self ,call ,*args):
+    self.bus.reset_counters()
+    rslt = call(*args)
+    return rslt ,self.bus.transactions
+
+  def test_without_shadow_every_access_uses_the_bus(self):
+    self.assertEqual(self.transactions(self.sensor.get_polarity_state) ,(POLARITY_LOW ,1))
+    self.assertEqual(self.transactions(self.sensor.get_polarity_state) ,(POLARITY_LOW ,1))
+    self.assertEqual(self.transactions(self.sensor.set_polarity ,POLARITY_HIGH) ,(0 ,2))
+
+  def test_getters_are_served_from_the_shadow(self):
+    self.sensor.set_register_cache(True)
+    self.assertEqual(self.transactions(self.sensor.get_polarity_state) ,(POLARITY_LOW ,1))
+    self.assertEqual(self.transactions(self.sensor.get_polarity_state) ,(POLARITY_LOW ,0))
+    self.assertEqual(self.transactions(self.sensor.get_alert_hysteresis) ,(HYSTERESIS_0_0 ,0))
+    self.assertEqual(self.transactions(self.sensor.get_lock_state) ,(NO_LOCK ,0))
+
+  def test_setters_write_once_against_the_shadow(self):
+    self.sensor.set_register_cache(True)
+    self.sensor.refresh()
+    self.assertEqual(self.transactions(self.sensor.set_polarity ,POLARITY_HIGH) ,(0 ,1))
+    self.assertEqual(self.transactions(self.sensor.set_alert_hysteresis ,HYSTERESIS_1_5) ,(0 ,1))
+    self.assertEqual(self.transactions(self.sensor.get_polarity_state) ,(POLARITY_HIGH ,0))
+    self.assertEqual(self.device.config&0x0602 ,HYSTERESIS_1_5<<8 | POLARITY_HIGH)
+
+  def test_refresh_reads_every_shadowed_register_once(self):
+    self.sensor.set_register_cache(True)
+    self.assertEqual(self.transactions(self.sensor.refresh)[1] ,len(SHADOW_REGISTERS))
+    self.assertEqual(self.transactions(self.sensor.get_resolution) ,(RESOLUTION_0_0625 ,0))
+
+  def test_invalidate_and_refresh_pick_up_outside_changes(self):
+    self.sensor.set_register_cache(True)
+    self.assertEqual(self.sensor.get_polarity_state() ,POLARITY_LOW)
+    self.device.config |= POLARITY_HIGH
+    self.assertEqual(self.transactions(self.sensor.get_polarity_state) ,(POLARITY_LOW ,0))
+    self.sensor.invalidate()
+    self.assertEqual(self.transactions(self.sensor.get_polarity_state) ,(POLARITY_HIGH ,1))
+    self.device.config &= ~POLARITY_HIGH
+    self.sensor.refresh()
+    self.assertEqual(self.transactions(self.sensor.get_polarity_state) ,(POLARITY_LOW ,0))
+
+  def test_disabling_drops_the_shadow(self):
+    self.sensor.set_register_cache(True)
+    self.sensor.get_polarity_state()
+    self.sensor.set_register_cache(False)
+    self.assertEqual(self.transactions(self.sensor.get_polarity_state) ,(POLARITY_LOW ,1))
+
+
+if __name__ == "__main__":
+  unittest.main()
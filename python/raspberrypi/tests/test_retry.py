@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*
+'''!
+  @file test_retry.py
+  @brief Tests of the retries of the synchronous bus transactions
+  @copyright Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license The MIT License (MIT)
+  @author [ZhixinLiu](zhixin.liu@dfrobot.com)
+  @version V1.1
+  @date 2026-10-18
+  @url https://github.com/DFRobot/DFRobot_MCP9808
+'''
+import os
+import sys
+import errno
+import unittest
+
+sys.path.insert(0 ,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import DFRobot_MCP9808 as driver
+from DFRobot_MCP9808 import *
+
+
+class RetryTest(unittest.TestCase):
+  def setUp(self):
+    self.now = 100.0
+    self.slept = []
+    self.saved = (driver._monotonic ,driver.time.sleep)
+    driver._monotonic = lambda: self.now
+    driver.time.sleep = self.sleep
+    self.bus = SimulatedBus()
+    self.bus.attach(MCP9808_ADDRESS_0 ,SimulatedMCP9808(25.0 ,clock=lambda: self.now))
+    self.sensor = DFRobot_MCP9808_I2C(self.bus ,MCP9808_ADDRESS_0)
+    self.bus.reset_counters()
+
+  def tearDown(self):
+    driver._monotonic ,driver.time.sleep = self.saved
+
+  def sleep(self ,delay):
+    self.slept.append(delay)
+    self.now += delay
+
+  def test_no_fault_no_retry(self):
+    self.sensor.set_retry_policy(RetryPolicy(retries=3 ,jitter=0))
+    self.assertEqual(self.sensor.get_device_id() ,DEVICE_ID)
+    self.assertEqual(self.sensor.get_error_stats() ,{"errors": 0 ,"retries": 0 ,"failures": 0})
+    self.assertEqual(self.slept ,[])
+    self.assertEqual(self.bus.transactions ,1)
+
+  def test_recovers_within_the_retries(self):
+    self.sensor.set_retry_policy(RetryPolicy(retries=3 ,backoff=0.001 ,max_backoff=0.1 ,jitter=0 ,deadline=None))
+    self.bus.inject_faults(2)
+    self.assertEqual(self.sensor.get_device_id() ,DEVICE_ID)
+    self.assertEqual(self.sensor.get_error_stats() ,{"errors": 2 ,"retries": 2 ,"failures": 0})
+    self.assertEqual(self.bus.transactions ,3)
+
+  def test_backoff_doubles_up_to_the_limit(self):
+    self.sensor.set_retry_policy(RetryPolicy(retries=4 ,backoff=0.002 ,max_backoff=0.005 ,jitter=0 ,deadline=None))
+    self.bus.inject_faults(4)
+    self.sensor.get_device_id()
+    self.assertEqual(self.slept ,[0.002 ,0.004 ,0.005 ,0.005])
+
+  def test_jitter_shortens_the_backoff(self):
+    self.sensor.set_retry_policy(RetryPolicy(retries=3 ,backoff=0.004 ,max_backoff=0.1 ,jitter=0.5 ,deadline=None))
+    self.bus.inject_faults(3)
+    self.sensor.get_device_id()
+    for delay ,full in zip(self.slept ,(0.004 ,0.008 ,0.016)):
+      self.assertTrue(full*0.5 <= delay <= full)
+
+  def test_bus_error_after_the_last_retry(self):
+    self.sensor.set_retry_policy(RetryPolicy(retries=2 ,backoff=0.001 ,jitter=0 ,deadline=None))
+    self.bus.inject_faults(3)
+    with self.assertRaises(MCP9808BusError) as raised:
+      self.sensor.get_device_id()
+    error = raised.exception
+    self.assertNotIsInstance(error ,MCP9808TimeoutError)
+    self.assertIsInstance(error ,IOError)
+    self.assertEqual((error.addr ,error.reg ,error.attempts) ,(MCP9808_ADDRESS_0 ,DEVICE_REGISTER ,3))
+    self.assertIsInstance(error.cause ,IOError)
+    self.assertEqual(error.errno ,getattr(errno ,"EREMOTEIO" ,121))
+    self.assertEqual(self.sensor.get_error_stats() ,{"errors": 3 ,"retries": 2 ,"failures": 1})
+    self.assertEqual(self.bus.transactions ,3)
+
+  def test_no_retries(self):
+    self.sensor.set_retry_policy(RetryPolicy(retries=0))
+    self.bus.inject_faults(1)
+    with self.assertRaises(MCP9808BusError) as raised:
+      self.sensor.get_device_id()
+    self.assertEqual(raised.exception.attempts ,1)
+    self.assertEqual(self.slept ,[])
+    self.assertEqual(self.sensor.get_error_stats() ,{"errors": 1 ,"retries": 0 ,"failures": 1})
+
+  def test_deadline_stops_the_retries(self):
+    self.sensor.set_retry_policy(RetryPolicy(retries=10 ,backoff=0.004 ,max_backoff=0.1 ,jitter=0 ,deadline=0.01))
+    self.bus.inject_faults(10)
+    with self.assertRaises(MCP9808TimeoutError) as raised:
+      self.sensor.get_device_id()
+    error = raised.exception
+    self.assertEqual(self.slept ,[0.004])                  # 0.004 + 0.008 is past the deadline, so no second wait
+    self.assertEqual((error.addr ,error.reg ,error.attempts) ,(MCP9808_ADDRESS_0 ,DEVICE_REGISTER ,2))
+    self.assertEqual(self.sensor.get_error_stats() ,{"errors": 2 ,"retries": 1 ,"failures": 1})
+    self.assertEqual(self.bus.transactions ,2)
+
+  def test_writes_are_retried(self):
+    self.sensor.set_retry_policy(RetryPolicy(retries=1 ,backoff=0.001 ,jitter=0 ,deadline=None))
+    self.bus.inject_faults(1)
+    self.sensor.set_resolution(RESOLUTION_0_125)
+    self.assertEqual(self.sensor.get_resolution() ,RESOLUTION_0_125)
+    self.assertEqual(self.sensor.get_error_stats()["retries"] ,1)
+
+  def test_policy_arguments(self):
+    self.assertRaises(ValueError ,RetryPolicy ,retries=-1)
+    self.assertRaises(ValueError ,RetryPolicy ,jitter=1.5)
+
+
+if __name__ == "__main__":
+  unittest.main()
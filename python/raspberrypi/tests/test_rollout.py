@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*
+'''!
+  @file test_rollout.py
+  @brief Tests of MCP9808Rollout, the profile check and the failures of single devices
+  @copyright Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license The MIT License (MIT)
+  @author [ZhixinLiu](zhixin.liu@dfrobot.com)
+  @version V1.1
+  @date 2026-10-18
+  @url https://github.com/DFRobot/DFRobot_MCP9808
+'''
+import os
+import sys
+import unittest
+
+sys.path.insert(0 ,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DFRobot_MCP9808 import *
+
+A ,B ,C = MCP9808_ADDRESS_0 ,MCP9808_ADDRESS_1 ,MCP9808_ADDRESS_2
+
+
+class RolloutTest(unittest.TestCase):
+  def setUp(self):
+    self.sims = [SimulatedBus() ,SimulatedBus()]
+    for sim in self.sims:
+      for addr in (A ,B ,C):
+        sim.attach(addr)
+    self.profile = MCP9808Config(resolution=RESOLUTION_0_125 ,thresholds=(34.0 ,30.0 ,20.0))
+
+  def targets(self ,buses=None):
+    return [(bus ,addr) for bus in (buses or self.sims) for addr in (A ,B ,C)]
+
+  def test_every_device_changed(self):
+    report = MCP9808Rollout(self.profile ,self.targets()).run()
+    self.assertEqual(report.counts()[ROLLOUT_CHANGED] ,6)
+    self.assertEqual([(r.bus ,r.addr) for r in report] ,self.targets())
+    self.assertEqual(MCP9808Rollout(self.profile ,self.targets()).run().counts()[ROLLOUT_UNCHANGED] ,6)
+
+  def test_invalid_profile_is_rejected_before_the_workers(self):
+    self.assertRaises(ValueError ,MCP9808Rollout ,MCP9808Config(thresholds=(300.0 ,30.0 ,20.0)) ,self.targets())
+    rollout = MCP9808Rollout(self.profile ,self.targets())
+    self.profile.thresholds = (34.0 ,30.0)
+    for sim in self.sims:
+      sim.reset_counters()
+    self.assertRaises(ValueError ,rollout.run)
+    self.assertEqual([sim.transactions for sim in self.sims] ,[0 ,0])
+
+  def test_a_raising_device_is_reported_failed(self):
+    buses = [MCP9808Bus(sim ,(A ,B ,C)) for sim in self.sims]
+    for bus in buses:
+      bus.discover()
+    def broken(profile ,verify):
+      raise ValueError("broken device")
+    buses[0].sensors[B]._apply = broken
+    report = MCP9808Rollout(self.profile ,self.targets(buses)).run()
+    self.assertEqual(len(report) ,6)
+    failed = report.with_status(ROLLOUT_FAILED)
+    self.assertEqual([(r.bus ,r.addr) for r in failed] ,[(buses[0] ,B)])
+    self.assertIsInstance(failed[0].error ,ValueError)
+    self.assertEqual(report.counts()[ROLLOUT_CHANGED] ,5)
+    self.assertEqual(self.sims[0].devices[C].resolution ,RESOLUTION_0_125)
+
+  def test_a_missing_device_is_reported_failed(self):
+    self.sims[1].detach(A)
+    report = MCP9808Rollout(self.profile ,self.targets()).run()
+    self.assertEqual([(r.bus ,r.addr) for r in report.with_status(ROLLOUT_FAILED)] ,[(self.sims[1] ,A)])
+    self.assertIsInstance(report.with_status(ROLLOUT_FAILED)[0].error ,MCP9808BusError)
+    self.assertEqual(report.counts()[ROLLOUT_CHANGED] ,5)
+
+  def test_failed_prefetch_falls_back_to_single_reads(self):
+    backend = I2CDevBackend(1 ,ioctl=self.sims[0].ioctl ,fd=-1)
+    def broken(addrs ,reg ,out):
+      raise ValueError("broken transfer")
+    backend.read_words = broken
+    report = MCP9808Rollout(self.profile ,[(backend ,addr) for addr in (A ,B ,C)]).run()
+    self.assertEqual(report.counts()[ROLLOUT_CHANGED] ,3)
+
+
+if __name__ == "__main__":
+  unittest.main()
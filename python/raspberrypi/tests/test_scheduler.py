@@ -0,0 +1,81 @@
+# -*- coding: utf-8 -*
+'''!
+  @file test_scheduler.py
+  @brief Tests of the fixed grid pacing shared by MCP9808Scheduler and MCP9808Acquisition
+  @copyright Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license The MIT License (MIT)
+  @author [ZhixinLiu](zhixin.liu@dfrobot.com)
+  @version V1.1
+  @date 2026-10-18
+  @url https://github.com/DFRobot/DFRobot_MCP9808
+'''
+import os
+import sys
+import unittest
+
+sys.path.insert(0 ,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import DFRobot_MCP9808
+from DFRobot_MCP9808 import _sleep_to_grid
+
+
+class GridTest(unittest.TestCase):
+  def setUp(self):
+    self.now = 100.0
+    self.slept = []
+    self.saved = (DFRobot_MCP9808._monotonic ,DFRobot_MCP9808.time.sleep)
+    DFRobot_MCP9808._monotonic = lambda: self.now
+    DFRobot_MCP9808.time.sleep = self.slept.append
+
+  def tearDown(self):
+    DFRobot_MCP9808._monotonic ,DFRobot_MCP9808.time.sleep = self.saved
+
+  def test_next_deadline(self):
+    self.now = 100.3
+    self.assertEqual(_sleep_to_grid(100.0 ,1.0) ,(101.0 ,0))
+    self.assertAlmostEqual(self.slept[0] ,0.7)
+
+  def test_missed_deadlines_are_skipped(self):
+    self.now = 103.5
+    self.assertEqual(_sleep_to_grid(100.0 ,1.0) ,(104.0 ,3))
+    self.assertAlmostEqual(self.slept[0] ,0.5)
+
+  def test_scheduler_counts_overruns(self):
+    bus = DFRobot_MCP9808.SimulatedBus()
+    bus.attach(DFRobot_MCP9808.MCP9808_ADDRESS_0)
+    scheduler = DFRobot_MCP9808.MCP9808Scheduler(DFRobot_MCP9808.DFRobot_MCP9808_I2C(bus ,DFRobot_MCP9808.MCP9808_ADDRESS_0) ,1.0)
+    self.assertEqual(scheduler.wait() ,100.0)
+    self.now = 102.5
+    self.assertEqual(scheduler.wait() ,103.0)
+    self.assertEqual(scheduler.overruns ,2)
+
+
+class PeriodTest(unittest.TestCase):
+  def setUp(self):
+    bus = DFRobot_MCP9808.SimulatedBus()
+    bus.attach(DFRobot_MCP9808.MCP9808_ADDRESS_0)
+    self.sensor = DFRobot_MCP9808.DFRobot_MCP9808_I2C(bus ,DFRobot_MCP9808.MCP9808_ADDRESS_0)
+
+  def test_requested_period_is_kept(self):
+    scheduler = DFRobot_MCP9808.MCP9808Scheduler(self.sensor ,1.0 ,DFRobot_MCP9808.RESOLUTION_0_5)
+    self.assertEqual((scheduler.period ,scheduler.limited) ,(1.0 ,False))
+    self.assertEqual(scheduler.set_period(0.045) ,0)
+    self.assertEqual(scheduler.period ,0.045)
+
+  def test_short_period_is_raised_to_the_conversion_time(self):
+    scheduler = DFRobot_MCP9808.MCP9808Scheduler(self.sensor ,0.01 ,DFRobot_MCP9808.RESOLUTION_0_0625)
+    self.assertTrue(scheduler.limited)
+    self.assertEqual(scheduler.period ,DFRobot_MCP9808.CONVERSION_TIME[DFRobot_MCP9808.RESOLUTION_0_0625])
+    self.assertEqual(scheduler.requested_period ,0.01)
+
+  def test_resolution_change_respaces_the_reads(self):
+    scheduler = DFRobot_MCP9808.MCP9808Scheduler(self.sensor ,0.1 ,DFRobot_MCP9808.RESOLUTION_0_5)
+    self.assertEqual(scheduler.period ,0.1)
+    scheduler.set_resolution(DFRobot_MCP9808.RESOLUTION_0_0625)
+    self.assertEqual((scheduler.period ,scheduler.limited) ,(0.25 ,True))
+    scheduler.set_resolution(DFRobot_MCP9808.RESOLUTION_0_5)
+    self.assertEqual((scheduler.period ,scheduler.limited) ,(0.1 ,False))
+
+
+if __name__ == "__main__":
+  unittest.main()
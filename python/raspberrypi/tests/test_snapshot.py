@@ -0,0 +1,114 @@
+# -*- coding: utf-8 -*
+'''!
+  @file test_snapshot.py
+  @brief Tests of snapshot(), every register read once and every field decoded
+  @copyright Copyright (c) 2010 DFRobot Co.Ltd (http://www.dfrobot.com)
+  @license The MIT License (MIT)
+  @author [ZhixinLiu](zhixin.liu@dfrobot.com)
+  @version V1.1
+  @date 2026-10-18
+  @url https://github.com/DFRobot/DFRobot_MCP9808
+'''
+import os
+import sys
+import unittest
+
+sys.path.insert(0 ,os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from DFRobot_MCP9808 import *
+
+
+class SnapshotTest(unittest.TestCase):
+  def setUp(self):
+    self.now = 0.0
+    self.bus = SimulatedBus()
+    self.device = self.bus.attach(MCP9808_ADDRESS_0 ,SimulatedMCP9808(25.0 ,clock=lambda: self.now))
+    self.sensor = DFRobot_MCP9808_I2C(self.bus ,MCP9808_ADDRESS_0)
+    self.reads = []
+    read_register = self.device.read_register
+    def counting(reg ,length):
+      self.reads.append(reg)
+      return read_register(reg ,length)
+    self.device.read_register = counting
+
+  def configure(self):
+    sensor = self.sensor
+    self.assertEqual(sensor.set_threshold(34.0 ,30.5 ,-20.25) ,0)
+    sensor.set_resolution(RESOLUTION_0_25)
+    sensor.set_alert_hysteresis(HYSTERESIS_3_0)
+    sensor.set_polarity(POLARITY_HIGH)
+    sensor.set_alert_response_mode(ONLY_CRIT_RESPONSE)
+    sensor.set_alert_output_mode(INTERRPUT_OUTPUT_MODE)
+    sensor.set_lock_state(WIN_LOCK)
+    self.device.temperature = 36.5
+    self.now += 1.0
+    self.sensor.get_temperature()                          # alert bit of CONFIG follows the last conversion
+
+  def snapshot(self):
+    self.bus.reset_counters()
+    del self.reads[:]
+    return self.sensor.snapshot()
+
+  def test_every_register_is_read_once(self):
+    self.snapshot()
+    self.assertEqual(sorted(self.reads) ,list(range(FRU_REGISTER ,RESOLUTION_REGISTER + 1)))
+    self.assertEqual(self.bus.transactions ,RESOLUTION_REGISTER + 1)
+
+  def test_fields(self):
+    self.configure()
+    snapshot = self.snapshot()
+    self.assertEqual((snapshot.crit ,snapshot.upper ,snapshot.lower) ,(34.0 ,30.5 ,-20.25))
+    self.assertEqual(snapshot.resolution ,RESOLUTION_0_25)
+    self.assertEqual(snapshot.hysteresis ,HYSTERESIS_3_0)
+    self.assertEqual(snapshot.polarity ,POLARITY_HIGH)
+    self.assertEqual(snapshot.response_mode ,ONLY_CRIT_RESPONSE)
+    self.assertEqual(snapshot.alert_output_mode ,INTERRPUT_OUTPUT_MODE)
+    self.assertEqual(snapshot.alert_enable ,ENABLE_ALERT)
+    self.assertEqual(snapshot.lock ,WIN_LOCK)
+    self.assertEqual(snapshot.power_mode ,1)
+    self.assertEqual(snapshot.temperature ,36.5)
+    self.assertEqual(snapshot.state ,TCRIT_FLAG|TUPPER_FLAG)
+    self.assertTrue(snapshot.alert_status)
+    self.assertEqual((snapshot.manufacturer_id ,snapshot.device_id ,snapshot.revision) ,(MANUFACTURER_ID ,DEVICE_ID ,0))
+    self.assertEqual(snapshot.raw[TEMPERATURE_REGISTER]&0x1FFF ,int(36.5*16))
+
+  def test_fields_match_the_getters(self):
+    self.configure()
+    snapshot = self.snapshot()
+    sensor = self.sensor
+    self.assertEqual(snapshot.power_mode ,sensor.get_power_mode())
+    self.assertEqual(snapshot.hysteresis ,sensor.get_alert_hysteresis())
+    self.assertEqual(snapshot.lock ,sensor.get_lock_state())
+    self.assertEqual(snapshot.alert_output_mode ,sensor.get_alert_output_mode())
+    self.assertEqual(snapshot.polarity ,sensor.get_polarity_state())
+    self.assertEqual(snapshot.response_mode ,sensor.get_alert_response_mode())
+    self.assertEqual(snapshot.alert_enable ,sensor.get_alert_enable_state())
+    self.assertEqual(snapshot.resolution ,sensor.get_resolution())
+
+  def test_sleep_and_disabled_alert(self):
+    self.sensor.sleep_mode()
+    snapshot = self.snapshot()
+    self.assertEqual(snapshot.power_mode ,0)
+    self.assertEqual(snapshot.alert_output_mode ,DISABLE_OUTPUT_MODE)
+    self.assertEqual(snapshot.alert_enable ,DISABLE_ALERT)
+    self.assertFalse(snapshot.alert_status)
+    self.assertEqual(snapshot.lock ,NO_LOCK)
+
+  def test_negative_thresholds_and_crit_lock(self):
+    self.assertEqual(self.sensor.set_threshold(-10.0 ,-30.0 ,-40.0) ,0)
+    self.sensor.set_lock_state(CRIT_WIN_LOCK)
+    snapshot = self.snapshot()
+    self.assertEqual((snapshot.crit ,snapshot.upper ,snapshot.lower ,snapshot.lock) ,(-10.0 ,-30.0 ,-40.0 ,CRIT_WIN_LOCK))
+
+  def test_shadow_is_refreshed(self):
+    self.configure()
+    self.sensor.set_register_cache(True)
+    snapshot = self.snapshot()
+    self.bus.reset_counters()
+    self.assertEqual(self.sensor.get_lock_state() ,snapshot.lock)
+    self.assertEqual(self.sensor.get_resolution() ,snapshot.resolution)
+    self.assertEqual(self.bus.transactions ,0)
+
+
+if __name__ == "__main__":
+  unittest.main()